@@ -4,11 +4,16 @@ Centralized constants for HTTP status codes used throughout the application.
 This improves maintainability and reduces magic numbers.
 """
 
+OK = 200
+CREATED = 201
+NO_CONTENT = 204
+
 BAD_REQUEST = 400
 UNAUTHORIZED = 401
 NOT_FOUND = 404
 NOT_ACCEPTABLE = 406
 CONFLICT = 409
+UNPROCESSABLE_ENTITY = 422
 
 INTERNAL_SERVER_ERROR = 500
 SERVICE_UNAVAILABLE = 503
@@ -1,11 +1,152 @@
 from pathlib import Path
-from typing import List, Dict, Any
+import os
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from app.repositories import sqlite_store
 from app.repositories.repository_helpers import load_json_data, save_json_data
 
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "products.json"
 
+# "json" (default) keeps the catalog in products.json; "sqlite" uses sqlite_store
+BACKEND = os.environ.get("STORAGE_BACKEND", "json").lower()
+
+# Process-wide catalog cache. load_all() hands out the same list object until
+# the backing store changes (products.json mtime, size or inode, or the SQLite
+# data version) or save_all() writes through it, so callers must treat the
+# returned list as read-only and copy it before mutating.
+_lock = threading.Lock()
+_cache: Dict[str, Any] = {
+    "source": None,
+    "key": None,
+    "items": None,
+}
+_stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+
+def _file_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _store(source: Any, key: Any, items: Optional[List[Dict[str, Any]]]) -> None:
+    _cache["source"] = source
+    _cache["key"] = key
+    _cache["items"] = items
+
+
+def _cached_load(source: Any, key: Any, loader) -> List[Dict[str, Any]]:
+    with _lock:
+        if key is not None and _cache["source"] == source and _cache["key"] == key:
+            _stats["hits"] += 1
+            return _cache["items"]
+
+        _stats["misses"] += 1
+        if _cache["items"] is not None:
+            _stats["reloads"] += 1
+
+        items = loader()
+        if key is None:
+            # nothing to validate a cached copy against
+            _store(None, None, None)
+        else:
+            _store(source, key, items)
+        return items
+
+
 def load_all() -> List[Dict[str, Any]]:
-    return load_json_data(DATA_PATH)
+    if BACKEND == "sqlite":
+        source = ("sqlite", sqlite_store.DB_PATH)
+        return _cached_load(source, sqlite_store.version(), sqlite_store.load_products)
+
+    path = DATA_PATH
+    if not path.exists():
+        with _lock:
+            if _cache["items"] is not None:
+                _store(None, None, None)
+        return []
+    return _cached_load(path, _file_key(path), lambda: load_json_data(path))
+
 
 def save_all(items: List[Dict[str, Any]]) -> None:
-    save_json_data(DATA_PATH, items)
+    if BACKEND == "sqlite":
+        with _lock:
+            sqlite_store.save_products(items)
+            _store(("sqlite", sqlite_store.DB_PATH), sqlite_store.version(), list(items))
+        return
+
+    path = DATA_PATH
+    with _lock:
+        before = _file_key(path)
+        save_json_data(path, items)
+        key = _file_key(path)
+        if key is None or key == before:
+            # the atomic replace always yields a new inode; if the key did not
+            # move, the write never reached the file we validate against
+            _store(None, None, None)
+        else:
+            _store(path, key, list(items))
+
+
+def get_by_id(product_id: str) -> Optional[Dict[str, Any]]:
+    """Point read by product_id (a primary key lookup on the SQLite backend)."""
+    if BACKEND == "sqlite":
+        return sqlite_store.get_product(product_id)
+    return next((it for it in load_all() if it.get("product_id") == product_id), None)
+
+
+def save_changes(
+    items: List[Dict[str, Any]],
+    upserted: Iterable[Dict[str, Any]] = (),
+    deleted: Iterable[str] = (),
+) -> None:
+    """Persist items: the current catalog with upserted written and deleted removed.
+
+    The JSON backend rewrites the file; SQLite only touches those rows and
+    keeps items as its cached catalog.
+    """
+    if BACKEND == "sqlite":
+        source = ("sqlite", sqlite_store.DB_PATH)
+        with _lock:
+            # items were derived from the cache; if another connection wrote
+            # since, reload instead of caching a list that misses its rows
+            fresh = _cache["source"] == source and _cache["key"] == sqlite_store.version()
+            sqlite_store.write_products(upserted, deleted)
+            if fresh:
+                _store(source, sqlite_store.version(), list(items))
+            else:
+                _store(None, None, None)
+        return
+    save_all(items)
+
+
+def upsert(record: Dict[str, Any]) -> None:
+    """Insert or replace one product, keeping its position if it already exists."""
+    products = list(load_all())
+    for idx, it in enumerate(products):
+        if it.get("product_id") == record.get("product_id"):
+            products[idx] = record
+            break
+    else:
+        products.append(record)
+    save_changes(products, upserted=[record])
+
+
+def delete(product_id: str) -> bool:
+    products = load_all()
+    remaining = [it for it in products if it.get("product_id") != product_id]
+    if len(remaining) == len(products):
+        return False
+    save_changes(remaining, deleted=[product_id])
+    return True
+
+
+def cache_stats() -> Dict[str, int]:
+    return dict(_stats)
+
+
+def invalidate_cache() -> None:
+    with _lock:
+        _store(None, None, None)
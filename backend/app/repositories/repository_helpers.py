@@ -2,7 +2,7 @@ from pathlib import Path
 import json
 import os
 import uuid
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 
 def load_json_data(data_path: Path) -> List[Dict[str, Any]]:
@@ -19,3 +19,20 @@ def save_json_data(data_path: Path, items: List[Dict[str, Any]]) -> None:
         json.dump(items, f, ensure_ascii=False, indent=2)
     os.replace(tmp, data_path)
 
+
+def append_json_line(log_path: Path, record: Dict[str, Any]) -> Tuple[int, int]:
+    """Append record as one JSON line; returns the file offsets it spans.
+
+    A torn last line (a crash mid-append) is terminated first so it cannot
+    swallow the new record.
+    """
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("a+b") as f:
+        start = f.tell()
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        return start, f.tell()
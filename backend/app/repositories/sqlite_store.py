@@ -0,0 +1,230 @@
+"""SQLite storage backend for products and users.
+
+Selected with STORAGE_BACKEND=sqlite. Records are kept as JSON blobs keyed by
+their ID so the repositories can hand back the same dicts the JSON files
+produce, while point reads and writes go through the primary key index
+instead of rewriting a whole file. The database runs in WAL mode so readers
+never block the writer.
+
+One-shot migration from the JSON files:
+
+    python -m app.repositories.sqlite_store migrate [--force]
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from app.repositories.repository_helpers import load_json_data
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DB_PATH = Path(os.environ.get("SQLITE_PATH", DATA_DIR / "beij.db"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL UNIQUE,
+    username TEXT,
+    email TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_username ON users (username);
+CREATE INDEX IF NOT EXISTS users_email ON users (email COLLATE NOCASE);
+"""
+
+# One shared connection per database file. FastAPI runs sync endpoints on a
+# thread pool, so access is serialized with a lock rather than handing each
+# thread its own connection (which would also make data_version per-thread).
+_lock = threading.RLock()
+_conn: Dict[str, Any] = {"path": None, "db": None}
+_local_writes = 0
+
+
+def _db() -> sqlite3.Connection:
+    path = DB_PATH
+    if _conn["db"] is not None and _conn["path"] == path:
+        return _conn["db"]
+    if _conn["db"] is not None:
+        _conn["db"].close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(_SCHEMA)
+    _conn["path"] = path
+    _conn["db"] = db
+    return db
+
+
+def close() -> None:
+    with _lock:
+        if _conn["db"] is not None:
+            _conn["db"].close()
+        _conn["path"] = None
+        _conn["db"] = None
+
+
+def _wrote() -> None:
+    global _local_writes
+    _local_writes += 1
+
+
+def version() -> Tuple[int, int]:
+    """Changes whenever this process or any other connection commits.
+
+    PRAGMA data_version only moves for commits made by *other* connections,
+    so it is paired with a counter of our own writes.
+    """
+    with _lock:
+        data_version = _db().execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, _local_writes)
+
+
+def _decode(rows) -> List[Dict[str, Any]]:
+    return [json.loads(row[0]) for row in rows]
+
+
+def _encode(rec: Dict[str, Any]) -> str:
+    return json.dumps(rec, ensure_ascii=False)
+
+
+# ---------------------------------------------------------------- products
+
+def load_products() -> List[Dict[str, Any]]:
+    with _lock:
+        return _decode(_db().execute("SELECT data FROM products ORDER BY seq"))
+
+
+def save_products(items: List[Dict[str, Any]]) -> None:
+    with _lock:
+        db = _db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM products")
+            db.executemany(
+                "INSERT OR REPLACE INTO products (product_id, data) VALUES (?, ?)",
+                ((str(it.get("product_id")), _encode(it)) for it in items),
+            )
+        _wrote()
+
+
+def get_product(product_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        row = _db().execute(
+            "SELECT data FROM products WHERE product_id = ?", (product_id,)
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def write_products(upserted: Iterable[Dict[str, Any]], deleted: Iterable[str]) -> None:
+    """Upsert and delete rows by product_id in one transaction."""
+    with _lock:
+        db = _db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(
+                "DELETE FROM products WHERE product_id = ?",
+                ((str(pid),) for pid in deleted),
+            )
+            # ON CONFLICT keeps the row's seq, so updates do not move it in list order
+            db.executemany(
+                "INSERT INTO products (product_id, data) VALUES (?, ?) "
+                "ON CONFLICT(product_id) DO UPDATE SET data = excluded.data",
+                ((str(rec["product_id"]), _encode(rec)) for rec in upserted),
+            )
+        _wrote()
+
+
+# ------------------------------------------------------------------- users
+
+def _user_row(rec: Dict[str, Any]) -> Tuple[str, Any, Any, str]:
+    return (str(rec["user_id"]), rec.get("username"), rec.get("email"), _encode(rec))
+
+
+def load_users() -> List[Dict[str, Any]]:
+    with _lock:
+        return _decode(_db().execute("SELECT data FROM users ORDER BY seq"))
+
+
+def save_users(items: List[Dict[str, Any]]) -> None:
+    with _lock:
+        db = _db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM users")
+            db.executemany(
+                "INSERT OR REPLACE INTO users (user_id, username, email, data) VALUES (?, ?, ?, ?)",
+                (_user_row(it) for it in items),
+            )
+        _wrote()
+
+
+def get_user(user_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        row = _db().execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def upsert_user(rec: Dict[str, Any]) -> None:
+    with _lock:
+        _db().execute(
+            "INSERT INTO users (user_id, username, email, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET "
+            "username = excluded.username, email = excluded.email, data = excluded.data",
+            _user_row(rec),
+        )
+        _wrote()
+
+
+# --------------------------------------------------------------- migration
+
+def _count(table: str) -> int:
+    with _lock:
+        return _db().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def migrate_from_json(
+    products_path: Path = DATA_DIR / "products.json",
+    users_path: Path = DATA_DIR / "users.json",
+    force: bool = False,
+) -> Dict[str, int]:
+    """Copy the JSON files into the database.
+
+    Tables that already hold rows are left alone unless force is set, so the
+    migration is safe to run more than once.
+    """
+    migrated = {"products": 0, "users": 0}
+    if force or _count("products") == 0:
+        products = load_json_data(products_path)
+        save_products(products)
+        migrated["products"] = len(products)
+    if force or _count("users") == 0:
+        users = load_json_data(users_path)
+        save_users(users)
+        migrated["users"] = len(users)
+    return migrated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BEIJ SQLite storage backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import products.json and users.json")
+    migrate.add_argument("--force", action="store_true", help="overwrite existing rows")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        counts = migrate_from_json(force=args.force)
+        print(f"Migrated {counts['products']} products and {counts['users']} users into {DB_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,170 @@
 from pathlib import Path
+import hashlib
+import heapq
+import json
 import os
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Set
 from datetime import datetime
-from app.repositories.repository_helpers import load_json_data, save_json_data
+from app.repositories.repository_helpers import load_json_data, save_json_data, append_json_line
 
 TOKENS_DIR = Path(os.environ.get("TOKENS_DIR", "/tmp"))
 TOKENS_DIR.mkdir(parents=True, exist_ok=True)
 
 DATA_PATH = TOKENS_DIR / "tokens.json"
 
+# Sessions live in memory: a dict keyed by the token's SHA-256, a per-user set
+# for logout-everywhere, and a min-heap on expires_at so expiry sweeps only
+# touch tokens that actually expired. Adds and removals are appended to a
+# small log next to tokens.json; the snapshot is rewritten (without expired
+# tokens) every LOG_COMPACT_EVERY log lines. Lookups never touch the disk.
+LOG_COMPACT_EVERY = int(os.environ.get("TOKENS_LOG_COMPACT_EVERY", "200"))
+
+_lock = threading.RLock()
+_state: Dict[str, Any] = {
+    "path": None,
+    "tokens": {},
+    "by_user": {},
+    "heap": [],
+    "log_ops": 0,
+}
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _log_path() -> Path:
+    return DATA_PATH.with_suffix(".log")
+
+
+def _put(record: Dict[str, Any]) -> None:
+    key = _hash(record.get("token", ""))
+    _drop(key)
+    _state["tokens"][key] = record
+    _state["by_user"].setdefault(record.get("user_id"), set()).add(key)
+    heapq.heappush(_state["heap"], (record.get("expires_at", ""), key))
+
+
+def _drop(key: str) -> None:
+    # heap entries are left behind and skipped when they surface
+    record = _state["tokens"].pop(key, None)
+    if record is None:
+        return
+    keys: Set[str] = _state["by_user"].get(record.get("user_id"), set())
+    keys.discard(key)
+    if not keys:
+        _state["by_user"].pop(record.get("user_id"), None)
+
+
+def _replay(op: Dict[str, Any]) -> None:
+    kind = op.get("op")
+    if kind == "add":
+        _put(op["record"])
+    elif kind == "remove":
+        _drop(op["key"])
+    elif kind == "remove_user":
+        for key in list(_state["by_user"].get(op["user_id"], ())):
+            _drop(key)
+
+
+def _reset(path: Any, records: List[Dict[str, Any]]) -> None:
+    _state["path"] = path
+    _state["tokens"] = {}
+    _state["by_user"] = {}
+    _state["heap"] = []
+    _state["log_ops"] = 0
+    for record in records:
+        _put(record)
+
+
+def _ensure_loaded() -> None:
+    if _state["path"] == DATA_PATH:
+        return
+    _reset(DATA_PATH, load_json_data(DATA_PATH))
+    log = _log_path()
+    if log.exists():
+        with log.open("rb") as f:
+            for line in f:
+                try:
+                    _replay(json.loads(line))
+                except (ValueError, KeyError):
+                    # torn trailing line from a crash
+                    continue
+                _state["log_ops"] += 1
+    _sweep()
+
+
+def _sweep() -> int:
+    now_iso = datetime.utcnow().isoformat()
+    heap = _state["heap"]
+    removed = 0
+    while heap and heap[0][0] <= now_iso:
+        expires_at, key = heapq.heappop(heap)
+        record = _state["tokens"].get(key)
+        if record is not None and record.get("expires_at", "") == expires_at:
+            _drop(key)
+            removed += 1
+    return removed
+
+
+def _write_snapshot() -> None:
+    save_json_data(DATA_PATH, list(_state["tokens"].values()))
+    log = _log_path()
+    if log.exists():
+        log.open("wb").close()
+    _state["log_ops"] = 0
+
+
+def _log(op: Dict[str, Any]) -> None:
+    # called after op is applied in memory, so a compaction here includes it
+    append_json_line(_log_path(), op)
+    _state["log_ops"] += 1
+    if _state["log_ops"] >= LOG_COMPACT_EVERY:
+        _sweep()
+        _write_snapshot()
+
+
 def load_all() -> List[Dict[str, Any]]:
-    return load_json_data(DATA_PATH)
+    with _lock:
+        _ensure_loaded()
+        return list(_state["tokens"].values())
 
 def save_all(tokens: List[Dict[str, Any]]) -> None:
-    save_json_data(DATA_PATH, tokens)
+    with _lock:
+        _reset(DATA_PATH, tokens)
+        _write_snapshot()
 
 def add_token(token: Dict[str, Any]) -> None:
-    tokens = load_all()
-    tokens.append(token)
-    save_all(tokens)
+    with _lock:
+        _ensure_loaded()
+        _put(token)
+        _log({"op": "add", "record": token})
 
 def remove_token(token: str) -> None:
-    tokens = load_all()
-    save_all([t for t in tokens if t.get("token") != token])
+    with _lock:
+        _ensure_loaded()
+        key = _hash(token)
+        if key in _state["tokens"]:
+            _drop(key)
+            _log({"op": "remove", "key": key})
 
 def get_token(token: str) -> Dict[str, Any] | None:
-    tokens = load_all()
-    return next((t for t in tokens if t.get("token") == token), None)
+    with _lock:
+        _ensure_loaded()
+        return _state["tokens"].get(_hash(token))
 
 def remove_expired_tokens() -> None:
-    tokens = load_all()
-    now_iso = datetime.now().isoformat()
-    save_all([t for t in tokens if t.get("expires_at", "") > now_iso])
+    # expiry is implied by expires_at, so nothing is logged; the next
+    # snapshot simply leaves the expired tokens out
+    with _lock:
+        _ensure_loaded()
+        _sweep()
 
 def remove_user_tokens(user_id: str) -> None:
-    tokens = load_all()
-    save_all([t for t in tokens if t.get("user_id") != user_id])
+    with _lock:
+        _ensure_loaded()
+        if _state["by_user"].get(user_id):
+            op = {"op": "remove_user", "user_id": user_id}
+            _replay(op)
+            _log(op)
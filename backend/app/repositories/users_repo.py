@@ -1,53 +1,386 @@
 from pathlib import Path
-from typing import List, Dict, Any, Optional 
+import bisect
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from app.error_handling import NotFound
-from app.repositories.repository_helpers import load_json_data, save_json_data
+from app.repositories import sqlite_store
+from app.repositories.repository_helpers import load_json_data, save_json_data, append_json_line
 
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "users.json"
 
+# "json" (default) keeps users in users.json; "sqlite" uses sqlite_store
+BACKEND = os.environ.get("STORAGE_BACKEND", "json").lower()
+
+# Per-user writes (saved items, recently viewed, view history, and whole-record
+# upserts from registration or profile edits) are not written into users.json
+# directly. Each one is appended as a JSON line to a log next to the snapshot
+# and applied to an in-memory copy of the users; the log is folded back into
+# users.json every LOG_COMPACT_EVERY operations, on save_all(), or via
+# compact(). Replaying a log line twice is harmless, so a crash between
+# writing the snapshot and rotating the log loses nothing. Rotation renames
+# the log aside and replays whatever another writer appended to it after
+# our last read, so those lines are not dropped with it.
+LOG_COMPACT_EVERY = int(os.environ.get("USERS_LOG_COMPACT_EVERY", "500"))
+
+_lock = threading.RLock()
+_state: Dict[str, Any] = {
+    "path": None,
+    "snapshot_key": None,
+    "users": [],
+    "index": None,
+    "log_offset": 0,
+    "log_ops": 0,
+}
+
+
+class UserIndex:
+    """Secondary indexes over a load_all() list: user_id, username and email.
+
+    Values are positions in the list rather than the records themselves, so
+    log replays that swap a record in place (and never touch username or
+    email) leave the index valid; registrations and profile edits patch it
+    through add() and rekey(). Email keys are lower-cased.
+    """
+
+    def __init__(self, users: List[Dict[str, Any]]):
+        self.users = users
+        self.by_id: Dict[Any, int] = {}
+        self.by_username: Dict[Any, List[int]] = {}
+        self.by_email: Dict[str, List[int]] = {}
+        for pos, user in enumerate(users):
+            self.add(pos, user)
+
+    @staticmethod
+    def _keys(user: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+        email = user.get("email")
+        return user.get("username"), email.lower() if isinstance(email, str) else None
+
+    def add(self, pos: int, user: Dict[str, Any]) -> None:
+        """Index the user at pos; position lists stay in list order."""
+        self.by_id.setdefault(user.get("user_id"), pos)
+        username, email = self._keys(user)
+        bisect.insort(self.by_username.setdefault(username, []), pos)
+        if email is not None:
+            bisect.insort(self.by_email.setdefault(email, []), pos)
+
+    @staticmethod
+    def _drop(table: Dict[Any, List[int]], key: Any, pos: int) -> None:
+        positions = table.get(key, [])
+        if pos in positions:
+            positions.remove(pos)
+            if not positions:
+                del table[key]
+
+    def rekey(self, pos: int, old: Dict[str, Any], new: Dict[str, Any]) -> None:
+        """Move pos to new's username and email after its record was replaced."""
+        (old_name, old_email), (new_name, new_email) = self._keys(old), self._keys(new)
+        if old_name != new_name:
+            self._drop(self.by_username, old_name, pos)
+            bisect.insort(self.by_username.setdefault(new_name, []), pos)
+        if old_email != new_email:
+            if old_email is not None:
+                self._drop(self.by_email, old_email, pos)
+            if new_email is not None:
+                bisect.insort(self.by_email.setdefault(new_email, []), pos)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        pos = self.by_id.get(user_id)
+        return None if pos is None else self.users[pos]
+
+    def with_username(self, username: str) -> List[Dict[str, Any]]:
+        return [self.users[pos] for pos in self.by_username.get(username, ())]
+
+    def with_email(self, email: str) -> List[Dict[str, Any]]:
+        return [self.users[pos] for pos in self.by_email.get(email.lower(), ())]
+
+    def find_login(self, username_or_email: str) -> Optional[Dict[str, Any]]:
+        """First user (in list order) whose username or email matches."""
+        positions = self.by_username.get(username_or_email, []) + self.by_email.get(username_or_email.lower(), [])
+        return self.users[min(positions)] if positions else None
+
+
+def _log_path() -> Path:
+    return DATA_PATH.with_suffix(".log")
+
+
+def _file_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _apply(op: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
+    # copy-on-write: the record (and its lists) handed out earlier stay as
+    # they were; _apply_to_state() swaps the copy into the shared list
+    user = dict(user)
+    kind = op.get("op")
+    product_id = op.get("product_id")
+
+    if kind == "put_user":
+        return dict(op["user"])
+
+    if kind in ("add_saved", "remove_saved"):
+        saved = user.get("saved_item_ids")
+        saved = list(saved) if isinstance(saved, list) else []
+        if kind == "add_saved" and product_id not in saved:
+            saved.append(product_id)
+        if kind == "remove_saved" and product_id in saved:
+            saved.remove(product_id)
+        user["saved_item_ids"] = saved
+
+    elif kind == "add_recent":
+        rv = user.get("recently_viewed_ids")
+        rv = list(rv) if isinstance(rv, list) else []
+        if product_id in rv:
+            rv.remove(product_id)
+        rv.insert(0, product_id)
+        user["recently_viewed_ids"] = rv[:op["max_items"]]
+
+    elif kind == "add_view":
+        history = user.get("recently_viewed") or []
+        history = [v for v in history if v.get("product_id") != product_id]
+        history.insert(0, {"product_id": product_id, "viewed_at": op["viewed_at"]})
+        user["recently_viewed"] = history[:op["max_items"]]
+
+    return user
+
+
+def _reset(path: Optional[Path], key: Any, users: List[Dict[str, Any]]) -> None:
+    _state["path"] = path
+    _state["snapshot_key"] = key
+    _state["users"] = users
+    _state["index"] = UserIndex(users)
+    _state["log_offset"] = 0
+    _state["log_ops"] = 0
+
+
+def _apply_to_state(op: Dict[str, Any]) -> None:
+    users = _state["users"]
+    index = _state["index"]
+    idx = index.by_id.get(op.get("user_id"))
+    if idx is not None:
+        old = users[idx]
+        users[idx] = _apply(op, old)
+        if op.get("op") == "put_user":
+            # the username or email may have changed
+            index.rekey(idx, old, users[idx])
+    elif op.get("op") == "put_user":
+        users.append(_apply(op, {}))
+        index.add(len(users) - 1, users[-1])
+
+
+def _tail_log() -> None:
+    log = _log_path()
+    try:
+        size = log.stat().st_size
+    except OSError:
+        _state["log_offset"] = 0
+        return
+    if size < _state["log_offset"]:
+        # compacted elsewhere; replaying from the start is idempotent
+        _state["log_offset"] = 0
+    if size == _state["log_offset"]:
+        return
+
+    with log.open("rb") as f:
+        f.seek(_state["log_offset"])
+        data = f.read()
+    # a trailing line without its newline is still being written (or torn)
+    end = data.rfind(b"\n") + 1
+    for op in _parse_ops(data[:end]):
+        _apply_to_state(op)
+        _state["log_ops"] += 1
+    _state["log_offset"] += end
+
+
+def _parse_ops(data: bytes) -> List[Dict[str, Any]]:
+    ops = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            ops.append(json.loads(line))
+        except ValueError:
+            continue
+    return ops
+
+
+def _rotate_log(offset: int) -> List[Dict[str, Any]]:
+    """Move the log aside and return the ops written to it past offset.
+
+    Writers append to a fresh log from the rename on, so nothing after the
+    returned ops can land in the old one.
+    """
+    log = _log_path()
+    rotated = log.with_name(f"{log.name}.{os.getpid()}.{threading.get_ident()}")
+    try:
+        os.replace(log, rotated)
+    except FileNotFoundError:
+        return []
+    try:
+        data = rotated.read_bytes()
+    finally:
+        rotated.unlink()
+    if len(data) < offset:
+        # compacted elsewhere since our last read; replaying it all is idempotent
+        offset = 0
+    return _parse_ops(data[offset:])
+
+
+def _sync() -> None:
+    path = DATA_PATH
+    key = _file_key(path)
+    if _state["path"] != path or key is None or key != _state["snapshot_key"]:
+        _reset(path, key, load_json_data(path))
+    _tail_log()
+
+
+def _write_snapshot(items: List[Dict[str, Any]]) -> None:
+    path = DATA_PATH
+    # log lines up to log_offset are folded into items (or replaced by them)
+    offset = _state["log_offset"] if _state["path"] == path else 0
+    before = _file_key(path)
+    save_json_data(path, items)
+    key = _file_key(path)
+    if key is None or key == before:
+        # the write never reached the file we validate against
+        _reset(None, None, [])
+        return
+    if items is _state["users"]:
+        # compaction: the list and its index already hold what was written
+        _state.update(path=path, snapshot_key=key, log_offset=0, log_ops=0)
+    else:
+        _reset(path, key, list(items))
+
+    tail = _rotate_log(offset)
+    if tail:
+        # appended by another writer after our last _sync()
+        for op in tail:
+            _apply_to_state(op)
+        save_json_data(path, _state["users"])
+        _state["snapshot_key"] = _file_key(path)
+
+
+def _append(op: Dict[str, Any]) -> Dict[str, Any]:
+    with _lock:
+        _sync()
+        if op["op"] != "put_user" and op["user_id"] not in _state["index"].by_id:
+            raise NotFound("User not found")
+
+        start, end = append_json_line(_log_path(), op)
+        if start == _state["log_offset"]:
+            _state["log_offset"] = end
+        # otherwise another writer appended first; the next _sync() picks
+        # both lines up and re-applying ours is a no-op
+
+        _apply_to_state(op)
+        _state["log_ops"] += 1
+        user = _state["index"].get(op["user_id"])
+        # load_all() reads nothing without a snapshot, so the first user makes one
+        if _state["log_ops"] >= LOG_COMPACT_EVERY or _state["snapshot_key"] is None:
+            _write_snapshot(_state["users"])
+        return dict(user)
+
+
+def _sqlite_source() -> Tuple[str, Path]:
+    return ("sqlite", sqlite_store.DB_PATH)
+
 def load_all() -> List[Dict[str,Any]]:
-    return load_json_data(DATA_PATH)
+    """All users as a shared list, so treat it as read-only.
+
+    Later writes update the list in place (a changed record is swapped for a
+    new dict), so callers that need a stable view should copy it.
+    """
+    if BACKEND == "sqlite":
+        with _lock:
+            key = sqlite_store.version()
+            if _state["path"] != _sqlite_source() or _state["snapshot_key"] != key:
+                _reset(_sqlite_source(), key, sqlite_store.load_users())
+            return _state["users"]
+    with _lock:
+        if not DATA_PATH.exists():
+            _reset(None, None, [])
+            return []
+        _sync()
+        return _state["users"]
 
 def save_all(items: List[Dict[str, Any]]) -> None:
-    save_json_data(DATA_PATH, items)
+    if BACKEND == "sqlite":
+        with _lock:
+            sqlite_store.save_users(items)
+            _reset(_sqlite_source(), sqlite_store.version(), list(items))
+        return
+    with _lock:
+        if DATA_PATH.exists():
+            _sync()
+        _write_snapshot(items)
+
+def compact() -> None:
+    """Fold the mutation log into users.json and rotate it."""
+    if BACKEND == "sqlite":
+        return
+    with _lock:
+        if not DATA_PATH.exists():
+            return
+        _sync()
+        _write_snapshot(_state["users"])
+
+def _mutate(op: Dict[str, Any]) -> Dict[str, Any]:
+    if BACKEND == "sqlite":
+        # SQLite rewrites only the one row
+        with _lock:
+            user = sqlite_store.get_user(op["user_id"])
+            if user is None and op["op"] != "put_user":
+                raise NotFound("User not found")
+            user = _apply(op, user or {})
+            current = _state["path"] == _sqlite_source() and _state["snapshot_key"] == sqlite_store.version()
+            sqlite_store.upsert_user(user)
+            if current:
+                # keep the cached list instead of reloading every user
+                _apply_to_state(op)
+                _state["snapshot_key"] = sqlite_store.version()
+        return user
+    return _append(op)
+
+def upsert(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert or replace one whole user record, matched by user_id."""
+    return _mutate({"op": "put_user", "user_id": user["user_id"], "user": user})
+
+def index_for(users: List[Dict[str, Any]]) -> UserIndex:
+    """UserIndex for users.
+
+    The repository's own list (from load_all()) has an index that every
+    write keeps current. Any other list is indexed as it is now, since
+    nothing tells us when a caller edits it.
+    """
+    with _lock:
+        if users is _state["users"] and _state["index"] is not None:
+            return _state["index"]
+    return UserIndex(users)
 
 def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
-    users = load_all()
-    for user in users:
-        if user.get("user_id") == user_id:
-            saved = user.get("saved_item_ids")
-            if not isinstance(saved, list):
-                user["saved_item_ids"] = []
-            return user
-    return None
+    if BACKEND == "sqlite":
+        user = sqlite_store.get_user(user_id)
+    else:
+        with _lock:
+            user = index_for(load_all()).get(user_id)
+            user = dict(user) if user is not None else None
+    if user is None:
+        return None
+    saved = user.get("saved_item_ids")
+    if not isinstance(saved, list):
+        user["saved_item_ids"] = []
+    return user
 
 def add_saved_item(user_id: str, product_id: str) -> Dict[str, Any]:
-    users = load_all()
-    for user in users:
-        if user.get("user_id") == user_id:
-            saved = user.get("saved_item_ids")
-            if not isinstance(saved, list):
-                saved = []
-            if product_id not in saved:
-                saved.append(product_id)
-            user["saved_item_ids"] = saved
-            save_all(users)
-            return user
-    raise NotFound("User not found")
+    return _mutate({"op": "add_saved", "user_id": user_id, "product_id": product_id})
 
 def remove_saved_item(user_id: str, product_id: str) -> Dict[str, Any]:
-    users = load_all()
-    for user in users:
-        if user.get("user_id") == user_id:
-            saved = user.get("saved_item_ids")
-            if not isinstance(saved, list):
-                saved = []
-            if product_id in saved:
-                saved.remove(product_id)
-            user["saved_item_ids"] = saved
-            save_all(users)
-            return user
-    raise NotFound("User not found")
+    return _mutate({"op": "remove_saved", "user_id": user_id, "product_id": product_id})
 
 def get_saved_item_ids(user_id: str) -> List[str]:
     user = get_user_by_id(user_id)
@@ -59,21 +392,22 @@ def get_saved_item_ids(user_id: str) -> List[str]:
     return list(saved)
 
 def add_recently_viewed_item(user_id: str, product_id: str, max_items: int = 10) -> Dict[str, Any]:
-    users = load_all()
-    for user in users:
-        if user.get("user_id") == user_id:
-            rv = user.get("recently_viewed_ids")
-            if not isinstance(rv, list):
-                rv = []
-
-            if product_id in rv:
-                rv.remove(product_id)
-            rv.insert(0, product_id)
-
-            user["recently_viewed_ids"] = rv[:max_items]
-            save_all(users)
-            return user
-    raise NotFound("User not found")
+    return _mutate({
+        "op": "add_recent",
+        "user_id": user_id,
+        "product_id": product_id,
+        "max_items": max_items,
+    })
+
+def add_view_entry(user_id: str, product_id: str, viewed_at: str, max_items: int) -> Dict[str, Any]:
+    """Move product_id to the front of the user's timestamped view history."""
+    return _mutate({
+        "op": "add_view",
+        "user_id": user_id,
+        "product_id": product_id,
+        "viewed_at": viewed_at,
+        "max_items": max_items,
+    })
 
 
 def get_recently_viewed_ids(user_id: str, limit: int = 4) -> List[str]:
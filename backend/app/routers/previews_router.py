@@ -1,13 +1,21 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, Query
+from typing import List, Optional, Union
 
 from app.schemas.product_preview import ProductPreview
+from app.schemas.category import CategoryNode
+from app.schemas.facets import FacetedPreviews
+from app.schemas.page import PreviewPage
+from app.services.pagination import paginate_catalog_order, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.services.preview_service import (
     get_all_product_previews, 
     filter_previews, 
+    get_all_products,
+    get_filtered_products,
     parse_to_previews
 )
-from app.services.search_service import keyword_search
+from app.services.facet_service import faceted_previews
+from app.services.category_service import get_category_tree, get_products_under
+from app.services.search_service import keyword_search, ranked_search, autocomplete, AUTOCOMPLETE_TOP_N
 
 # Router for product previews and search functionality
 # Previews are lightweight versions of products for listing/browsing
@@ -16,15 +24,75 @@ router = APIRouter(
     tags=["previews"]
 )
 
-@router.get("/", response_model=List[ProductPreview])
-def get_previews():
+# facets=include adds category counts and price/rating histograms next to
+# the previews; facets=only returns just the counts
+FacetsOption = Query(None, pattern="^(include|only)$", description="include | only")
+# limit (and the next_cursor of a previous page) return one page in catalog order
+LimitOption = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a page with next_cursor")
+CursorOption = Query(None, description="next_cursor from the previous page")
+PreviewsResponse = Union[List[ProductPreview], PreviewPage, FacetedPreviews]
+
+def _respond(products, facets: Optional[str], limit: Optional[int] = None, cursor: Optional[str] = None):
+    paged = limit is not None or cursor is not None
+    next_cursor = None
+    page = products
+    if paged:
+        page, next_cursor = paginate_catalog_order(products, limit or DEFAULT_PAGE_SIZE, cursor)
+
+    if facets is not None:
+        # facets always describe the whole result set, not just the page
+        result = faceted_previews(products, include_items=False)
+        if facets == "include":
+            result.items = parse_to_previews(page)
+        result.next_cursor = next_cursor
+        return result
+    if paged:
+        return PreviewPage(items=parse_to_previews(page), next_cursor=next_cursor)
+    return parse_to_previews(page)
+
+@router.get("/", response_model=PreviewsResponse)
+def get_previews(
+    facets: Optional[str] = FacetsOption,
+    limit: Optional[int] = LimitOption,
+    cursor: Optional[str] = CursorOption,
+):
     """Get all product previews"""
-    return get_all_product_previews()
+    if facets is None and limit is None and cursor is None:
+        return get_all_product_previews()
+    return _respond(get_all_products(), facets, limit, cursor)
 
-@router.get("/{fil}", response_model=List[ProductPreview])
-def filter_previews_endpoint(fil: str = ""):
+@router.get("/{fil}", response_model=PreviewsResponse)
+def filter_previews_endpoint(
+    fil: str = "",
+    facets: Optional[str] = FacetsOption,
+    limit: Optional[int] = LimitOption,
+    cursor: Optional[str] = CursorOption,
+):
     """Get filtered product previews based on category or other criteria"""
-    return filter_previews(fil)
+    if facets is None and limit is None and cursor is None:
+        return filter_previews(fil)
+    return _respond(get_filtered_products(fil), facets, limit, cursor)
+
+# Category tree endpoints - paths are category names joined with "|"
+# e.g. Electronics|HomeTheater,TV&Video|Accessories
+
+@router.get("/categories/tree", response_model=CategoryNode, tags=["categories"])
+def category_tree_endpoint(
+    path: str = Query("", description="Return only the subtree under this path"),
+    depth: Optional[int] = Query(None, ge=0, description="Levels of children to include"),
+):
+    """Category tree with the number of products under each node"""
+    return get_category_tree(path, depth)
+
+@router.get("/categories/{path}", response_model=List[ProductPreview], tags=["categories"])
+def category_subtree_endpoint(path: str):
+    """Previews of every product anywhere under a category path"""
+    return parse_to_previews(get_products_under(path))
+
+@router.get("/autocomplete/{prefix}", response_model=List[ProductPreview], tags=["search"])
+def autocomplete_endpoint(prefix: str, limit: int = Query(AUTOCOMPLETE_TOP_N, ge=1, le=AUTOCOMPLETE_TOP_N)):
+    """Most popular products whose name or category has a word starting with prefix"""
+    return parse_to_previews(autocomplete(prefix, limit=limit))
 
 # Search endpoints - note these need specific ordering
 # More specific routes should come BEFORE more general ones in FastAPI
@@ -34,8 +102,13 @@ def no_search_entry():
     """Search endpoint without query - returns helpful message"""
     return "Please enter a search query"
 
-@router.get("/search/w={search_string}", response_model=List[ProductPreview], tags=["search"])
-def wide_keyword_search(search_string: str):
+@router.get("/search/w={search_string}", response_model=PreviewsResponse, tags=["search"])
+def wide_keyword_search(
+    search_string: str,
+    facets: Optional[str] = FacetsOption,
+    limit: Optional[int] = LimitOption,
+    cursor: Optional[str] = CursorOption,
+):
     """
     Wide keyword search - searches across multiple product fields
     Format: /search/w=keyword1 keyword2&filter
@@ -47,13 +120,52 @@ def wide_keyword_search(search_string: str):
     
     if len(splice) > 1:
         # Search with filter applied
-        return parse_to_previews(keyword_search(keywords, filter=splice[1]))
+        return _respond(keyword_search(keywords, filter=splice[1]), facets, limit, cursor)
     else:
         # Search without filter
-        return parse_to_previews(keyword_search(keywords))
+        return _respond(keyword_search(keywords), facets, limit, cursor)
+
+@router.get("/search/f={search_string}", response_model=PreviewsResponse, tags=["search"])
+def fuzzy_keyword_search(
+    search_string: str,
+    facets: Optional[str] = FacetsOption,
+    limit: Optional[int] = LimitOption,
+    cursor: Optional[str] = CursorOption,
+):
+    """
+    Typo-tolerant wide search - misspelled keywords match close vocabulary terms
+    Format: /search/f=keyword1 keyword2&filter
+    """
+    splice = search_string.split("&", 1)
+    keywords = splice[0].split(" ")
+
+    if len(splice) > 1:
+        return _respond(keyword_search(keywords, filter=splice[1], fuzzy=True), facets, limit, cursor)
+    else:
+        return _respond(keyword_search(keywords, fuzzy=True), facets, limit, cursor)
+
+@router.get("/search/r={search_string}", response_model=List[ProductPreview], tags=["search"])
+def ranked_keyword_search(search_string: str, limit: int = Query(20, ge=1, le=100)):
+    """
+    Ranked keyword search - best matches first (BM25 over name, categories and description)
+    Format: /search/r=keyword1 keyword2&filter?limit=20
+    Returns at most `limit` previews
+    """
+    splice = search_string.split("&", 1)
+    keywords = splice[0].split(" ")
+
+    if len(splice) > 1:
+        return parse_to_previews(ranked_search(keywords, limit=limit, filter=splice[1]))
+    else:
+        return parse_to_previews(ranked_search(keywords, limit=limit))
 
-@router.get("/search/{search_string}", response_model=List[ProductPreview], tags=["search"])
-def strict_keyword_search(search_string: str):
+@router.get("/search/{search_string}", response_model=PreviewsResponse, tags=["search"])
+def strict_keyword_search(
+    search_string: str,
+    facets: Optional[str] = FacetsOption,
+    limit: Optional[int] = LimitOption,
+    cursor: Optional[str] = CursorOption,
+):
     """
     Strict keyword search (default) - exact matches only
     Format: /search/keyword1 keyword2&filter
@@ -65,8 +177,8 @@ def strict_keyword_search(search_string: str):
     
     if len(splice) > 1:
         # Search with filter applied
-        return parse_to_previews(keyword_search(keywords, filter=splice[1]))
+        return _respond(keyword_search(keywords, filter=splice[1]), facets, limit, cursor)
     else:
         # Search without filter
-        return parse_to_previews(keyword_search(keywords))
+        return _respond(keyword_search(keywords), facets, limit, cursor)
 
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional, Union
 
-from app.schemas.product import Product, ProductCreate, ProductUpdate
+from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductBatchRequest, ProductBatchResponse
+from app.schemas.product import BulkRequest, BulkResponse
+from app.schemas.page import ProductPage
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.services.product_service import (
     list_products, 
+    list_products_page,
     create_product, 
     delete_product, 
     update_product, 
-    get_product_by_id
+    get_product_by_id,
+    get_products_by_ids,
+    bulk_apply
 )
 
 # Create a router instance with a prefix and tags
@@ -18,21 +24,50 @@ router = APIRouter(
     tags=["products"]
 )
 
-@router.get("/", response_model=List[Product])
+@router.get("/", response_model=Union[List[Product], ProductPage])
 def get_products(
     sort_by: Optional[str] = Query(
         default=None, 
         description="Optional sort order. Supported values: name, price_asc, price_desc, rating_desc"
-    )
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a page with next_cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    offset: Optional[int] = Query(None, ge=0, description="Skip this many products; returns a plain list of up to limit"),
 ):
-    """Get all products with optional sorting"""
-    return list_products(sort_by=sort_by)
+    """Get all products with optional sorting, optionally one page at a time"""
+    if offset is not None and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="cursor and offset cannot be combined; use one or the other.",
+        )
+    if offset is not None:
+        return list_products(sort_by=sort_by, limit=limit, offset=offset)
+    if limit is None and cursor is None:
+        return list_products(sort_by=sort_by)
+    return list_products_page(sort_by, limit or DEFAULT_PAGE_SIZE, cursor)
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
 def post_product(payload: ProductCreate):
     """Create a new product"""
     return create_product(payload)
 
+# Batch lookups - registered before /{product_id} so "batch" is not taken as an id
+
+@router.get("/batch", response_model=ProductBatchResponse)
+def get_products_batch(ids: str = Query(..., description="Comma-separated product IDs")):
+    """Get several products in one call; results follow the order of ids"""
+    return get_products_by_ids([i for i in ids.split(",") if i])
+
+@router.post("/batch", response_model=ProductBatchResponse)
+def post_products_batch(payload: ProductBatchRequest):
+    """Get several products in one call; results follow the order of payload.ids"""
+    return get_products_by_ids(payload.ids)
+
+@router.post("/bulk", response_model=BulkResponse)
+def post_products_bulk(payload: BulkRequest):
+    """Create, update and delete many products with a single save; one result per operation"""
+    return bulk_apply(payload.operations, all_or_nothing=payload.all_or_nothing)
+
 @router.get("/{product_id}", response_model=Product)
 def get_product(product_id: str):
     """Get a single product by ID"""
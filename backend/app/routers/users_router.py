@@ -166,9 +166,10 @@ def get_recommendations_endpoint(
     user_id: str,
     exclude_product_id: str = Query(None, description="Product ID to exclude from recommendations"),
     limit: int = Query(8, ge=1, le=20, description="Max recommendations to return"),
+    strategy: str = Query("content", description="content, coview (viewed together by other users) or blend"),
 ):
     """Get personalized product recommendations based on user's browsing history"""
-    return get_recommendations(user_id, limit=limit, exclude_product_id=exclude_product_id)
+    return get_recommendations(user_id, limit=limit, exclude_product_id=exclude_product_id, strategy=strategy)
 
 
 # Profile routes - MUST come after all specific /{user_id}/... routes
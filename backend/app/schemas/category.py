@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import List
+
+class CategoryNode(BaseModel):
+    name: str
+    path: List[str]
+    count: int
+    children: List["CategoryNode"] = []
+
+CategoryNode.model_rebuild()
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.schemas.product_preview import ProductPreview
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class FacetBucket(BaseModel):
+    # min <= value < max; max is None for the open-ended last bucket
+    min: float
+    max: Optional[float] = None
+    count: int
+
+class Facets(BaseModel):
+    total: int
+    categories: List[FacetCount] = []
+    price: List[FacetBucket] = []
+    rating: List[FacetBucket] = []
+
+class FacetedPreviews(BaseModel):
+    items: List[ProductPreview] = []
+    facets: Facets
+    # set when the items are one page of the results
+    next_cursor: Optional[str] = None
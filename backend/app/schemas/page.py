@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.schemas.product import Product
+from app.schemas.product_preview import ProductPreview
+
+class PreviewPage(BaseModel):
+    items: List[ProductPreview]
+    # pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
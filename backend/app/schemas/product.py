@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Literal, Optional
 
 class Product(BaseModel):
     product_id: str
@@ -51,4 +51,37 @@ class ProductUpdate(BaseModel):
     review_title: List[str] = []
     review_content: str
     img_link: str
-    product_link: str
\ No newline at end of file
+    product_link: str
+
+class ProductBatchRequest(BaseModel):
+    ids: List[str]
+
+class ProductBatchResponse(BaseModel):
+    # found products in request order; ids with no product, in request order
+    items: List[Product]
+    missing: List[str] = []
+
+class BulkOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    # required for update and delete
+    product_id: Optional[str] = None
+    # required for create and update; ProductUpdate fields, validated per
+    # operation so one malformed item does not reject the whole batch
+    product: Optional[Dict[str, Any]] = None
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation]
+    # when true, nothing is saved unless every operation succeeds
+    all_or_nothing: bool = False
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    product_id: Optional[str] = None
+    status_code: int
+    detail: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    # whether the successful operations were saved
+    applied: bool
+    results: List[BulkItemResult]
@@ -0,0 +1,288 @@
+"""In-memory indexes over the product catalog.
+
+Indexes are built from the list returned by products_repo.load_all() and
+cached by the identity of that list: the repository hands out the same list
+object until the catalog changes, so a lookup only pays for a rebuild when
+the catalog was actually replaced. Product writes carry the current index
+forward to the new catalog list instead of rebuilding it.
+
+Every record gets a doc id. Doc ids follow catalog order (updates keep their
+doc id, new products are appended with a larger one), so sorting doc ids
+gives file order. Feature-specific indexes (search postings, filters, ...)
+register as extensions keyed by doc id; they are built on first use and
+patched through add/remove on every write.
+"""
+
+import itertools
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Callable, Tuple
+from app.repositories.products_repo import load_all
+
+# keys a product may be addressed by, in the order find_product checks them
+ID_ALIASES = ("id", "product_id", "asin")
+
+_serials = itertools.count(1)
+
+
+class CatalogIndex:
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+        self.by_product_id: Dict[str, Dict[str, Any]] = {}
+        self.by_alias: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[str, int] = {}
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.doc_ids: List[int] = []
+        self._doc_by_record: Dict[int, int] = {}
+        self._docs_by_product_id: Dict[Any, List[int]] = {}
+        self._next_doc = 0
+        self._extensions: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        # serial tells indexes apart, version is bumped by every apply();
+        # together they identify the catalog contents
+        self.serial = next(_serials)
+        self.version = 0
+        for pos, rec in enumerate(items):
+            self._add(rec, pos)
+
+    def _add(self, rec: Dict[str, Any], pos: int) -> int:
+        doc = self._next_doc
+        self._next_doc += 1
+        self.records[doc] = rec
+        self._doc_by_record[id(rec)] = doc
+        self.doc_ids.append(doc)
+
+        # first occurrence wins, matching a front-to-back scan
+        pid = rec.get("product_id")
+        self._docs_by_product_id.setdefault(pid, []).append(doc)
+        if pid is not None and pid not in self.by_product_id:
+            self.by_product_id[pid] = rec
+            self.positions[pid] = pos
+        self._add_aliases(rec)
+        return doc
+
+    def _add_aliases(self, rec: Dict[str, Any]) -> None:
+        for key in ID_ALIASES:
+            alias = rec.get(key)
+            if alias is not None:
+                self.by_alias.setdefault(alias, rec)
+
+    def _drop_aliases(self, rec: Dict[str, Any]) -> None:
+        for key in ID_ALIASES:
+            alias = rec.get(key)
+            if alias is not None and self.by_alias.get(alias) is rec:
+                del self.by_alias[alias]
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Record whose product_id matches, as get_product_by_id expects."""
+        return self.by_product_id.get(product_id)
+
+    def find(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Record addressed by any of id / product_id / asin."""
+        return self.by_alias.get(product_id)
+
+    def position(self, product_id: str) -> Optional[int]:
+        return self.positions.get(product_id)
+
+    def doc_of(self, product_id: str) -> Optional[int]:
+        docs = self._docs_by_product_id.get(product_id)
+        return docs[0] if docs else None
+
+    def docs_of(self, product_id: str) -> List[int]:
+        """Every doc whose record has this product_id, in catalog order."""
+        return list(self._docs_by_product_id.get(product_id, ()))
+
+    def doc_for(self, rec: Dict[str, Any]) -> Optional[int]:
+        """Doc id of a record object from this catalog, None for any other object."""
+        doc = self._doc_by_record.get(id(rec))
+        if doc is not None and self.records.get(doc) is rec:
+            return doc
+        return None
+
+    def records_for(self, docs: Iterable[int]) -> List[Dict[str, Any]]:
+        """Records for docs, in catalog order."""
+        return [self.records[doc] for doc in sorted(docs)]
+
+    def snapshot(self) -> Tuple[int, List[Tuple[int, Dict[str, Any]]]]:
+        """(version, every (doc, record) in catalog order), read under the write lock.
+
+        The list is a copy, so it can be walked from another thread while
+        apply() moves the index on.
+        """
+        with self._lock:
+            return self.version, [(doc, self.records[doc]) for doc in self.doc_ids]
+
+    def extension(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Feature index registered under name, built from every record on first use.
+
+        factory() must return an object with add(doc, record) and
+        remove(doc, record); apply() keeps it current from then on. An
+        optional build(pairs) takes every (doc, record) at once for
+        structures that are cheaper to fill in bulk.
+        """
+        ext = self._extensions.get(name)
+        if ext is not None:
+            return ext
+        with self._lock:
+            ext = self._extensions.get(name)
+            if ext is None:
+                ext = factory()
+                pairs = [(doc, self.records[doc]) for doc in self.doc_ids]
+                if hasattr(ext, "build"):
+                    ext.build(pairs)
+                else:
+                    for doc, rec in pairs:
+                        ext.add(doc, rec)
+                self._extensions[name] = ext
+            return ext
+
+    def apply(
+        self,
+        items: List[Dict[str, Any]],
+        upserted: Iterable[Dict[str, Any]] = (),
+        deleted: Iterable[str] = (),
+    ) -> None:
+        """Re-point the index at items after a write.
+
+        upserted records either replace the first record with the same
+        product_id in place or were appended; every record with a deleted
+        product_id was removed.
+        """
+        with self._lock:
+            extensions = list(self._extensions.values())
+
+            gone = set()
+            for pid in deleted:
+                for doc in self._docs_by_product_id.pop(pid, []):
+                    rec = self.records.pop(doc)
+                    self._doc_by_record.pop(id(rec), None)
+                    self._drop_aliases(rec)
+                    for ext in extensions:
+                        ext.remove(doc, rec)
+                    gone.add(doc)
+                self.by_product_id.pop(pid, None)
+            if gone:
+                # later records shifted down by one or more slots
+                self.doc_ids = [doc for doc in self.doc_ids if doc not in gone]
+                self.positions = {}
+                for pos, rec in enumerate(items):
+                    self.positions.setdefault(rec.get("product_id"), pos)
+
+            upserted = list(upserted)
+            slots = self._slots(items, upserted)
+            for rec in upserted:
+                pid = rec.get("product_id")
+                doc = self.doc_of(pid)
+                if doc is not None:
+                    old = self.records[doc]
+                    self._drop_aliases(old)
+                    self.records[doc] = rec
+                    self._doc_by_record.pop(id(old), None)
+                    self._doc_by_record[id(rec)] = doc
+                    self.by_product_id[pid] = rec
+                    self._add_aliases(rec)
+                    for ext in extensions:
+                        ext.remove(doc, old)
+                        ext.add(doc, rec)
+                else:
+                    doc = self._add(rec, slots.get(id(rec), len(items)))
+                    for ext in extensions:
+                        ext.add(doc, rec)
+
+            self.items = items
+            self.version += 1
+
+    @staticmethod
+    def _slots(items: List[Dict[str, Any]], upserted: List[Dict[str, Any]]) -> Dict[int, int]:
+        """Position in items of each upserted record, by id(record)."""
+        wanted = {id(rec) for rec in upserted}
+        slots: Dict[int, int] = {}
+        # new records are appended, so search from the tail; the scan stops
+        # once every record is placed, which is right away for appends
+        for pos in range(len(items) - 1, -1, -1):
+            key = id(items[pos])
+            if key in wanted and key not in slots:
+                slots[key] = pos
+                if len(slots) == len(wanted):
+                    break
+        return slots
+
+
+_lock = threading.Lock()
+_current: Dict[str, Any] = {"items": None, "index": None}
+
+
+def get_index(items: List[Dict[str, Any]]) -> CatalogIndex:
+    with _lock:
+        if _current["items"] is not items:
+            _current["index"] = CatalogIndex(items)
+            _current["items"] = items
+        return _current["index"]
+
+
+def current() -> Optional[CatalogIndex]:
+    """Most recently built index, if any, without loading anything."""
+    with _lock:
+        return _current["index"]
+
+
+def lookup(items: List[Dict[str, Any]]) -> Optional[CatalogIndex]:
+    """Index for items if items is the live catalog list, else None.
+
+    Lets helpers that take arbitrary product lists use the index when they
+    were handed the catalog, without evicting it for a one-off list.
+    """
+    with _lock:
+        if _current["items"] is items:
+            return _current["index"]
+    if items is load_all():
+        return get_index(items)
+    return None
+
+
+def to_bitmap(docs: Iterable[int]) -> int:
+    """Python int with bit `doc` set for every doc."""
+    docs = list(docs)
+    if not docs:
+        return 0
+    buf = bytearray(max(docs) // 8 + 1)
+    for doc in docs:
+        buf[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(buf, "little")
+
+
+def from_bitmap(bits: int) -> List[int]:
+    """Set bits of a bitmap, ascending."""
+    docs: List[int] = []
+    if bits <= 0:
+        return docs
+    # scanning the binary string runs in C, one find per set bit
+    text = bin(bits)[:1:-1]
+    pos = text.find("1")
+    while pos != -1:
+        docs.append(pos)
+        pos = text.find("1", pos + 1)
+    return docs
+
+
+def carry_forward(
+    old_items: List[Dict[str, Any]],
+    new_items: List[Dict[str, Any]],
+    upserted: Iterable[Dict[str, Any]] = (),
+    deleted: Iterable[str] = (),
+) -> None:
+    """Move the index built for old_items over to new_items after a write."""
+    with _lock:
+        if _current["items"] is not old_items or new_items is old_items:
+            # nothing built for the old list (or the write did not produce a
+            # new one); the next get_index() builds from scratch
+            _current["items"] = None
+            _current["index"] = None
+            return
+        _current["index"].apply(new_items, upserted, deleted)
+        _current["items"] = new_items
+
+
+def invalidate() -> None:
+    with _lock:
+        _current["items"] = None
+        _current["index"] = None
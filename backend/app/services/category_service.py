@@ -0,0 +1,120 @@
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from fastapi import HTTPException
+from app.schemas.category import CategoryNode
+from app.schemas.product import Product
+from app.repositories.products_repo import load_all
+from app.services.catalog_index import get_index, to_bitmap, from_bitmap
+from app.constants.http_status import NOT_FOUND
+
+# separator between levels when a path is written as one string, as in the
+# source data before tools/converter.py splits it
+PATH_SEPARATOR = "|"
+
+
+class _CategoryNode:
+    __slots__ = ("children", "bits", "count")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_CategoryNode"] = {}
+        # docs anywhere under this node
+        self.bits = 0
+        self.count = 0
+
+
+class CategoryTree:
+    """Category lists read as root-to-leaf paths, merged into one tree.
+
+    Each node keeps a bitmap and a count of the docs in its subtree, so
+    "everything under this node" is a walk down the path plus reading the
+    bitmap back.
+    """
+
+    def __init__(self) -> None:
+        self.root = _CategoryNode()
+
+    @staticmethod
+    def _path(rec: Dict[str, Any]) -> List[str]:
+        path = rec.get("category") or []
+        return path if isinstance(path, list) else []
+
+    def _nodes(self, path: List[str], create: bool = False) -> List[_CategoryNode]:
+        nodes = [self.root]
+        for name in path:
+            child = nodes[-1].children.get(name)
+            if child is None:
+                if not create:
+                    break
+                child = nodes[-1].children[name] = _CategoryNode()
+            nodes.append(child)
+        return nodes
+
+    def build(self, pairs: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        docs_by_node: Dict[int, List[int]] = {}
+        nodes_by_id: Dict[int, _CategoryNode] = {}
+        for doc, rec in pairs:
+            for node in self._nodes(self._path(rec), create=True):
+                docs_by_node.setdefault(id(node), []).append(doc)
+                nodes_by_id[id(node)] = node
+        for key, docs in docs_by_node.items():
+            node = nodes_by_id[key]
+            node.bits = to_bitmap(docs)
+            node.count = len(docs)
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        for node in self._nodes(self._path(rec), create=True):
+            node.bits |= 1 << doc
+            node.count += 1
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        path = self._path(rec)
+        nodes = self._nodes(path)
+        for node in nodes:
+            node.bits &= ~(1 << doc)
+            node.count -= 1
+        # drop branches nothing is filed under any more
+        for depth in range(len(nodes) - 1, 0, -1):
+            if nodes[depth].count:
+                break
+            del nodes[depth - 1].children[path[depth - 1]]
+
+    def find(self, path: List[str]) -> Optional[_CategoryNode]:
+        nodes = self._nodes(path)
+        return nodes[-1] if len(nodes) == len(path) + 1 else None
+
+
+def parse_category_path(path: str) -> List[str]:
+    return [name for name in path.split(PATH_SEPARATOR) if name]
+
+
+def _to_schema(name: str, path: List[str], node: _CategoryNode, depth: Optional[int]) -> CategoryNode:
+    children = []
+    if depth is None or depth > 0:
+        next_depth = None if depth is None else depth - 1
+        for child_name, child in sorted(node.children.items()):
+            children.append(_to_schema(child_name, path + [child_name], child, next_depth))
+    return CategoryNode(name=name, path=path, count=node.count, children=children)
+
+
+def _tree() -> Tuple[Any, CategoryTree]:
+    index = get_index(load_all())
+    return index, index.extension("category_tree", CategoryTree)
+
+
+def get_category_tree(path: str = "", depth: Optional[int] = None) -> CategoryNode:
+    """Category tree (or the subtree at path) with product counts per node."""
+    names = parse_category_path(path)
+    _, tree = _tree()
+    node = tree.find(names)
+    if node is None:
+        raise HTTPException(status_code=NOT_FOUND, detail=f"Category '{path}' not found.")
+    return _to_schema(names[-1] if names else "all", names, node, depth)
+
+
+def get_products_under(path: str) -> List[Product]:
+    """Every product filed anywhere under the category path, in catalog order."""
+    names = parse_category_path(path)
+    index, tree = _tree()
+    node = tree.find(names)
+    if node is None:
+        raise HTTPException(status_code=NOT_FOUND, detail=f"Category '{path}' not found.")
+    return [index.records[doc] for doc in from_bitmap(node.bits)]
@@ -0,0 +1,235 @@
+"""Item co-view model: people who viewed X also viewed Y.
+
+Two products are co-viewed once for every user whose view history holds
+both; a user's history is the union of `recently_viewed` and
+`recently_viewed_ids`. Pair counts are kept in sparse per-item counters,
+together with how many users viewed each item. They are updated from each
+view event by diffing the user's history before and after it, so pairs
+that fall out of a bounded history are counted down again and the counters
+always equal a full rebuild from users.json.
+
+Neighbors of an item are ranked by cosine similarity,
+count(x, y) / sqrt(users(x) * users(y)). Each item keeps its top
+COVIEW_NEIGHBORS_K list, recomputed only after its counter changed, so a
+lookup costs O(K).
+
+The model is built from every user on first use. For large user bases, the
+build can be done ahead of time and saved to COVIEW_PATH:
+
+    python -m app.services.coview_service rebuild
+
+The snapshot also stores the history each user had when it was built.
+Loading it replays only the users whose history changed since, through the
+same diff as a view event, instead of recounting every user.
+"""
+
+from pathlib import Path
+from itertools import combinations
+import argparse
+import heapq
+import json
+import math
+import os
+import threading
+from typing import List, Dict, Any, Optional, Callable, Iterable, Set, Tuple
+
+from app.repositories import users_repo
+
+COVIEW_NEIGHBORS_K = 20
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+COVIEW_PATH = Path(os.environ.get("COVIEW_PATH", DATA_DIR / "coview.json"))
+
+
+def viewed_ids(user: Optional[Dict[str, Any]]) -> Set[str]:
+    """Every product in the user's view histories."""
+    if not user:
+        return set()
+    ids = set()
+    for entry in user.get("recently_viewed") or []:
+        if isinstance(entry, dict) and entry.get("product_id"):
+            ids.add(entry["product_id"])
+    recent = user.get("recently_viewed_ids")
+    if isinstance(recent, list):
+        ids.update(pid for pid in recent if isinstance(pid, str))
+    return ids
+
+
+class CoviewModel:
+    def __init__(self, k: int = COVIEW_NEIGHBORS_K) -> None:
+        self.k = k
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.users: Dict[str, int] = {}
+        self._top: Dict[str, List[Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        # bumped whenever the counters change
+        self.version = 0
+
+    def _bump(self, a: str, b: str, delta: int) -> None:
+        for x, y in ((a, b), (b, a)):
+            row = self.counts.setdefault(x, {})
+            count = row.get(y, 0) + delta
+            if count > 0:
+                row[y] = count
+            else:
+                row.pop(y, None)
+                if not row:
+                    del self.counts[x]
+            self._top.pop(x, None)
+
+    def _count_user(self, item: str, delta: int) -> None:
+        count = self.users.get(item, 0) + delta
+        if count > 0:
+            self.users[item] = count
+        else:
+            self.users.pop(item, None)
+        # cosine scores of this item's neighbors depend on it too
+        for other in self.counts.get(item, ()):
+            self._top.pop(other, None)
+        self._top.pop(item, None)
+
+    def observe(self, before: Iterable[str], after: Iterable[str]) -> None:
+        """Update the counters for one user whose history went from before to after."""
+        before, after = set(before), set(after)
+        if before == after:
+            return
+        old_pairs = set(combinations(sorted(before), 2))
+        new_pairs = set(combinations(sorted(after), 2))
+        with self._lock:
+            for a, b in new_pairs - old_pairs:
+                self._bump(a, b, 1)
+            for a, b in old_pairs - new_pairs:
+                self._bump(a, b, -1)
+            for item in after - before:
+                self._count_user(item, 1)
+            for item in before - after:
+                self._count_user(item, -1)
+            self.version += 1
+
+    def neighbors(self, item: str) -> List[Tuple[str, float]]:
+        """(product_id, similarity) of the item's top K co-viewed products, best first."""
+        top = self._top.get(item)
+        if top is not None:
+            return top
+        with self._lock:
+            row = self.counts.get(item, {})
+            views = self.users.get(item, 0)
+            scored = (
+                (count / math.sqrt(views * self.users[other]), other)
+                for other, count in row.items()
+                if views and self.users.get(other)
+            )
+            best = heapq.nsmallest(self.k, scored, key=lambda pair: (-pair[0], pair[1]))
+            top = [(other, score) for score, other in best]
+            self._top[item] = top
+            return top
+
+
+def histories(users: List[Dict[str, Any]]) -> List[List[Any]]:
+    """[user_id, sorted viewed ids] for every user, as stored with a snapshot."""
+    return [[user.get("user_id"), sorted(viewed_ids(user))] for user in users]
+
+
+def build_model(users: List[Dict[str, Any]], k: int = COVIEW_NEIGHBORS_K) -> CoviewModel:
+    """Count every pair in one pass over all users."""
+    model = CoviewModel(k)
+    for user in users:
+        items = sorted(viewed_ids(user))
+        for item in items:
+            model.users[item] = model.users.get(item, 0) + 1
+        for a, b in combinations(items, 2):
+            for x, y in ((a, b), (b, a)):
+                row = model.counts.setdefault(x, {})
+                row[y] = row.get(y, 0) + 1
+    return model
+
+
+def save_model(model: CoviewModel, users: List[Dict[str, Any]], path: Optional[Path] = None) -> None:
+    """Save the counters with the histories of the users they were counted from."""
+    path = Path(path or COVIEW_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"histories": histories(users), "users": model.users, "counts": model.counts}, f)
+    os.replace(tmp, path)
+
+
+def load_model(users: List[Dict[str, Any]], path: Optional[Path] = None) -> Optional[CoviewModel]:
+    """Saved model brought up to date with users, if there is a snapshot.
+
+    Users are matched to the saved histories by user_id, in order for
+    repeated ids; only those whose history differs are observed, and saved
+    users that are gone are counted out.
+    """
+    path = Path(path or COVIEW_PATH)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "histories" not in data:
+        return None
+    model = CoviewModel()
+    model.users = data["users"]
+    model.counts = data["counts"]
+
+    saved: Dict[Any, List[List[str]]] = {}
+    for user_id, ids in data["histories"]:
+        saved.setdefault(user_id, []).append(ids)
+    for user_id, ids in histories(users):
+        previous = saved.get(user_id)
+        model.observe(previous.pop(0) if previous else (), ids)
+    for left in saved.values():
+        for ids in left:
+            model.observe(ids, ())
+    return model
+
+
+_lock = threading.Lock()
+_state: Dict[str, Optional[CoviewModel]] = {"model": None}
+
+
+def get_model() -> CoviewModel:
+    with _lock:
+        if _state["model"] is None:
+            users = users_repo.load_all()
+            _state["model"] = load_model(users) or build_model(users)
+        return _state["model"]
+
+
+def record_view(user_id: str, mutate: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run a view-history write for user_id and feed it into the model.
+
+    mutate() performs the write and returns the updated user. The user
+    record is read before it, and both run under the model lock, so a
+    concurrent first build either already sees the write or gets its diff.
+    """
+    with _lock:
+        before = users_repo.get_user_by_id(user_id)
+        after = mutate()
+        if _state["model"] is not None:
+            _state["model"].observe(viewed_ids(before), viewed_ids(after))
+        return after
+
+
+def invalidate() -> None:
+    """Drop the in-memory model; the next use loads or rebuilds it."""
+    with _lock:
+        _state["model"] = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BEIJ co-view model")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="count co-views over every user and save the model")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        users = users_repo.load_all()
+        model = build_model(users)
+        save_model(model, users)
+        pairs = sum(len(row) for row in model.counts.values()) // 2
+        print(f"Counted {pairs} co-viewed pairs over {len(users)} users into {COVIEW_PATH}")
+
+
+if __name__ == "__main__":
+    main()
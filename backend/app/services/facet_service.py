@@ -0,0 +1,117 @@
+import bisect
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from app.schemas.facets import FacetBucket, FacetCount, Facets, FacetedPreviews
+from app.schemas.product import Product
+from app.repositories.products_repo import load_all
+from app.services.catalog_index import get_index, to_bitmap
+from app.services.filtering import CategoryBitmaps
+from app.services.preview_service import parse_to_previews
+
+# lower edges of the histogram buckets; the last bucket is open-ended
+PRICE_EDGES = (0, 200, 500, 1000, 5000, 10000)
+RATING_EDGES = (0, 1, 2, 3, 4)
+
+
+def _bucket(value: Any, edges: Tuple[int, ...]) -> Optional[int]:
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < edges[0]:
+        return None
+    return bisect.bisect_right(edges, value) - 1
+
+
+class FacetBitmaps:
+    """One bitmap per price bucket and per rating bucket.
+
+    With the result set as a bitmap, each bucket count is one AND plus a
+    popcount instead of a pass over the product dicts.
+    """
+
+    def __init__(self) -> None:
+        self.price_bits = [0] * len(PRICE_EDGES)
+        self.rating_bits = [0] * len(RATING_EDGES)
+
+    def build(self, pairs: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        price_docs: List[List[int]] = [[] for _ in PRICE_EDGES]
+        rating_docs: List[List[int]] = [[] for _ in RATING_EDGES]
+        for doc, rec in pairs:
+            b = _bucket(rec.get("discounted_price"), PRICE_EDGES)
+            if b is not None:
+                price_docs[b].append(doc)
+            b = _bucket(rec.get("rating"), RATING_EDGES)
+            if b is not None:
+                rating_docs[b].append(doc)
+        self.price_bits = [to_bitmap(docs) for docs in price_docs]
+        self.rating_bits = [to_bitmap(docs) for docs in rating_docs]
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        b = _bucket(rec.get("discounted_price"), PRICE_EDGES)
+        if b is not None:
+            self.price_bits[b] |= 1 << doc
+        b = _bucket(rec.get("rating"), RATING_EDGES)
+        if b is not None:
+            self.rating_bits[b] |= 1 << doc
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        b = _bucket(rec.get("discounted_price"), PRICE_EDGES)
+        if b is not None:
+            self.price_bits[b] &= ~(1 << doc)
+        b = _bucket(rec.get("rating"), RATING_EDGES)
+        if b is not None:
+            self.rating_bits[b] &= ~(1 << doc)
+
+
+def _buckets(edges: Tuple[int, ...], counts: List[int]) -> List[FacetBucket]:
+    return [
+        FacetBucket(min=lo, max=edges[i + 1] if i + 1 < len(edges) else None, count=counts[i])
+        for i, lo in enumerate(edges)
+    ]
+
+
+def _category_counts(counts: Dict[str, int]) -> List[FacetCount]:
+    ordered = sorted(((c, n) for c, n in counts.items() if n), key=lambda item: (-item[1], item[0]))
+    return [FacetCount(value=c, count=n) for c, n in ordered]
+
+
+def _count_by_scan(products: List[Product]) -> Facets:
+    # results that are not records of the live catalog
+    categories: Dict[str, int] = {}
+    price = [0] * len(PRICE_EDGES)
+    rating = [0] * len(RATING_EDGES)
+    for product in products:
+        cats = product.get("category") or []
+        for c in set(cats) if isinstance(cats, list) else ():
+            categories[c] = categories.get(c, 0) + 1
+        b = _bucket(product.get("discounted_price"), PRICE_EDGES)
+        if b is not None:
+            price[b] += 1
+        b = _bucket(product.get("rating"), RATING_EDGES)
+        if b is not None:
+            rating[b] += 1
+    return Facets(
+        total=len(products),
+        categories=_category_counts(categories),
+        price=_buckets(PRICE_EDGES, price),
+        rating=_buckets(RATING_EDGES, rating),
+    )
+
+
+def compute_facets(products: List[Product]) -> Facets:
+    """Category counts and price/rating histograms for a result list."""
+    index = get_index(load_all())
+    docs = [index.doc_for(p) for p in products]
+    category_bitmaps = index.extension("categories", CategoryBitmaps)
+    if None in docs or category_bitmaps.irregular:
+        return _count_by_scan(products)
+
+    result = to_bitmap(docs)
+    buckets = index.extension("facets", FacetBitmaps)
+    return Facets(
+        total=len(products),
+        categories=_category_counts({c: (bits & result).bit_count() for c, bits in category_bitmaps.bits.items()}),
+        price=_buckets(PRICE_EDGES, [(bits & result).bit_count() for bits in buckets.price_bits]),
+        rating=_buckets(RATING_EDGES, [(bits & result).bit_count() for bits in buckets.rating_bits]),
+    )
+
+
+def faceted_previews(products: List[Product], include_items: bool = True) -> FacetedPreviews:
+    items = parse_to_previews(products) if include_items else []
+    return FacetedPreviews(items=items, facets=compute_facets(products))
@@ -1,45 +1,222 @@
+import bisect
+import math
 from app.schemas.product import Product
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from app.services.catalog_index import CatalogIndex, lookup, to_bitmap, from_bitmap
 
-def filter_product_list(target: List[Product], cat_string: str, min_price: int = 0, max_price: int = 0):
+
+class CategoryBitmaps:
+    """One bitmap per exact category string, bit n set for doc n.
+
+    OR-ing the bitmaps of the requested categories replaces the per-product
+    membership checks; the result can be AND-ed with other doc bitmaps.
+    Records whose category is not a list are counted in `irregular`; while
+    there are any, callers fall back to checking products one by one.
+    """
+
+    def __init__(self) -> None:
+        self.bits: Dict[str, int] = {}
+        self.irregular = 0
+
+    def _categories(self, rec: Dict[str, Any]) -> set:
+        categories = rec.get("category") or []
+        return set(categories) if isinstance(categories, list) else set()
+
+    def build(self, pairs: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        docs_by_category: Dict[str, List[int]] = {}
+        for doc, rec in pairs:
+            self.irregular += not isinstance(rec.get("category") or [], list)
+            for category in self._categories(rec):
+                docs_by_category.setdefault(category, []).append(doc)
+        self.bits = {c: to_bitmap(docs) for c, docs in docs_by_category.items()}
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.irregular += not isinstance(rec.get("category") or [], list)
+        for category in self._categories(rec):
+            self.bits[category] = self.bits.get(category, 0) | (1 << doc)
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.irregular -= not isinstance(rec.get("category") or [], list)
+        for category in self._categories(rec):
+            bits = self.bits.get(category, 0) & ~(1 << doc)
+            if bits:
+                self.bits[category] = bits
+            else:
+                self.bits.pop(category, None)
+
+    def any_of(self, categories: Iterable[str]) -> int:
+        result = 0
+        for category in categories:
+            result |= self.bits.get(category, 0)
+        return result
+
+
+def _price_bounds(min_price: int, max_price: int) -> Tuple[int, int]:
     max_price = max(max_price, 0)
     min_price = max(min_price, 0)
 
-    has_min = (min_price != 0)
-    has_max = (max_price != 0)
-
     # only swap if BOTH bounds are actually provided
-    if has_min and has_max and min_price > max_price:
+    if min_price != 0 and max_price != 0 and min_price > max_price:
         min_price, max_price = max_price, min_price
+    return min_price, max_price
 
-    # category filtering
-    if cat_string == "all" or cat_string == "":
-        cat_filtered = list(target)
+
+def _filter_price(products: List[Product], min_price: int, max_price: int) -> List[Product]:
+    if min_price == 0 and max_price == 0:
+        return products
+    return [product for product in products if _in_price(product, min_price, max_price)]
+
+
+class PriceIndex:
+    """(discounted_price, doc) pairs kept sorted, for bisect range queries.
+
+    Records without a numeric price are counted in `irregular`; while there
+    are any the index cannot answer range queries.
+    """
+
+    def __init__(self) -> None:
+        self.pairs: List[Tuple[float, int]] = []
+        self.irregular = 0
+
+    @staticmethod
+    def _price(rec: Dict[str, Any]) -> Optional[float]:
+        price = rec.get("discounted_price")
+        if isinstance(price, (int, float)) and not isinstance(price, bool):
+            return price
+        return None
+
+    def build(self, pairs: Iterable[Tuple[int, Dict[str, Any]]]) -> None:
+        entries = []
+        for doc, rec in pairs:
+            price = self._price(rec)
+            if price is None:
+                self.irregular += 1
+            else:
+                entries.append((price, doc))
+        entries.sort()
+        self.pairs = entries
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        price = self._price(rec)
+        if price is None:
+            self.irregular += 1
+        else:
+            bisect.insort(self.pairs, (price, doc))
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        price = self._price(rec)
+        if price is None:
+            self.irregular -= 1
+            return
+        pos = bisect.bisect_left(self.pairs, (price, doc))
+        if pos < len(self.pairs) and self.pairs[pos] == (price, doc):
+            del self.pairs[pos]
+
+    def range(self, min_price: int, max_price: int) -> Tuple[int, int]:
+        """Slice bounds of pairs with min_price <= price <= max_price (0 = unbounded)."""
+        lo = bisect.bisect_left(self.pairs, (min_price,)) if min_price != 0 else 0
+        hi = bisect.bisect_right(self.pairs, (max_price, math.inf)) if max_price != 0 else len(self.pairs)
+        return lo, max(lo, hi)
+
+
+def _in_categories(product: Product, categories: List[str]) -> bool:
+    for category in categories:
+        if category in product["category"]:
+            return True
+    return False
+
+
+def _in_price(product: Product, min_price: int, max_price: int) -> bool:
+    price = product["discounted_price"]
+    if min_price != 0 and price < min_price:
+        return False
+    if max_price != 0 and price > max_price:
+        return False
+    return True
+
+
+def filter_docs(
+    index: CatalogIndex,
+    docs: Optional[Iterable[int]],
+    cat_string: str,
+    min_price: int = 0,
+    max_price: int = 0,
+) -> List[int]:
+    """Docs (ascending) that pass the filter, out of docs or the whole catalog.
+
+    Each predicate that can list its own matches cheaply (the given docs, the
+    OR of the category bitmaps, the price slice) is a candidate driver; the
+    smallest one is enumerated and the other predicates are checked on its
+    records, so the work is proportional to the most selective predicate.
+    """
+    min_price, max_price = _price_bounds(min_price, max_price)
+    has_categories = not (cat_string == "all" or cat_string == "")
+    has_price = min_price != 0 or max_price != 0
+    categories = cat_string.split("*") if has_categories else []
+
+    drivers: List[Tuple[int, str, Any]] = []
+    if docs is not None:
+        docs = docs if isinstance(docs, (set, dict)) else set(docs)
+        drivers.append((len(docs), "docs", docs))
+    if has_categories:
+        bitmaps = index.extension("categories", CategoryBitmaps)
+        if not bitmaps.irregular:
+            bits = bitmaps.any_of(categories)
+            drivers.append((bits.bit_count(), "categories", bits))
+    if has_price:
+        prices = index.extension("prices", PriceIndex)
+        if not prices.irregular:
+            lo, hi = prices.range(min_price, max_price)
+            drivers.append((hi - lo, "prices", prices.pairs[lo:hi]))
+
+    if not drivers:
+        kind, candidates = "all", index.doc_ids
     else:
-        categories = cat_string.split("*")
-        cat_filtered = []
-        for product in target:
-            for category in categories:
-                if category in product["category"]:
-                    cat_filtered.append(product)
-                    break
+        _, kind, value = min(drivers, key=lambda d: d[0])
+        if kind == "docs":
+            candidates = sorted(value)
+        elif kind == "categories":
+            candidates = from_bitmap(value)
+        else:
+            candidates = sorted(doc for _, doc in value)
 
-    # price filtering
-    if not has_min and not has_max:
-        return cat_filtered
+    # each check is skipped when its predicate already produced the candidates
+    check_docs = docs is not None and kind != "docs"
+    check_categories = has_categories and kind != "categories"
+    check_price = has_price and kind != "prices"
+    if not (check_docs or check_categories or check_price):
+        return list(candidates)
 
     result = []
-    for product in cat_filtered:
-        price = product["discounted_price"]
-
-        if has_min and price < min_price:
+    for doc in candidates:
+        rec = index.records[doc]
+        if check_docs and doc not in docs:
+            continue
+        if check_categories and not _in_categories(rec, categories):
             continue
-        if has_max and price > max_price:
+        if check_price and not _in_price(rec, min_price, max_price):
             continue
+        result.append(doc)
+    return result
 
-        result.append(product)
 
-    return result
+def filter_product_list(target: List[Product], cat_string: str, min_price: int = 0, max_price: int = 0):
+    index = lookup(target)
+    if index is not None:
+        # target is the catalog itself: let the planner pick an index
+        return index.records_for(filter_docs(index, None, cat_string, min_price, max_price))
+
+    min_price, max_price = _price_bounds(min_price, max_price)
+
+    # category filtering
+    if cat_string == "all" or cat_string == "":
+        cat_filtered = list(target)
+    else:
+        categories = cat_string.split("*")
+        cat_filtered = [product for product in target if _in_categories(product, categories)]
+
+    # price filtering
+    return _filter_price(cat_filtered, min_price, max_price)
 
 
 def parse_filter_string(filter_string: str) -> Dict[str, Any]:
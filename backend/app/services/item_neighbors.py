@@ -0,0 +1,249 @@
+"""Precomputed item-to-item neighbors for recommendations.
+
+For every product, the K products most similar to it by the content score
+get_recommendations uses, as if it were the only product viewed. The table
+is array backed: row r is the r-th product in catalog order, neighbors[r]
+holds the rows of its neighbors (best first, padded with -1) and scores[r]
+their similarity. Online, recommendations merge the lists of the viewed
+products instead of scoring the whole catalog.
+
+The table is built offline and saved to NEIGHBORS_PATH:
+
+    python -m app.services.item_neighbors build [--k K]
+
+It carries a fingerprint of the catalog it was built from and the
+(serial, version) of the catalog index it matches, so a request only
+compares two small keys. Once product writes make it stale it keeps being served, so "content" results do not
+switch between neighbor merging and full scoring: neighbors of deleted
+products are skipped, and products written since the build are missing
+until the next one. A stale table is checked, and rebuilt if its fingerprint
+no longer matches, in a background thread at most once per
+NEIGHBORS_REBUILD_INTERVAL seconds, not on every write.
+"""
+
+from pathlib import Path
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.repositories.products_repo import load_all
+from app.services.catalog_index import CatalogIndex, get_index
+from app.services.similarity import np, ScoringColumns, column_scores, top_positions
+
+NEIGHBORS_K = 20
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+NEIGHBORS_PATH = Path(os.environ.get("NEIGHBORS_PATH", DATA_DIR / "item_neighbors.npz"))
+NEIGHBORS_REBUILD_INTERVAL = float(os.environ.get("NEIGHBORS_REBUILD_INTERVAL", "600"))
+
+_serials = itertools.count(1)
+# index serials restart with every process, so a saved catalog key only
+# counts in the process that wrote it
+_PROCESS = uuid.uuid4().hex
+
+
+class NeighborTable:
+    def __init__(
+        self,
+        product_ids: List[str],
+        neighbors,
+        scores,
+        fingerprint: str,
+        catalog: Optional[Tuple[str, int, int]] = None,
+    ):
+        self.product_ids = product_ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.fingerprint = fingerprint
+        # (process, index serial, index version) of the catalog it matches
+        self.catalog = catalog
+        # tells tables apart in cache keys, which the fingerprint cannot:
+        # tables built with another k share it
+        self.serial = next(_serials)
+        # first occurrence wins, as in the catalog index
+        self.rows: Dict[str, int] = {}
+        for row, product_id in enumerate(product_ids):
+            self.rows.setdefault(product_id, row)
+
+    def neighbors_of(self, row: int) -> List[Tuple[int, float]]:
+        """(row, similarity) of each neighbor of row, best first."""
+        return [
+            (int(neighbor), float(score))
+            for neighbor, score in zip(self.neighbors[row], self.scores[row])
+            if neighbor >= 0
+        ]
+
+
+def catalog_key(index: CatalogIndex, version: Optional[int] = None) -> Tuple[str, int, int]:
+    return _PROCESS, index.serial, index.version if version is None else version
+
+
+def fingerprint(pairs: List[Tuple[int, Dict[str, Any]]]) -> str:
+    """Digest of what the neighbors depend on: ids, order and the scored fields."""
+    digest = hashlib.sha1()
+    for _, rec in pairs:
+        fields = [rec.get("product_id"), rec.get("discounted_price"), rec.get("rating"), rec.get("category")]
+        digest.update(json.dumps(fields, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_table(index: CatalogIndex, k: int = NEIGHBORS_K) -> Optional[NeighborTable]:
+    """Score every product against every other one and keep its top k.
+
+    Works on a snapshot of the catalog, so it can run beside requests. None
+    when numpy is missing or some record does not fit the scoring columns.
+    """
+    if np is None:
+        return None
+    version, pairs = index.snapshot()
+    columns = ScoringColumns()
+    for doc, rec in pairs:
+        columns.add(doc, rec)
+    if columns.irregular:
+        return None
+    columns.refresh()
+
+    product_ids = [rec.get("product_id") for _, rec in pairs]
+    rows_by_id: Dict[str, List[int]] = {}
+    for row, product_id in enumerate(product_ids):
+        rows_by_id.setdefault(product_id, []).append(row)
+
+    n = len(pairs)
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    for row, (doc, _) in enumerate(pairs):
+        price, rating, categories = columns.rows[doc]
+        score = column_scores(columns, price, rating, set(categories))
+        # a product is never its own neighbor, nor are its duplicates
+        same = rows_by_id[product_ids[row]]
+        score[same] = -1.0
+        count = min(k, n - len(same))
+        if count > 0:
+            top = top_positions(score, count)
+            neighbors[row, :count] = top
+            scores[row, :count] = score[top]
+    return NeighborTable(product_ids, neighbors, scores, fingerprint(pairs), catalog_key(index, version))
+
+
+def save_table(table: NeighborTable, path: Optional[Path] = None) -> None:
+    path = Path(path or NEIGHBORS_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            product_ids=np.array(table.product_ids, dtype=str),
+            neighbors=table.neighbors,
+            scores=table.scores,
+            fingerprint=np.array(table.fingerprint),
+            catalog=np.array([str(part) for part in table.catalog or ("", -1, -1)]),
+        )
+    os.replace(tmp, path)
+
+
+def load_table(path: Optional[Path] = None) -> Optional[NeighborTable]:
+    path = Path(path or NEIGHBORS_PATH)
+    if np is None or not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        catalog = None
+        if "catalog" in data.files:
+            process, serial, version = data["catalog"].tolist()
+            catalog = (process, int(serial), int(version))
+        return NeighborTable(
+            data["product_ids"].tolist(),
+            data["neighbors"],
+            data["scores"],
+            str(data["fingerprint"]),
+            catalog,
+        )
+
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "table": None,          # last table loaded or built
+    "loaded": False,        # whether NEIGHBORS_PATH was read yet
+    "thread": None,         # background check or rebuild, while one runs
+    "last_rebuild": None,   # time.monotonic() the last one started
+}
+
+
+def table_for(index: CatalogIndex) -> Optional[NeighborTable]:
+    """The last table loaded or built, even when this catalog has moved on.
+
+    A table whose catalog key differs from the index schedules a rate-limited
+    background rebuild; a missing one does not, the offline job builds the
+    first table.
+    """
+    with _lock:
+        if not _state["loaded"]:
+            _state["table"] = load_table()
+            _state["loaded"] = True
+        table = _state["table"]
+    if table is not None and table.catalog != catalog_key(index):
+        rebuild_in_background()
+    return table
+
+
+def rebuild_in_background() -> None:
+    """Start a rebuild unless one runs or the last started too recently."""
+    now = time.monotonic()
+    with _lock:
+        last = _state["last_rebuild"]
+        if _state["thread"] is not None or (last is not None and now - last < NEIGHBORS_REBUILD_INTERVAL):
+            return
+        _state["last_rebuild"] = now
+        _state["thread"] = threading.Thread(target=_rebuild, daemon=True)
+        _state["thread"].start()
+
+
+def _rebuild() -> None:
+    try:
+        index = get_index(load_all())
+        version, pairs = index.snapshot()
+        with _lock:
+            table = _state["table"]
+        if table is not None and table.fingerprint == fingerprint(pairs):
+            # the writes left the scored fields alone, or the table was loaded
+            # from disk: it only needs the current key
+            table.catalog = catalog_key(index, version)
+            return
+        table = build_table(index)
+        if table is not None:
+            save_table(table)
+            with _lock:
+                _state.update(table=table, loaded=True)
+    finally:
+        with _lock:
+            _state["thread"] = None
+
+
+def invalidate() -> None:
+    """Forget the in-memory table; the next lookup reads NEIGHBORS_PATH again."""
+    with _lock:
+        _state.update(table=None, loaded=False, last_rebuild=None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BEIJ item-to-item neighbors")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="precompute each product's most similar products")
+    build.add_argument("--k", type=int, default=NEIGHBORS_K, help="neighbors kept per product")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        table = build_table(get_index(load_all()), k=args.k)
+        if table is None:
+            raise SystemExit("numpy is not installed or the catalog has records that cannot be scored")
+        save_table(table)
+        print(f"Built {args.k} neighbors for {len(table.product_ids)} products into {NEIGHBORS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import base64
+import bisect
+import json
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi import HTTPException
+from app.repositories.products_repo import load_all
+from app.services.catalog_index import get_index
+from app.constants.http_status import BAD_REQUEST
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Cursors are keyset cursors: they name the last item served (its sort key,
+# or for catalog order its product_id and position) rather than an offset,
+# so products added or removed elsewhere do not shift the next page.
+
+
+def encode_cursor(order: str, key: List[Any]) -> str:
+    raw = json.dumps({"o": order, "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = data["k"]
+        if data["o"] != order or not isinstance(key, list):
+            raise ValueError(order)
+        return key
+    except Exception:
+        raise HTTPException(status_code=BAD_REQUEST, detail="Invalid or mismatched cursor.")
+
+
+def paginate_sorted(
+    keyed: List[Tuple[Any, Any]],
+    order: str,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """One page of a sorted list of (key, value) pairs; keys must be unique tuples.
+
+    Returns the page's values and the cursor for the next page.
+    """
+    start = 0
+    if cursor is not None:
+        after = tuple(decode_cursor(cursor, order))
+        try:
+            start = bisect.bisect_right(keyed, after, key=lambda pair: pair[0])
+        except TypeError:
+            raise HTTPException(status_code=BAD_REQUEST, detail="Invalid or mismatched cursor.")
+    window = keyed[start:start + limit]
+    next_cursor = None
+    if start + limit < len(keyed) and window:
+        next_cursor = encode_cursor(order, list(window[-1][0]))
+    return [value for _, value in window], next_cursor
+
+
+def paginate_catalog_order(
+    products: List[Dict[str, Any]],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of products listed in catalog order (the catalog or a subset).
+
+    The cursor holds the last product's id and catalog position. The next
+    page starts after wherever that product is now; if it was deleted,
+    after the position it had.
+    """
+    index = get_index(load_all())
+
+    def position(rec: Dict[str, Any]) -> float:
+        pos = index.position(rec.get("product_id"))
+        return -1 if pos is None else pos
+
+    start = 0
+    if cursor is not None:
+        product_id, old_position = decode_cursor(cursor, "catalog")
+        anchor = index.position(product_id)
+        if anchor is None:
+            anchor = old_position - 0.5
+        if products is index.items:
+            start = int(anchor) + 1 if anchor >= 0 else 0
+        else:
+            start = bisect.bisect_right(products, anchor, key=position)
+
+    page = products[start:start + limit]
+    next_cursor = None
+    if start + limit < len(products) and page:
+        last = page[-1]
+        next_cursor = encode_cursor("catalog", [last.get("product_id"), position(last)])
+    return page, next_cursor
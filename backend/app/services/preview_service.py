@@ -1,25 +1,66 @@
-from typing import List
+from typing import List, Dict, Any, Optional
 from app.schemas.product_preview import ProductPreview
 from app.schemas.product import Product
 from app.repositories.products_repo import load_all
 from fastapi import HTTPException
+from pydantic import ValidationError
+from app.services.catalog_index import current, lookup
 from app.services.filtering import parse_filter_string
 
+def _build_preview(it: Dict[str, Any]) -> ProductPreview:
+    arg_list = {"product_id":it["product_id"],
+                "product_name":it["product_name"],
+                "discounted_price":it["discounted_price"],
+                "rating":it["rating"]}
+    return ProductPreview(**arg_list)
+
+class PreviewModels:
+    """Validated ProductPreview per doc, built once per catalog record.
+
+    A catalog index extension; records that cannot be previewed are kept as
+    None and rebuilt on access so the error surfaces as before.
+    """
+
+    def __init__(self) -> None:
+        self.previews: Dict[int, Optional[ProductPreview]] = {}
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        try:
+            self.previews[doc] = _build_preview(rec)
+        except (KeyError, TypeError, ValidationError):
+            self.previews[doc] = None
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.previews.pop(doc, None)
+
 def parse_to_previews(target:List[Product]) -> List[ProductPreview]:
+    index = lookup(target) or current()
+    if index is None:
+        return [_build_preview(it) for it in target]
+
+    cached = index.extension("previews", PreviewModels).previews
     previews = []
     for it in target:
-        arg_list = {"product_id":it["product_id"],
-                    "product_name":it["product_name"],
-                    "discounted_price":it["discounted_price"],
-                    "rating":it["rating"]}
-        previews.append(ProductPreview(**arg_list))
+        doc = index.doc_for(it)
+        preview = cached.get(doc) if doc is not None else None
+        previews.append(preview if preview is not None else _build_preview(it))
     return previews
 
+def get_all_products() -> List[Product]:
+    return load_all()
+
 def get_all_product_previews() -> List[ProductPreview]:
     return parse_to_previews(load_all())
 
 from app.services.filtering import filter_product_list
 
+def get_filtered_products(filter_string:str) -> List[Product]:
+    try:
+        filter_dict = parse_filter_string(filter_string)
+        return filter_product_list(load_all(),**filter_dict)
+    except Exception:
+        raise HTTPException(status_code=406, detail="Malformed Filter Request.")
+
 def filter_previews(filter_string:str) -> List[ProductPreview]:
     filtered_products = []
     try:
@@ -1,9 +1,16 @@
 import uuid
 from typing import List, Dict, Any, Optional 
 from fastapi import HTTPException
-from app.schemas.product import Product, ProductCreate, ProductUpdate
-from app.repositories.products_repo import load_all, save_all
-from app.constants.http_status import BAD_REQUEST, NOT_FOUND, CONFLICT
+from pydantic import ValidationError
+from app.schemas.product import (
+    Product, ProductCreate, ProductUpdate, ProductBatchResponse,
+    BulkOperation, BulkItemResult, BulkResponse,
+)
+from app.schemas.page import ProductPage
+from app.repositories.products_repo import load_all, save_changes, upsert, delete
+from app.services.catalog_index import get_index, carry_forward
+from app.services.pagination import paginate_sorted
+from app.constants.http_status import OK, CREATED, NO_CONTENT, BAD_REQUEST, NOT_FOUND, CONFLICT, UNPROCESSABLE_ENTITY
 PLACEHOLDER = "N/A"
 
 PLACEHOLDER_FIELDS = (
@@ -39,44 +46,149 @@ def with_placeholders(rec: Dict[str, Any]) -> Dict[str, Any]:
     out["rating_count"] = _normalize_rating_count(out.get("rating_count"))
     return out
 
+class ProductModels:
+    """Validated Product per doc, with placeholders already applied.
+
+    A catalog index extension: each record is normalized and validated once
+    when the catalog is loaded or the record is written, instead of on every
+    read. Read paths share these instances and must not mutate them. Records
+    that fail validation are kept as None and re-validated on access, so the
+    read that touches them raises as it always has.
+    """
+
+    def __init__(self) -> None:
+        self.models: Dict[int, Optional[Product]] = {}
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        try:
+            self.models[doc] = Product(**with_placeholders(rec))
+        except ValidationError:
+            self.models[doc] = None
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.models.pop(doc, None)
+
+def _models(index) -> ProductModels:
+    return index.extension("models", ProductModels)
+
+def _model(index, doc: int) -> Product:
+    model = _models(index).models.get(doc)
+    if model is None:
+        return Product(**with_placeholders(index.records[doc]))
+    return model
+
 def _load_products_models() -> List[Product]:
-    return [Product(**with_placeholders(it)) for it in load_all()]
+    index = get_index(load_all())
+    return [_model(index, doc) for doc in index.doc_ids]
 
-def _key_name(p: Product):
-    return p.product_name.lower()
+# Sort keys work on the raw records so an order can be computed without
+# building a model per product; they match what the Product fields would be.
+def _key_name(rec: Dict[str, Any]):
+    name = rec.get("product_name")
+    if name is None or (isinstance(name, str) and not name.strip()):
+        name = PLACEHOLDER
+    return name.lower()
 
-def _key_price(p: Product):
-    return p.discounted_price
+def _key_price(rec: Dict[str, Any]):
+    return rec.get("discounted_price") or 0
 
-def _key_rating(p: Product):
-    return (p.rating, p.rating_count)
+def _key_rating(rec: Dict[str, Any]):
+    return (rec.get("rating") or 0, _normalize_rating_count(rec.get("rating_count")))
 
-def list_products(sort_by: Optional[str] = None) -> List[Product]:
-    items = _load_products_models()
+# sort name -> (key, reverse)
+SORTS = {
+    "name": (_key_name, False),
+    "price_asc": (_key_price, False),
+    "price_desc": (_key_price, True),
+    "rating_desc": (_key_rating, True),
+}
 
-    sort_key = "name" if sort_by is None else sort_by
 
-    match sort_key:
-        case "name":
-            return sorted(items, key=_key_name)
+def _page_key(sort_key: str, rec: Dict[str, Any]):
+    # cursor pages need a unique key per product: the sort key with
+    # descending parts negated, then product_id
+    key, reverse = SORTS[sort_key]
+    value = key(rec)
+    if reverse:
+        value = tuple(-v for v in value) if isinstance(value, tuple) else -value
+    parts = value if isinstance(value, tuple) else (value,)
+    return parts + (str(rec.get("product_id")),)
+
 
-        case "price_asc":
-            return sorted(items, key=_key_price)
+class SortOrders:
+    """Doc ids of the catalog in each AVAILABLE_SORTS order.
+
+    A catalog index extension: orders are computed on first use and dropped
+    on any write, so repeated listings skip the sort and the model builds.
+    """
+
+    def __init__(self) -> None:
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self._orders: Dict[str, List[int]] = {}
+        self._keyed: Dict[str, List[Any]] = {}
+
+    def build(self, pairs) -> None:
+        self.records = dict(pairs)
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.records[doc] = rec
+        self._orders = {}
+        self._keyed = {}
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.records.pop(doc, None)
+        self._orders = {}
+        self._keyed = {}
+
+    def order(self, sort_key: str) -> List[int]:
+        """Docs in list_products order (stable: ties keep catalog order)."""
+        docs = self._orders.get(sort_key)
+        if docs is None:
+            key, reverse = SORTS[sort_key]
+            records = self.records
+            docs = sorted(sorted(records), key=lambda doc: key(records[doc]), reverse=reverse)
+            self._orders[sort_key] = docs
+        return docs
+
+    def keyed(self, sort_key: str) -> List[Any]:
+        """(unique page key, doc) pairs in cursor-page order."""
+        pairs = self._keyed.get(sort_key)
+        if pairs is None:
+            pairs = sorted((_page_key(sort_key, rec), doc) for doc, rec in self.records.items())
+            self._keyed[sort_key] = pairs
+        return pairs
+
+
+def _unsupported_sort(sort_by: Optional[str]) -> HTTPException:
+    return HTTPException(
+        status_code=BAD_REQUEST,
+        detail=(
+            f"There is an issue with sort_by '{sort_by}'. "
+            "Support values: name, price_asc, price_desc, rating_desc."
+        ),
+    )
 
-        case "price_desc":
-            return sorted(items, key=_key_price, reverse=True)
+def _sort_orders(sort_by: Optional[str]):
+    sort_key = "name" if sort_by is None else sort_by
+    if sort_key not in SORTS:
+        raise _unsupported_sort(sort_by)
+    index = get_index(load_all())
+    return sort_key, index, index.extension("sort_orders", SortOrders)
 
-        case "rating_desc":
-            return sorted(items, key=_key_rating, reverse=True)
+def list_products_page(sort_by: Optional[str], limit: int, cursor: Optional[str] = None) -> ProductPage:
+    sort_key, index, orders = _sort_orders(sort_by)
+    docs, next_cursor = paginate_sorted(orders.keyed(sort_key), sort_key, limit, cursor)
+    return ProductPage(
+        items=[_model(index, doc) for doc in docs],
+        next_cursor=next_cursor,
+    )
 
-        case _:
-            raise HTTPException(
-                status_code=BAD_REQUEST,
-                detail=(
-                    f"There is an issue with sort_by '{sort_by}'. "
-                    "Support values: name, price_asc, price_desc, rating_desc."
-                ),
-            )
+def list_products(sort_by: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[Product]:
+    """Products in sort_by order; limit/offset build models for that slice only."""
+    sort_key, index, orders = _sort_orders(sort_by)
+    docs = orders.order(sort_key)
+    end = None if limit is None else offset + limit
+    return [_model(index, doc) for doc in docs[offset:end]]
 
 def _build_product(product_id: str, payload: ProductCreate | ProductUpdate) -> Product:
     return Product(
@@ -99,38 +211,154 @@ def _build_product(product_id: str, payload: ProductCreate | ProductUpdate) -> P
     )
 
 def create_product(payload: ProductCreate) -> Product:
-    products = load_all()
+    current = load_all()
     new_id = str(uuid.uuid4())
 
-    if any(it.get("product_id") == new_id for it in products):
+    if get_index(current).get(new_id) is not None:
         raise HTTPException(status_code=CONFLICT, detail="ID collision; retry.")
 
     new_product = _build_product(new_id, payload)
-    products.append(new_product.model_dump())
-    save_all(products)
+    record = new_product.model_dump()
+    upsert(record)
+    carry_forward(current, load_all(), upserted=[record])
     return new_product
 
 
 def get_product_by_id(product_id: str) -> Product:
-    for it in load_all():
-        if it.get("product_id") == product_id:
-            return Product(**with_placeholders(it))
+    index = get_index(load_all())
+    doc = index.doc_of(product_id)
+    if doc is not None:
+        return _model(index, doc)
     raise HTTPException(status_code=NOT_FOUND, detail=f"Product '{product_id}' not found.")
 
+MAX_BATCH_IDS = 100
+
+def get_products_by_ids(ids: List[str]) -> ProductBatchResponse:
+    """Resolve many product ids against one catalog load, keeping request order."""
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=BAD_REQUEST, detail=f"At most {MAX_BATCH_IDS} ids per request.")
+
+    index = get_index(load_all())
+    items: List[Product] = []
+    missing: List[str] = []
+    for product_id in ids:
+        doc = index.doc_of(product_id)
+        if doc is not None:
+            items.append(_model(index, doc))
+        elif product_id not in missing:
+            missing.append(product_id)
+    return ProductBatchResponse(items=items, missing=missing)
+
 def update_product(product_id: str, payload: ProductUpdate) -> Product:
-    products = load_all()
-    for idx, it in enumerate(products):
-        if it.get("product_id") == product_id:
-            updated = _build_product(product_id, payload)
-            products[idx] = updated.model_dump()
-            save_all(products)
-            return updated
+    current = load_all()
+    if get_index(current).get(product_id) is not None:
+        updated = _build_product(product_id, payload)
+        record = updated.model_dump()
+        upsert(record)
+        carry_forward(current, load_all(), upserted=[record])
+        return updated
     raise HTTPException(status_code=NOT_FOUND, detail=f"Product '{product_id}' not found.")
 
 def delete_product(product_id: str) -> None:
     products = load_all()
-    new_products = [it for it in products if it.get("product_id") != product_id]
-    if len(new_products) == len(products):
+    if get_index(products).get(product_id) is None:
         raise HTTPException(status_code=NOT_FOUND, detail=f"Product '{product_id}' not found.")
-    save_all(new_products)
+    delete(product_id)
+    carry_forward(products, load_all(), deleted=[product_id])
+
+MAX_BULK_OPERATIONS = 10000
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
 
+
+def bulk_apply(operations: List[BulkOperation], all_or_nothing: bool = False) -> BulkResponse:
+    """Apply many create/update/delete operations with one load and one save.
+
+    Operations run in order against an in-memory view of the catalog, with
+    the same rules as the single-product calls; each one gets its own result,
+    including a 422 for a product payload that fails validation. The
+    successful ones are saved together (or, with all_or_nothing, only if
+    none failed).
+    """
+    if len(operations) > MAX_BULK_OPERATIONS:
+        raise HTTPException(status_code=BAD_REQUEST, detail=f"At most {MAX_BULK_OPERATIONS} operations per request.")
+
+    current = load_all()
+    index = get_index(current)
+    updated: Dict[str, Dict[str, Any]] = {}
+    deleted = set()
+    created: Dict[str, Dict[str, Any]] = {}
+    results: List[BulkItemResult] = []
+
+    def exists(product_id: Optional[str]) -> bool:
+        if product_id in created:
+            return True
+        return index.get(product_id) is not None and product_id not in deleted
+
+    for i, op in enumerate(operations):
+        result = BulkItemResult(index=i, op=op.op, product_id=op.product_id, status_code=OK)
+        payload, invalid = None, None
+        if op.op in ("create", "update") and op.product is not None:
+            try:
+                payload = ProductUpdate.model_validate(op.product)
+            except ValidationError as exc:
+                invalid = _validation_detail(exc)
+        if op.op in ("create", "update") and op.product is None:
+            result.status_code, result.detail = BAD_REQUEST, f"'{op.op}' needs a product."
+        elif invalid is not None:
+            result.status_code, result.detail = UNPROCESSABLE_ENTITY, invalid
+        elif op.op in ("update", "delete") and not op.product_id:
+            result.status_code, result.detail = BAD_REQUEST, f"'{op.op}' needs a product_id."
+        elif op.op == "create":
+            new_id = str(uuid.uuid4())
+            if exists(new_id):
+                result.status_code, result.detail = CONFLICT, "ID collision; retry."
+            else:
+                created[new_id] = _build_product(new_id, payload).model_dump()
+                result.product_id, result.status_code = new_id, CREATED
+        elif not exists(op.product_id):
+            result.status_code, result.detail = NOT_FOUND, f"Product '{op.product_id}' not found."
+        elif op.op == "update":
+            record = _build_product(op.product_id, payload).model_dump()
+            if op.product_id in created:
+                created[op.product_id] = record
+            else:
+                updated[op.product_id] = record
+        else:
+            if created.pop(op.product_id, None) is None:
+                deleted.add(op.product_id)
+                updated.pop(op.product_id, None)
+            result.status_code = NO_CONTENT
+        results.append(result)
+
+    failed = any(r.status_code >= BAD_REQUEST for r in results)
+    changed = bool(updated or deleted or created)
+    if not changed or (all_or_nothing and failed):
+        return BulkResponse(applied=False, results=results)
+
+    # same shape the single calls produce: updates replace the first record
+    # with that id in place, deletes drop every record with it, creates append
+    products: List[Dict[str, Any]] = []
+    pending = dict(updated)
+    for rec in current:
+        product_id = rec.get("product_id")
+        if product_id in deleted:
+            continue
+        products.append(pending.pop(product_id, rec))
+    products.extend(created.values())
+
+    save_changes(
+        products,
+        upserted=list(updated.values()) + list(created.values()),
+        deleted=list(deleted),
+    )
+    carry_forward(
+        current,
+        load_all(),
+        upserted=list(updated.values()) + list(created.values()),
+        deleted=list(deleted),
+    )
+    return BulkResponse(applied=True, results=results)
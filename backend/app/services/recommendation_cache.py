@@ -0,0 +1,97 @@
+"""Per-user cache of recommendation results.
+
+Entries are keyed by everything a result depends on: the user, a version of
+their view history, the catalog version, the co-view model and item neighbor
+table versions (for the strategies that use them) and the request arguments. A changed input makes a
+new key, so stale entries are never served; they are also dropped eagerly
+when the user records a view or the catalog changes, and least recently
+used entries are evicted past RECOMMENDATION_CACHE_SIZE.
+"""
+
+from collections import OrderedDict
+import os
+import threading
+from typing import List, Dict, Any, Hashable, Optional, Set, Tuple
+
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", "1024"))
+
+
+def history_version(user: Optional[Dict[str, Any]]) -> Hashable:
+    """Both view histories, in order. Derived from the user record itself,
+    so writes made by another worker change it too."""
+    if not user:
+        return ()
+    views = tuple(
+        entry.get("product_id") if isinstance(entry, dict) else entry
+        for entry in user.get("recently_viewed") or []
+    )
+    recent = user.get("recently_viewed_ids")
+    return views, tuple(recent) if isinstance(recent, list) else ()
+
+
+class RecommendationCache:
+    def __init__(self, max_size: int = RECOMMENDATION_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple, List[Any]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[Tuple]] = {}
+        self._catalog: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Tuple) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def _check_catalog(self, catalog: Hashable) -> None:
+        # every entry was computed against the previous catalog
+        if catalog != self._catalog:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._catalog = catalog
+
+    def get(self, key: Tuple, catalog: Hashable) -> Optional[List[Any]]:
+        """Cached result for key (user_id first), or None."""
+        with self._lock:
+            self._check_catalog(catalog)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(result)
+
+    def put(self, key: Tuple, catalog: Hashable, result: List[Any]) -> None:
+        with self._lock:
+            self._check_catalog(catalog)
+            self._entries[key] = list(result)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._catalog = None
+
+
+cache = RecommendationCache()
+
+
+def invalidate_user(user_id: str) -> None:
+    cache.invalidate_user(user_id)
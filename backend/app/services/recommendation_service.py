@@ -1,42 +1,173 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 from app.services.view_history_service import get_view_history
 from app.repositories.products_repo import load_all
 from app.repositories.users_repo import get_user_by_id
 from app.schemas.product import Product
 from app.error_handling import NotFound
-from app.services.product_service import with_placeholders, _load_products_models
+from app.services.catalog_index import CatalogIndex, get_index
+from app.services.product_service import with_placeholders, _load_products_models, _model
+from app.services.similarity import np, ScoringColumns, column_scores, top_positions
+from app.services.item_neighbors import NeighborTable, table_for
+from app.services.coview_service import get_model, viewed_ids
+from app.services.recommendation_cache import cache, history_version
+from app.constants.http_status import BAD_REQUEST
+from fastapi import HTTPException
 from collections import Counter
 import statistics
 
-def get_recommendations(user_id: str, limit: int = 8, exclude_product_id: str = None) -> List[Product]:
-    """Get product recommendations for a user based on viewing history"""
-    
+RECOMMENDATION_STRATEGIES = ("content", "coview", "blend")
+
+# share of the co-view ranking when blending, and the usual reciprocal rank
+# fusion constant that keeps either list's top rank from dominating
+BLEND_COVIEW_WEIGHT = 0.5
+RANK_FUSION_K = 60
+
+def get_recommendations(
+    user_id: str, limit: int = 8, exclude_product_id: str = None, strategy: str = "content"
+) -> List[Product]:
+    """Get product recommendations for a user based on viewing history
+
+    strategy picks the source: "content" scores products by similarity to
+    the viewed ones, "coview" uses what other users viewed alongside them,
+    and "blend" fuses the two rankings.
+    """
+    if strategy not in RECOMMENDATION_STRATEGIES:
+        raise HTTPException(
+            status_code=BAD_REQUEST,
+            detail=f"Unsupported strategy '{strategy}'. Supported values: {', '.join(RECOMMENDATION_STRATEGIES)}.",
+        )
+
+    # Repeated calls with the same history and catalog are served from memory
+    index = get_index(load_all())
+    catalog = (index.serial, index.version)
+    coview = get_model().version if strategy != "content" else None
+    # a rebuilt neighbor table changes content results without a catalog write
+    table = table_for(index) if strategy != "coview" else None
+    neighbors = table.serial if table is not None else None
+    key = (user_id, history_version(get_user_by_id(user_id)), coview, neighbors, strategy, exclude_product_id, limit)
+    cached = cache.get(key, catalog)
+    if cached is not None:
+        return cached
+
+    recommendations = _recommend(user_id, limit, exclude_product_id, strategy)
+    cache.put(key, catalog, recommendations)
+    return recommendations
+
+def _recommend(user_id: str, limit: int, exclude_product_id: Optional[str], strategy: str) -> List[Product]:
     # Get user's viewing history
     view_history = get_view_history(user_id)
-    
+
+    # Get viewed product IDs
+    viewed_product_ids = {v["product_id"] for v in view_history}
+
+    if strategy == "content":
+        recommendations = _content_recommendations(viewed_product_ids, exclude_product_id, limit)
+    else:
+        # co-view also counts the ids-only history the product pages record
+        viewed_product_ids |= viewed_ids(get_user_by_id(user_id))
+        coview = _coview_recommendations(viewed_product_ids, exclude_product_id, limit)
+        if strategy == "coview":
+            recommendations = coview
+        else:
+            content = _content_recommendations(viewed_product_ids, exclude_product_id, limit)
+            recommendations = _blend(content, coview, limit)
+
     # If no viewing history, return top-rated products as fallback
-    if not view_history:
+    if recommendations is None:
         return _get_top_rated_products(limit, exclude_product_id)
-    
+
+    # If we don't have enough recommendations, fill with top-rated products
+    if len(recommendations) < limit:
+        top_rated = _get_top_rated_products(limit - len(recommendations), exclude_product_id, exclude_ids=[p.product_id for p in recommendations] + list(viewed_product_ids))
+        recommendations.extend(top_rated)
+
+    return recommendations[:limit]
+
+def _content_recommendations(
+    viewed_product_ids: Set[str], exclude_product_id: Optional[str], limit: int
+) -> Optional[List[Product]]:
+    """Top products by content similarity; None when nothing viewed is in the catalog."""
+    if not viewed_product_ids:
+        return None
+
+    # Merge precomputed neighbor lists when a table was built, even a stale
+    # one, else score with arrays when numpy is available and every record fits them
+    index = get_index(load_all()) if np is not None else None
+    table = table_for(index) if index is not None else None
+    columns = index.extension("scoring", ScoringColumns) if index is not None and table is None else None
+    if table is not None:
+        return _merge_neighbors(index, table, viewed_product_ids, exclude_product_id, limit)
+    if columns is not None and not columns.irregular:
+        return _score_columns(index, columns, viewed_product_ids, exclude_product_id, limit)
+    return _score_products(viewed_product_ids, exclude_product_id, limit)
+
+def _coview_recommendations(
+    viewed_product_ids: Set[str], exclude_product_id: Optional[str], limit: int
+) -> Optional[List[Product]]:
+    """Products most co-viewed with the viewed ones; None when nothing was viewed.
+
+    A candidate scores the sum of its similarity to each viewed product
+    whose top K lists it, so the work is O(viewed * K).
+    """
+    if not viewed_product_ids:
+        return None
+
+    model = get_model()
+    totals: Dict[str, float] = {}
+    for product_id in sorted(viewed_product_ids):
+        for other, score in model.neighbors(product_id):
+            totals[other] = totals.get(other, 0.0) + score
+
+    skip = set(viewed_product_ids)
+    if exclude_product_id is not None:
+        skip.add(exclude_product_id)
+    index = get_index(load_all())
+    recommendations = []
+    for product_id in sorted(totals, key=lambda pid: (-totals[pid], pid)):
+        # products deleted since they were viewed are skipped
+        doc = index.doc_of(product_id) if product_id not in skip else None
+        if doc is not None:
+            recommendations.append(_model(index, doc))
+            if len(recommendations) == limit:
+                break
+    return recommendations
+
+def _blend(content: Optional[List[Product]], coview: Optional[List[Product]], limit: int) -> Optional[List[Product]]:
+    """Weighted reciprocal rank fusion of the two rankings."""
+    if content is None or coview is None:
+        return content if coview is None else coview
+
+    scores: Dict[str, float] = {}
+    products: Dict[str, Product] = {}
+    for weight, ranking in ((1 - BLEND_COVIEW_WEIGHT, content), (BLEND_COVIEW_WEIGHT, coview)):
+        for rank, product in enumerate(ranking):
+            scores[product.product_id] = scores.get(product.product_id, 0.0) + weight / (RANK_FUSION_K + rank)
+            products.setdefault(product.product_id, product)
+    # sorted() is stable: ties keep content order, then co-view order
+    ranked = sorted(products, key=lambda pid: -scores[pid])
+    return [products[pid] for pid in ranked[:limit]]
+
+def _score_products(viewed_product_ids: Set[str], exclude_product_id: Optional[str], limit: int) -> Optional[List[Product]]:
+    """Top products by similarity to the viewed ones, scored one at a time.
+
+    None when none of the viewed products are in the catalog.
+    """
     # Get all products
     all_products = _load_products_models()
-    
-    # Get viewed product IDs
-    viewed_product_ids = {v["product_id"] for v in view_history}
-    
+
     # Get details of viewed products
     viewed_products = []
     for product in all_products:
         if product.product_id in viewed_product_ids:
             viewed_products.append(product)
-    
+
     if not viewed_products:
-        return _get_top_rated_products(limit, exclude_product_id)
-    
+        return None
+
     # Calculate average metrics from viewed products
     avg_price = statistics.mean([p.discounted_price for p in viewed_products])
     avg_rating = statistics.mean([p.rating for p in viewed_products])
-    
+
     # Get all categories from viewed products
     viewed_categories = []
     for product in viewed_products:
@@ -44,16 +175,16 @@ def get_recommendations(user_id: str, limit: int = 8, exclude_product_id: str =
             viewed_categories.extend(product.category)
     category_counter = Counter(viewed_categories)
     total_category_views = sum(category_counter.values())
-    
+
     # Score all products
     scored_products = []
     for product in all_products:
         # Skip if already viewed or is the current product
         if product.product_id in viewed_product_ids or product.product_id == exclude_product_id:
             continue
-        
+
         score = 0.0
-        
+
         # Category match (40% weight)
         if product.category and viewed_categories:
             product_categories = set(product.category)
@@ -63,58 +194,151 @@ def get_recommendations(user_id: str, limit: int = 8, exclude_product_id: str =
                 # Calculate category similarity
                 category_score = overlap / max(len(product_categories), len(viewed_categories_set))
                 score += 0.4 * category_score
-        
+
         # Price similarity (30% weight)
         if avg_price > 0:
             price_diff = abs(product.discounted_price - avg_price) / avg_price
             if price_diff < 0.3:  # Within 30%
                 price_score = 1 - (price_diff / 0.3)
                 score += 0.3 * price_score
-        
+
         # Rating similarity (20% weight)
         if avg_rating > 0:
             rating_diff = abs(product.rating - avg_rating)
             if rating_diff < 1.0:  # Within 1 star
                 rating_score = 1 - (rating_diff / 1.0)
                 score += 0.2 * rating_score
-        
+
         # Recency bonus (10% weight) - products viewed more recently get higher weight
         # This is already handled by the order of view_history (most recent first)
         # We can add a small bonus for products in similar price/rating range
         if score > 0:
             score += 0.1
-        
+
         scored_products.append((score, product))
-    
+
     # Sort by score (descending) and return top products
     scored_products.sort(key=lambda x: x[0], reverse=True)
-    
-    # If we don't have enough recommendations, fill with top-rated products
-    recommendations = [product for _, product in scored_products[:limit]]
-    
-    if len(recommendations) < limit:
-        top_rated = _get_top_rated_products(limit - len(recommendations), exclude_product_id, exclude_ids=[p.product_id for p in recommendations] + list(viewed_product_ids))
-        recommendations.extend(top_rated)
-    
-    return recommendations[:limit]
+
+    return [product for _, product in scored_products[:limit]]
+
+def _score_columns(
+    index: CatalogIndex,
+    columns: ScoringColumns,
+    viewed_product_ids: Set[str],
+    exclude_product_id: Optional[str],
+    limit: int,
+) -> Optional[List[Product]]:
+    """Same scores and order as _score_products, computed as array operations."""
+    columns.refresh()
+    viewed_docs = sorted(doc for pid in viewed_product_ids for doc in index.docs_of(pid))
+    if not viewed_docs:
+        return None
+
+    viewed_rows = [columns.rows[doc] for doc in viewed_docs]
+    avg_price = statistics.mean([row[0] for row in viewed_rows])
+    avg_rating = statistics.mean([row[1] for row in viewed_rows])
+    viewed_categories = {c for row in viewed_rows for c in row[2]}
+    score = column_scores(columns, avg_price, avg_rating, viewed_categories)
+
+    # Viewed products and the current one are pushed below every real score
+    # (all of which are >= 0) and are never among the top k
+    excluded = viewed_docs + (index.docs_of(exclude_product_id) if exclude_product_id is not None else [])
+    score[np.searchsorted(columns.docs, excluded)] = -1.0
+    k = min(limit, len(columns.docs) - len(set(excluded)))
+    if k <= 0:
+        return []
+    return [_model(index, int(columns.docs[pos])) for pos in top_positions(score, k)]
+
+def _merge_neighbors(
+    index: CatalogIndex,
+    table: NeighborTable,
+    viewed_product_ids: Set[str],
+    exclude_product_id: Optional[str],
+    limit: int,
+) -> Optional[List[Product]]:
+    """Top products across the precomputed neighbor lists of the viewed ones.
+
+    A candidate scores the sum of its similarity to each viewed product that
+    lists it; ties go to the earlier product. The work depends on how many
+    products were viewed and on K, not on the size of the catalog.
+    """
+    viewed_rows = sorted(table.rows[pid] for pid in viewed_product_ids if pid in table.rows)
+    if not viewed_rows:
+        return None
+
+    totals: Dict[int, float] = {}
+    for row in viewed_rows:
+        for neighbor, score in table.neighbors_of(row):
+            totals[neighbor] = totals.get(neighbor, 0.0) + score
+
+    skip = set(viewed_product_ids)
+    if exclude_product_id is not None:
+        skip.add(exclude_product_id)
+    ranked = sorted(
+        (row for row in totals if table.product_ids[row] not in skip),
+        key=lambda row: (-totals[row], row),
+    )
+    # a stale table may list products deleted since it was built
+    recommendations = []
+    for row in ranked:
+        doc = index.doc_of(table.product_ids[row])
+        if doc is not None:
+            recommendations.append(_model(index, doc))
+            if len(recommendations) == limit:
+                break
+    return recommendations
+
+class PopularityOrder:
+    """Docs of the catalog by rating * rating_count, most popular first.
+
+    A catalog index extension, like SortOrders: the order is computed on
+    first use and dropped on any write. Ties keep catalog order, as the
+    stable sort over all products did.
+    """
+
+    def __init__(self) -> None:
+        self.docs: Set[int] = set()
+        self._order: Optional[List[int]] = None
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.docs.add(doc)
+        self._order = None
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.docs.discard(doc)
+        self._order = None
+
+    def order(self, index: CatalogIndex) -> List[int]:
+        docs = self._order
+        if docs is None:
+            # scored on the models so the ranking matches Product fields
+            popularity = {}
+            for doc in self.docs:
+                product = _model(index, doc)
+                popularity[doc] = product.rating * product.rating_count
+            docs = sorted(sorted(self.docs), key=popularity.__getitem__, reverse=True)
+            self._order = docs
+        return docs
 
 def _get_top_rated_products(limit: int, exclude_product_id: str = None, exclude_ids: List[str] = None) -> List[Product]:
-    """Get top-rated products as fallback recommendations"""
-    all_products = _load_products_models()
-    
+    """Get top-rated products as fallback recommendations
+
+    Walks the cached popularity order, so it costs O(limit + excluded).
+    """
+    if limit <= 0:
+        return []
+
     exclude_set = set(exclude_ids or [])
     if exclude_product_id:
         exclude_set.add(exclude_product_id)
-    
-    # Filter out excluded products
-    available_products = [p for p in all_products if p.product_id not in exclude_set]
-    
-    # Sort by rating * rating_count (popularity score)
-    sorted_products = sorted(
-        available_products,
-        key=lambda p: p.rating * p.rating_count,
-        reverse=True
-    )
-    
-    return sorted_products[:limit]
 
+    index = get_index(load_all())
+    top_rated = []
+    for doc in index.extension("popularity", PopularityOrder).order(index):
+        product = _model(index, doc)
+        if product.product_id not in exclude_set:
+            top_rated.append(product)
+            if len(top_rated) == limit:
+                break
+    return top_rated
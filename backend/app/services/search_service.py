@@ -1,7 +1,12 @@
+import heapq
+import math
+import re
 from app.schemas.product import Product
-from typing import List, Optional
+from typing import List, Optional, Dict, Set, Any
 from app.repositories.products_repo import load_all
-from app.services.filtering import filter_product_list, parse_filter_string
+from app.services.catalog_index import get_index
+from app.services.product_service import _normalize_rating_count
+from app.services.filtering import filter_docs, parse_filter_string
 
 
 def _tokenize_name(name: str) -> set[str]:
@@ -12,33 +17,406 @@ def _tokenize_name(name: str) -> set[str]:
     return set(t for t in tokens if t)
 
 
+def _trigrams(term: str) -> Set[str]:
+    padded = "$$" + term + "$$"
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _max_edits(token: str) -> int:
+    # short tokens have too few trigrams to tell a typo from another word
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def _within_distance(a: str, b: str, max_edits: int) -> bool:
+    """Levenshtein distance between a and b is at most max_edits."""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_edits:
+            return False
+        previous = current
+    return previous[-1] <= max_edits
+
+
+class TrigramIndex:
+    """Maps character trigrams to the vocabulary terms that contain them.
+
+    Every edit touches at most three trigram positions of the padded query, so
+    a term within d edits shares at least (distinct query trigrams) - 3d of
+    them; a trigram repeated in the query survives if any occurrence does. Only the
+    postings of the query's own trigrams are read, and only terms above that
+    count get an edit-distance check.
+    """
+
+    def __init__(self) -> None:
+        self.grams: Dict[str, Set[str]] = {}
+
+    def add(self, term: str) -> None:
+        for g in _trigrams(term):
+            self.grams.setdefault(g, set()).add(term)
+
+    def remove(self, term: str) -> None:
+        for g in _trigrams(term):
+            terms = self.grams.get(g)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self.grams[g]
+
+    def candidates(self, token: str, max_edits: int) -> Set[str]:
+        if max_edits <= 0:
+            return set()
+        grams = _trigrams(token)
+        # every candidate shares at least one trigram, since only postings are read
+        needed = max(len(grams) - 3 * max_edits, 1)
+        shared: Dict[str, int] = {}
+        for g in grams:
+            for term in self.grams.get(g, ()):
+                shared[term] = shared.get(term, 0) + 1
+        return set(
+            term for term, count in shared.items()
+            if count >= needed and _within_distance(token, term, max_edits)
+        )
+
+
+class SearchIndex:
+    """Inverted index from name tokens and lower-cased categories to doc ids.
+
+    Registered as a catalog_index extension, so it is built once per catalog
+    and patched on product create/update/delete. The vocabulary of both
+    posting maps is also kept in a TrigramIndex for fuzzy lookups.
+    """
+
+    def __init__(self) -> None:
+        self.name_postings: Dict[str, Set[int]] = {}
+        self.category_postings: Dict[str, Set[int]] = {}
+        self.category_counts: Dict[int, int] = {}
+        self.vocabulary = TrigramIndex()
+
+    @staticmethod
+    def _terms(rec: Dict[str, Any]):
+        categories = rec.get("category") or []
+        name_tokens = _tokenize_name(rec.get("product_name") or "")
+        return name_tokens, set(c.lower() for c in categories), len(categories)
+
+    def _known(self, term: str) -> bool:
+        return term in self.name_postings or term in self.category_postings
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        name_tokens, category_tokens, n_categories = self._terms(rec)
+        for postings, terms in ((self.name_postings, name_tokens), (self.category_postings, category_tokens)):
+            for t in terms:
+                if not self._known(t):
+                    self.vocabulary.add(t)
+                postings.setdefault(t, set()).add(doc)
+        self.category_counts[doc] = n_categories
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        name_tokens, category_tokens, _ = self._terms(rec)
+        for postings, terms in ((self.name_postings, name_tokens), (self.category_postings, category_tokens)):
+            for t in terms:
+                docs = postings.get(t)
+                if docs is not None:
+                    docs.discard(doc)
+                    if not docs:
+                        del postings[t]
+                        if not self._known(t):
+                            self.vocabulary.remove(t)
+        self.category_counts.pop(doc, None)
+
+    def expand(self, kw: List[str], fuzzy: bool = False) -> List[Set[str]]:
+        """Vocabulary terms each keyword stands for.
+
+        Without fuzzy every keyword stands for itself. With fuzzy a keyword
+        missing from the vocabulary is replaced by the terms within
+        _max_edits of it.
+        """
+        groups = []
+        for k in kw:
+            if fuzzy and not self._known(k):
+                groups.append(self.vocabulary.candidates(k, _max_edits(k)))
+            else:
+                groups.append({k})
+        return groups
+
+    def _docs(self, postings: Dict[str, Set[int]], group: Set[str]) -> Set[int]:
+        if len(group) == 1:
+            for term in group:
+                return postings.get(term, set())
+        docs: Set[int] = set()
+        for term in group:
+            docs |= postings.get(term, set())
+        return docs
+
+    def wide(self, groups: List[Set[str]]) -> Set[int]:
+        """Docs where any keyword is a name token or a category."""
+        result: Set[int] = set()
+        for group in groups:
+            result |= self._docs(self.name_postings, group)
+            result |= self._docs(self.category_postings, group)
+        return result
+
+    def strict(self, groups: List[Set[str]]) -> Set[int]:
+        """Docs whose name has every keyword, or where keywords cover over half the categories."""
+        postings = [self._docs(self.name_postings, group) for group in groups]
+        if all(postings):
+            # smallest list first keeps the intersection proportional to it
+            postings.sort(key=len)
+            result = set(postings[0]).intersection(*postings[1:])
+        else:
+            result = set()
+
+        category_docs = [self._docs(self.category_postings, group) for group in groups]
+        candidates: Set[int] = set().union(*category_docs)
+        for doc in candidates - result:
+            cat_match = sum(doc in docs for docs in category_docs)
+            if cat_match > self.category_counts[doc] / 2:
+                result.add(doc)
+        return result
+
+
+# BM25 parameters and per-field term weights (a name hit counts more than a
+# mention in the description)
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"product_name": 3.0, "category": 2.0, "about_product": 1.0}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _analyze(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class BM25Index:
+    """Term statistics for BM25 over name, categories and about_product.
+
+    Weighted term frequencies, document lengths and the collection totals are
+    kept up to date by add/remove, so a query only walks the postings of its
+    own terms.
+    """
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.doc_lengths: Dict[int, float] = {}
+        self.total_length = 0.0
+
+    @staticmethod
+    def _term_frequencies(rec: Dict[str, Any]) -> Dict[str, float]:
+        tf: Dict[str, float] = {}
+        fields = (
+            ("product_name", _analyze(rec.get("product_name") or "")),
+            # each category is one term, as in keyword_search, plus its words
+            ("category", [t for c in rec.get("category") or [] for t in [c.lower()] + _analyze(c)]),
+            ("about_product", _analyze(rec.get("about_product") or "")),
+        )
+        for field, terms in fields:
+            weight = FIELD_WEIGHTS[field]
+            for t in terms:
+                tf[t] = tf.get(t, 0.0) + weight
+        return tf
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        tf = self._term_frequencies(rec)
+        for t, f in tf.items():
+            self.postings.setdefault(t, {})[doc] = f
+        length = sum(tf.values())
+        self.doc_lengths[doc] = length
+        self.total_length += length
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        for t in self._term_frequencies(rec):
+            docs = self.postings.get(t)
+            if docs is not None:
+                docs.pop(doc, None)
+                if not docs:
+                    del self.postings[t]
+        self.total_length -= self.doc_lengths.pop(doc, 0.0)
+
+    def score(self, terms: List[str]) -> Dict[int, float]:
+        """BM25 score of every doc containing at least one of terms."""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return {}
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        for t in set(terms):
+            docs = self.postings.get(t)
+            if not docs:
+                continue
+            df = len(docs)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc] / avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+
+# suggestions kept per trie node; also the most autocomplete() returns
+AUTOCOMPLETE_TOP_N = 10
+
+
+def _popularity(rec: Dict[str, Any]) -> float:
+    # rating * rating_count, the ranking _get_top_rated_products uses
+    try:
+        rating = float(rec.get("rating") or 0)
+    except (TypeError, ValueError):
+        rating = 0.0
+    return rating * _normalize_rating_count(rec.get("rating_count"))
+
+
+class _TrieNode:
+    __slots__ = ("children", "docs", "top")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        # docs with a term ending at this node
+        self.docs: Set[int] = set()
+        # best docs in this subtree, or None until recomputed after a write
+        self.top: Optional[List[int]] = None
+
+
+class AutocompleteIndex:
+    """Prefix trie over name tokens and categories.
+
+    Every node caches the AUTOCOMPLETE_TOP_N most popular docs of its
+    subtree, so a lookup walks len(prefix) nodes and returns the cached list.
+    A write clears the cache on the nodes along the changed terms only; those
+    are rebuilt on the next lookup from their children's lists.
+    """
+
+    def __init__(self) -> None:
+        self.root = _TrieNode()
+        self.popularity: Dict[int, float] = {}
+
+    @staticmethod
+    def _terms(rec: Dict[str, Any]) -> Set[str]:
+        terms = _tokenize_name(rec.get("product_name") or "")
+        terms.update(c.lower() for c in rec.get("category") or [])
+        return terms
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        self.popularity[doc] = _popularity(rec)
+        for term in self._terms(rec):
+            node = self.root
+            node.top = None
+            for ch in term:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.top = None
+            node.docs.add(doc)
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        for term in self._terms(rec):
+            path = [self.root]
+            for ch in term:
+                child = path[-1].children.get(ch)
+                if child is None:
+                    break
+                path.append(child)
+            else:
+                path[-1].docs.discard(doc)
+            for node in path:
+                node.top = None
+            # prune branches that no longer lead to any term
+            for depth in range(len(path) - 1, 0, -1):
+                node = path[depth]
+                if node.docs or node.children:
+                    break
+                del path[depth - 1].children[term[depth - 1]]
+        self.popularity.pop(doc, None)
+
+    def _rank(self, docs: Set[int]) -> List[int]:
+        # most popular first, catalog order between equals
+        return heapq.nsmallest(AUTOCOMPLETE_TOP_N, docs, key=lambda doc: (-self.popularity[doc], doc))
+
+    def _top(self, node: _TrieNode) -> List[int]:
+        if node.top is None:
+            # the subtree's best docs are among this node's own docs and
+            # each child's best docs
+            candidates = set(node.docs)
+            for child in node.children.values():
+                candidates.update(self._top(child))
+            node.top = self._rank(candidates)
+        return node.top
+
+    def complete(self, prefix: str) -> List[int]:
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return self._top(node)
+
+
 def keyword_search(
     keywords: List[str],
     strict: bool = False,
-    filter: Optional[str] = None
+    filter: Optional[str] = None,
+    fuzzy: bool = False
     ) -> List[Product]:
-    
+
     products = load_all()
-    if filter is not None:
-        filter_dict = parse_filter_string(filter)
-        products = filter_product_list(products, **filter_dict)
+    index = get_index(products)
+    search = index.extension("search", SearchIndex)
 
     kw = [k.lower() for k in keywords]
-    result: List[Product] = []
+    groups = search.expand(kw, fuzzy)
+    if strict and not kw:
+        # no keywords trivially satisfy "every keyword"
+        docs = index.doc_ids
+    elif strict:
+        docs = search.strict(groups)
+    else:
+        docs = search.wide(groups)
 
-    for product in products:
-        name_tokens = _tokenize_name(product["product_name"])
-        category_tokens = set(c.lower() for c in product["category"])
+    # the filter is a per-product predicate, so applying it to the matches
+    # gives the same list as searching the filtered catalog
+    if filter is not None:
+        docs = filter_docs(index, docs, **parse_filter_string(filter))
 
-        if strict:
-            word_match = sum(k in name_tokens for k in kw)
-            cat_match = sum(k in category_tokens for k in kw)
+    return index.records_for(docs)
 
-            if word_match == len(kw) or cat_match > len(product["category"]) / 2:
-                result.append(product)
 
-        else:
-            if any(k in name_tokens or k in category_tokens for k in kw):
-                result.append(product)
+def ranked_search(
+    keywords: List[str],
+    limit: int = 20,
+    filter: Optional[str] = None
+    ) -> List[Product]:
+    """Top `limit` products for keywords, best BM25 score first.
+
+    Ties keep catalog order.
+    """
+    if limit <= 0:
+        return []
+
+    products = load_all()
+    index = get_index(products)
+    bm25 = index.extension("bm25", BM25Index)
+
+    terms = [t for k in keywords for t in [k.lower()] + _analyze(k)]
+    scores = bm25.score(terms)
+
+    if filter is not None:
+        kept = filter_docs(index, scores, **parse_filter_string(filter))
+        scores = {doc: scores[doc] for doc in kept}
+
+    # nlargest keeps a heap of `limit` entries instead of sorting every match
+    top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [index.records[doc] for doc, _ in top]
+
+
+def autocomplete(prefix: str, limit: int = AUTOCOMPLETE_TOP_N) -> List[Product]:
+    """Most popular products with a name token or category starting with prefix."""
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
 
-    return result
+    index = get_index(load_all())
+    trie = index.extension("autocomplete", AutocompleteIndex)
+    return [index.records[doc] for doc in trie.complete(prefix)[:limit]]
@@ -0,0 +1,122 @@
+"""Content similarity between products, scored over array columns.
+
+Shared by the recommendation scorer and the item-neighbor job: both score
+every product against a profile (average price, average rating and a set of
+categories) with the weights get_recommendations has always used.
+"""
+
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; callers fall back to scoring in Python
+    np = None
+
+
+class ScoringColumns:
+    """Columnar view of the catalog for scoring every product at once.
+
+    A catalog index extension. Price and rating are float arrays in catalog
+    order, and categories form a sparse product x category matrix stored
+    CSR-style: `indices` holds the category ids of each product's distinct
+    categories and `indptr` marks where each product's run starts. The arrays
+    are rebuilt on the first use after a write. Records whose price, rating
+    or category are not what the Product model would hold are counted in
+    `irregular`; while there are any, scoring uses the loop.
+    """
+
+    def __init__(self) -> None:
+        self.rows: Dict[int, Tuple[float, float, Tuple[str, ...]]] = {}
+        self.irregular = 0
+        self._stale = True
+
+    @staticmethod
+    def _row(rec: Dict[str, Any]) -> Optional[Tuple[float, float, Tuple[str, ...]]]:
+        price, rating, category = rec.get("discounted_price"), rec.get("rating"), rec.get("category")
+        for value in (price, rating):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return None
+        if not isinstance(category, list) or not all(isinstance(c, str) for c in category):
+            return None
+        return float(price), float(rating), tuple(dict.fromkeys(category))
+
+    def add(self, doc: int, rec: Dict[str, Any]) -> None:
+        row = self._row(rec)
+        if row is None:
+            self.irregular += 1
+        else:
+            self.rows[doc] = row
+        self._stale = True
+
+    def remove(self, doc: int, rec: Dict[str, Any]) -> None:
+        if self.rows.pop(doc, None) is None:
+            self.irregular -= 1
+        self._stale = True
+
+    def refresh(self) -> None:
+        if not self._stale:
+            return
+        docs = sorted(self.rows)
+        vocab: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        for doc in docs:
+            indices.extend(vocab.setdefault(c, len(vocab)) for c in self.rows[doc][2])
+            indptr.append(len(indices))
+        self.docs = np.array(docs, dtype=np.int64)
+        self.price = np.array([self.rows[doc][0] for doc in docs], dtype=np.float64)
+        self.rating = np.array([self.rows[doc][1] for doc in docs], dtype=np.float64)
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.sizes = np.diff(self.indptr)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.vocab = vocab
+        self._stale = False
+
+
+def column_scores(columns: ScoringColumns, avg_price: float, avg_rating: float, categories: Set[str]):
+    """Similarity of every product (in column order) to the profile.
+
+    Each term is added in the same order and with the same arithmetic as the
+    per-product loop in recommendation_service, so scores match it exactly.
+    Terms are computed for every product and added where they apply; adding
+    0.0 elsewhere leaves those scores unchanged.
+    """
+    score = np.zeros(len(columns.docs))
+
+    # Category match (40% weight): per-product overlap from a running count
+    # of profile-category hits over the sparse matrix
+    if categories:
+        is_wanted = np.zeros(len(columns.vocab), dtype=bool)
+        is_wanted[[columns.vocab[c] for c in categories if c in columns.vocab]] = True
+        hits = np.concatenate(([0], np.cumsum(is_wanted[columns.indices], dtype=np.int32)))
+        overlap = hits[columns.indptr[1:]] - hits[columns.indptr[:-1]]
+        category_score = overlap / np.maximum(columns.sizes, len(categories))
+        score += np.where(overlap > 0, 0.4 * category_score, 0.0)
+
+    # Price similarity (30% weight)
+    if avg_price > 0:
+        price_diff = np.abs(columns.price - avg_price) / avg_price
+        score += np.where(price_diff < 0.3, 0.3 * (1 - (price_diff / 0.3)), 0.0)
+
+    # Rating similarity (20% weight)
+    if avg_rating > 0:
+        rating_diff = np.abs(columns.rating - avg_rating)
+        score += np.where(rating_diff < 1.0, 0.2 * (1 - (rating_diff / 1.0)), 0.0)
+
+    # Bonus (10% weight)
+    score += np.where(score > 0, 0.1, 0.0)
+    return score
+
+
+def top_positions(score, k: int):
+    """Positions of the k best scores, best first, ties to the lower position.
+
+    Positions to leave out should be set below every real score first; k
+    must not exceed the number of positions left.
+    """
+    kth = score[np.argpartition(-score, k - 1)[:k]].min()
+    # everything above the k-th score, then the earliest of the positions tied with it
+    above = np.flatnonzero(score > kth)
+    tied = np.flatnonzero(score == kth)[: k - len(above)]
+    top = np.concatenate((above, tied))
+    return top[np.lexsort((top, -score[top]))]
@@ -1,8 +1,12 @@
 import jwt
 from datetime import datetime, timedelta
+import heapq
+import os
 import secrets
+import threading
+import time
 from fastapi import HTTPException
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from app.repositories.token_repo import (
     add_token, remove_token, remove_user_tokens, get_token, remove_expired_tokens
 )
@@ -13,6 +17,69 @@ REGULAR_TOKEN_EXPIRY_HOURS = 24
 REMEMBER_ME_TOKEN_EXPIRY_DAYS = 30
 UNAUTHORIZED = 401
 
+# "stored" (default) looks every token up in token_repo before decoding it;
+# "stateless" trusts the JWT signature and exp claim and only consults the
+# in-memory RevocationSet below, so the authenticated path does no storage I/O.
+VERIFY_MODE = os.environ.get("TOKEN_VERIFY_MODE", "stored").lower()
+
+
+class RevocationSet:
+    """Revoked-but-unexpired tokens, by jti, plus per-user watermarks.
+
+    A token is revoked if its jti was invalidated or if it was issued at or
+    before its user's "tokens issued before" watermark. The watermark and the
+    token's iat_ns claim are nanosecond timestamps, so logging in again right
+    after logging out everywhere is not caught by it. Entries are dropped
+    once the token they cover would have expired anyway. SECRET_KEY is
+    regenerated on every start, so nothing here needs to outlive the process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jtis: Dict[str, int] = {}
+        self._expiry: List[Tuple[int, str]] = []
+        self._issued_before: Dict[str, int] = {}
+
+    def _purge(self, now: int) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry)
+            self._jtis.pop(jti, None)
+        horizon = (now - int(_expiry_delta(True).total_seconds())) * 1_000_000_000
+        stale = [uid for uid, mark in self._issued_before.items() if mark < horizon]
+        for uid in stale:
+            del self._issued_before[uid]
+
+    def revoke(self, jti: str, exp: int) -> None:
+        now = int(time.time())
+        with self._lock:
+            self._purge(now)
+            if exp > now and jti not in self._jtis:
+                self._jtis[jti] = exp
+                heapq.heappush(self._expiry, (exp, jti))
+
+    def revoke_user(self, user_id: str) -> None:
+        now_ns = time.time_ns()
+        with self._lock:
+            self._purge(now_ns // 1_000_000_000)
+            self._issued_before[user_id] = now_ns
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        if payload.get("jti") in self._jtis:
+            return True
+        mark = self._issued_before.get(payload.get("user_id"))
+        if mark is None:
+            return False
+        # tokens without iat_ns fall back to the one-second iat, treating a
+        # token from the same second as the watermark as issued before it
+        issued_ns = payload.get("iat_ns", payload.get("iat", 0) * 1_000_000_000)
+        return issued_ns <= mark
+
+    def __len__(self) -> int:
+        return len(self._jtis)
+
+
+revoked = RevocationSet()
+
 
 def _expiry_delta(remember_me: bool) -> timedelta:
     return (
@@ -41,8 +108,10 @@ def generate_token(
         "email": email,
         "exp": expires_at,
         "iat": now,
+        "iat_ns": time.time_ns(),
         "remember_me": remember_me,
-        "is_admin": is_admin
+        "is_admin": is_admin,
+        "jti": secrets.token_urlsafe(12)
     }
 
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
@@ -69,7 +138,22 @@ def _expire_and_raise(token: str, msg: str) -> None:
     raise HTTPException(status_code=UNAUTHORIZED, detail=msg)
 
 
+def _verify_stateless(token: str) -> Dict[str, Any]:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=UNAUTHORIZED, detail="Token has expired.")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=UNAUTHORIZED, detail="Invalid token.")
+    if revoked.is_revoked(payload):
+        raise HTTPException(status_code=UNAUTHORIZED, detail="Token has been revoked.")
+    return payload
+
+
 def verify_token(token: str) -> Dict[str, Any]:
+    if VERIFY_MODE == "stateless":
+        return _verify_stateless(token)
+
     stored_token = get_token(token)
     if not stored_token:
         raise HTTPException(status_code=UNAUTHORIZED, detail="Token not found or invalid.")
@@ -94,7 +178,15 @@ def verify_token(token: str) -> Dict[str, Any]:
 
 def invalidate_token(token: str) -> None:
     remove_token(token)
+    try:
+        # signature must be valid; an expired token needs no revocation entry
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError:
+        return
+    if payload.get("jti"):
+        revoked.revoke(payload["jti"], int(payload["exp"]))
 
 def invalidate_user_tokens(user_id: str) -> None:
     remove_user_tokens(user_id)
+    revoked.revoke_user(user_id)
     
\ No newline at end of file
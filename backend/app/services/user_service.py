@@ -1,7 +1,10 @@
 from app.schemas.user import User, UserCreate, UserResponse, UserLogin, LoginResponse, UserUpdate, ForgotPasswordResponse, ResetPasswordResponse
-from app.repositories.users_repo import load_all, save_all, add_saved_item, remove_saved_item, get_saved_item_ids as repo_get_saved_item_ids, add_recently_viewed_item, get_recently_viewed_ids
+from app.repositories.users_repo import load_all, upsert, add_saved_item, remove_saved_item, get_saved_item_ids as repo_get_saved_item_ids, add_recently_viewed_item, get_recently_viewed_ids, index_for
 from app.repositories.products_repo import load_all as load_products
+from app.services.catalog_index import ID_ALIASES, get_index, lookup
 from app.services.token_service import generate_token
+from app.services.coview_service import record_view
+from app.services.recommendation_cache import invalidate_user
 from app.error_handling import NotFound, BadRequest
 from app.schemas.product import Product
 import uuid
@@ -52,8 +55,7 @@ def create_user(user_create:UserCreate) -> UserResponse:
     new_id = str(uuid.uuid4())
     hashed_pwd = hash_password(user_create.password)
     new_user = User(user_id=new_id, username=user_create.username.strip(), email=user_create.email, hashed_password=hashed_pwd, is_admin=False)
-    users.append(new_user.model_dump())
-    save_all(users)
+    upsert(new_user.model_dump())
     return build_user_response(new_user.model_dump())
 
 def create_admin_user(user_create: UserCreate, admin_secret: str) -> UserResponse:
@@ -76,8 +78,7 @@ def create_admin_user(user_create: UserCreate, admin_secret: str) -> UserRespons
         hashed_password=hashed_pwd,
         is_admin=True
     )
-    users.append(new_user.model_dump())
-    save_all(users)
+    upsert(new_user.model_dump())
     return build_user_response(new_user.model_dump())
 
 def list_users() -> List[UserResponse]:
@@ -102,27 +103,22 @@ def authenticate_user(user_login: UserLogin) -> LoginResponse:
     )
 
 def find_user(users: List[Dict[str, Any]], user_id: str) -> Dict[str, Any] | None:
-    return next((u for u in users if u.get("user_id") == user_id), None)
+    return index_for(users).get(user_id)
 
 def find_user_by_username_or_email(users: List[Dict[str, Any]], username_or_email: str) -> Dict[str, Any] | None:
-    return next(
-        (it for it in users 
-         if it.get("username") == username_or_email or it.get("email") == username_or_email),
-        None
-    )
+    # emails match case-insensitively, usernames exactly
+    return index_for(users).find_login(username_or_email)
 
 def check_duplicate_username(users: List[Dict[str, Any]], username: str, exclude_user_id: str | None = None) -> bool:
     return any(
-        it.get("username") == username 
-        and (exclude_user_id is None or it.get("user_id") != exclude_user_id)
-        for it in users
+        exclude_user_id is None or it.get("user_id") != exclude_user_id
+        for it in index_for(users).with_username(username)
     )
 
 def check_duplicate_email(users: List[Dict[str, Any]], email: str, exclude_user_id: str | None = None) -> bool:
     return any(
-        it.get("email") == email 
-        and (exclude_user_id is None or it.get("user_id") != exclude_user_id)
-        for it in users
+        exclude_user_id is None or it.get("user_id") != exclude_user_id
+        for it in index_for(users).with_email(email)
     )
 
 def build_user_response(user: Dict[str, Any]) -> UserResponse:
@@ -135,12 +131,11 @@ def build_user_response(user: Dict[str, Any]) -> UserResponse:
     )
 
 def find_product(products: List[Dict[str, Any]], product_id: str) -> Dict[str, Any] | None:
-    return next(
-        ( p for p in products
-         if p.get("id") == product_id
-         or p.get("product_id") == product_id
-         or p.get("asin") == product_id), None
-        )
+    index = lookup(products)
+    if index is not None:
+        return index.find(product_id)
+    # any other list is scanned, so the catalog index is not evicted for it
+    return next((p for p in products if any(p.get(key) == product_id for key in ID_ALIASES)), None)
 
 def save_item(user_id: str, product_id: str) -> List[str]:
     users = load_all()
@@ -153,12 +148,11 @@ def save_item(user_id: str, product_id: str) -> List[str]:
     if product is None:
         raise NotFound(f"Product '{product_id}' not found.")
 
-    saved_ids = user.get("saved_item_ids") or []
-    if product_id not in saved_ids:
-        saved_ids.append(product_id)
-        user["saved_item_ids"] = saved_ids
-        save_all(users)
-    return saved_ids
+    saved_ids = list(user.get("saved_item_ids") or [])
+    if product_id in saved_ids:
+        return saved_ids
+    # one line appended to the users mutation log instead of rewriting users.json
+    return add_saved_item(user_id, product_id)["saved_item_ids"]
 
 def unsave_item(user_id: str, product_id: str) -> List[str]:
     users = load_all()
@@ -166,12 +160,10 @@ def unsave_item(user_id: str, product_id: str) -> List[str]:
     if user is None:
         raise NotFound(f"User '{user_id}' not found.")
 
-    saved_ids = user.get("saved_item_ids") or []
-    if product_id in saved_ids:
-        saved_ids.remove(product_id)
-        user["saved_item_ids"] = saved_ids
-        save_all(users)
-    return saved_ids
+    saved_ids = list(user.get("saved_item_ids") or [])
+    if product_id not in saved_ids:
+        return saved_ids
+    return remove_saved_item(user_id, product_id)["saved_item_ids"]
 
 def get_saved_item_ids(user_id: str) -> List[str]:
     users = load_all()
@@ -181,7 +173,8 @@ def get_saved_item_ids(user_id: str) -> List[str]:
     return user.get("saved_item_ids") or []
 
 def add_recently_viewed(user_id: str, product_id: str) -> List[str]:
-    user = add_recently_viewed_item(user_id, product_id)
+    user = record_view(user_id, lambda: add_recently_viewed_item(user_id, product_id))
+    invalidate_user(user_id)
     rv = user.get("recently_viewed_ids")
     if not isinstance(rv, list):
         rv = []
@@ -190,12 +183,10 @@ def add_recently_viewed(user_id: str, product_id: str) -> List[str]:
 def get_recently_viewed_products(user_id: str, limit: int = 4) -> List[Product]:
     ids = get_recently_viewed_ids(user_id, limit=limit)
 
-    all_products = load_products()
-
-    by_id = {p["product_id"]: p for p in all_products}
+    index = get_index(load_products())
 
-    ordered = [by_id[pid] for pid in ids if pid in by_id]
-    return [Product(**p) for p in ordered]
+    ordered = [index.get(pid) for pid in ids]
+    return [Product(**p) for p in ordered if p is not None]
 
 
 def get_user_profile(user_id: str) -> UserResponse:
@@ -211,6 +202,7 @@ def update_user_profile(user_id: str, payload: UserUpdate) -> UserResponse:
     user = find_user(users, user_id)
     if user is None:
         raise NotFound(f"User '{user_id}' not found.")
+    user = dict(user)
     if payload.username is not None:
         if check_duplicate_username(users, payload.username, exclude_user_id=user_id):
             raise HTTPException(status_code=409, detail="Username already exists.")
@@ -221,7 +213,7 @@ def update_user_profile(user_id: str, payload: UserUpdate) -> UserResponse:
         user["email"] = payload.email
     if payload.password is not None:
         user["hashed_password"] = hash_password(payload.password)
-    save_all(users)
+    upsert(user)
     
     return build_user_response(user)
 
@@ -274,8 +266,8 @@ def _cleanup_expired_tokens(tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]
 
 def generate_reset_token(email: str) -> ForgotPasswordResponse:
     """Generate a password reset token for the given email"""
-    users = load_all()
-    user = next((u for u in users if u.get("email") == email), None)
+    matches = index_for(load_all()).with_email(email)
+    user = matches[0] if matches else None
     
     if user is None:
         # For security, don't reveal if email exists or not
@@ -333,8 +325,7 @@ def reset_password_with_token(token: str, new_password: str) -> ResetPasswordRes
     if user is None:
         raise HTTPException(status_code=404, detail="User not found.")
     
-    user["hashed_password"] = hash_password(new_password)
-    save_all(users)
+    upsert({**user, "hashed_password": hash_password(new_password)})
     
     # Remove the used token
     tokens = [t for t in tokens if t.get("token") != token]
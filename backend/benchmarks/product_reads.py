@@ -0,0 +1,105 @@
+"""Per-request cost of the product read paths, before and after ingest-time
+normalization.
+
+"before" re-runs what every request used to do (with_placeholders plus a
+validated model per product); "after" calls the current service functions
+against a warm catalog index.
+
+    cd backend && python -m benchmarks.product_reads [--products N] [--repeat R]
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import products_repo
+from app.schemas.product import Product
+from app.schemas.product_preview import ProductPreview
+from app.services import preview_service, product_service
+from app.services.product_service import with_placeholders
+
+
+def _catalog(n: int):
+    rng = random.Random(0)
+    words = ["cable", "charger", "usb", "hdmi", "wireless", "mouse", "smart", "fast", "4k", "led"]
+    return [
+        {
+            "product_id": f"B{i:09d}",
+            "product_name": " ".join(rng.sample(words, 4)).title(),
+            "category": ["Electronics", rng.choice(["Cables", "Audio", "Accessories"])],
+            "discounted_price": round(rng.uniform(100, 5000), 2),
+            "actual_price": round(rng.uniform(5000, 9000), 2),
+            "discount_percentage": f"{rng.randint(5, 80)}%",
+            "rating": rng.choice([3.5, 3.9, 4.1, 4.4]),
+            "rating_count": f"{rng.randint(0, 90000):,}",
+            "about_product": "About " + " ".join(rng.sample(words, 6)),
+            "user_id": ["u1", "u2"],
+            "user_name": ["a", "b"],
+            "review_id": ["r1", "r2"],
+            "review_title": ["ok", "good"],
+            "review_content": "Works fine. " * 20,
+            "img_link": "https://example.com/img.jpg",
+            "product_link": "https://example.com/p",
+        }
+        for i in range(n)
+    ]
+
+
+def _old_models():
+    return [Product(**with_placeholders(it)) for it in products_repo.load_all()]
+
+
+def _old_previews():
+    return [
+        ProductPreview(product_id=it["product_id"], product_name=it["product_name"],
+                       discounted_price=it["discounted_price"], rating=it["rating"])
+        for it in products_repo.load_all()
+    ]
+
+
+def _time(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        path = Path(tmp) / "products.json"
+        path.write_text(json.dumps(_catalog(args.products)), encoding="utf-8")
+        with patch("app.repositories.products_repo.DATA_PATH", new=path):
+            products_repo.invalidate_cache()
+            some_id = products_repo.load_all()[args.products // 2]["product_id"]
+            cases = [
+                ("all product models", _old_models, product_service._load_products_models),
+                ("list_products(name)",
+                 lambda: sorted(_old_models(), key=lambda p: p.product_name.lower()),
+                 lambda: product_service.list_products("name")),
+                ("get_product_by_id",
+                 lambda: Product(**with_placeholders(next(p for p in products_repo.load_all() if p["product_id"] == some_id))),
+                 lambda: product_service.get_product_by_id(some_id)),
+                ("all previews", _old_previews,
+                 lambda: preview_service.parse_to_previews(products_repo.load_all())),
+            ]
+            print(f"{args.products} products, mean of {args.repeat} warm runs")
+            print(f"{'read path':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+            for name, before, after in cases:
+                b = _time(before, args.repeat)
+                a = _time(after, args.repeat)
+                print(f"{name:<24}{b:>12.3f}{a:>12.3f}{b / a:>9.0f}x")
+            products_repo.invalidate_cache()
+
+
+if __name__ == "__main__":
+    main()
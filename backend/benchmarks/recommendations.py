@@ -0,0 +1,49 @@
+"""Per-request cost of recommendation scoring, loop versus arrays.
+
+Both paths score the same warm catalog for the same view history; "loop" is
+_score_products, "arrays" is _score_columns over the ScoringColumns extension.
+
+    cd backend && python -m benchmarks.recommendations [--products N] [--repeat R]
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import products_repo
+from app.services import recommendation_service
+from app.services.catalog_index import get_index
+from app.services.similarity import ScoringColumns
+from benchmarks.product_reads import _catalog, _time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        path = Path(tmp) / "products.json"
+        path.write_text(json.dumps(_catalog(args.products)), encoding="utf-8")
+        with patch("app.repositories.products_repo.DATA_PATH", new=path):
+            products_repo.invalidate_cache()
+            items = products_repo.load_all()
+            index = get_index(items)
+            columns = index.extension("scoring", ScoringColumns)
+            rng = random.Random(1)
+            viewed = {items[rng.randrange(len(items))]["product_id"] for _ in range(10)}
+
+            loop = _time(lambda: recommendation_service._score_products(viewed, None, 8), args.repeat)
+            arrays = _time(lambda: recommendation_service._score_columns(index, columns, viewed, None, 8), args.repeat)
+            print(f"{args.products} products, mean of {args.repeat} warm runs")
+            print(f"{'loop ms':>10}{'arrays ms':>12}{'speedup':>10}")
+            print(f"{loop:>10.3f}{arrays:>12.3f}{loop / arrays:>9.0f}x")
+            products_repo.invalidate_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#This file holds shared setup for tests that run against a temporary products.json
+
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import products_repo
+
+
+def use_temp_catalog(test: unittest.TestCase, products: list) -> Path:
+    """Point products_repo at a fresh products.json holding products.
+
+    The file lives in a temporary directory that tests may also use for
+    other data files; everything is undone through test.addCleanup.
+    """
+    tempdir = TemporaryDirectory()
+    test.addCleanup(tempdir.cleanup)
+    path = Path(tempdir.name) / "products.json"
+    path.write_text(json.dumps(products), encoding="utf-8")
+
+    patcher = patch("app.repositories.products_repo.DATA_PATH", new=path)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    products_repo.invalidate_cache()
+    test.addCleanup(products_repo.invalidate_cache)
+    return path
+
+
+def product_payload(name: str, **fields) -> dict:
+    """ProductCreate / ProductUpdate fields for a valid product, with overrides."""
+    return {
+        "product_name": name,
+        "category": ["cat1"],
+        "discounted_price": 10.0,
+        "actual_price": 20.0,
+        "discount_percentage": "50%",
+        "rating": 4.0,
+        "rating_count": 3,
+        "about_product": "about",
+        "review_content": "",
+        "img_link": "https://example.com/img.jpg",
+        "product_link": "https://example.com/p",
+        **fields,
+    }
@@ -0,0 +1,93 @@
+import itertools
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.search_service import AUTOCOMPLETE_TOP_N, AutocompleteIndex, autocomplete
+
+client = TestClient(app)
+
+CATALOG = [
+    {"product_id": "a", "product_name": "Headphones Basic", "category": ["Audio"], "rating": 4.0, "rating_count": "1,000"},
+    {"product_id": "b", "product_name": "Headset Pro", "category": ["Audio"], "rating": 4.5, "rating_count": 5000},
+    {"product_id": "c", "product_name": "HDMI Cable", "category": ["Cables"], "rating": 3.0, "rating_count": 10},
+    {"product_id": "d", "product_name": "Heater", "category": ["Home"], "rating": 5.0, "rating_count": None},
+]
+
+
+class TestAutocomplete:
+
+    @patch("app.services.search_service.load_all", return_value=CATALOG)
+    def test_prefix_returns_most_popular_first(self, _):
+        assert [p["product_id"] for p in autocomplete("Hea")] == ["b", "a", "d"]
+        assert [p["product_id"] for p in autocomplete("h", limit=2)] == ["b", "a"]
+        assert [p["product_id"] for p in autocomplete("aud")] == ["b", "a"]
+        assert autocomplete("zz") == []
+        assert autocomplete("  ") == []
+
+    def test_empty_prefix_lists_the_most_popular_overall(self):
+        index = AutocompleteIndex()
+        for doc, rec in enumerate(CATALOG):
+            index.add(doc, rec)
+        # "d" has no rating count, so no popularity
+        assert index.complete("") == [1, 0, 2, 3]
+
+    def test_ties_keep_catalog_order(self):
+        index = AutocompleteIndex()
+        for doc in (2, 0, 1):
+            index.add(doc, {"product_name": "cable", "category": [], "rating": 4, "rating_count": 10})
+        index.add(3, {"product_name": "cart", "category": [], "rating": 4, "rating_count": 10})
+        assert index.complete("ca") == [0, 1, 2, 3]
+
+    def test_removed_doc_leaves_the_cached_lists(self):
+        index = AutocompleteIndex()
+        recs = {
+            doc: {"product_name": f"cable{doc}", "category": [], "rating": 1, "rating_count": 100 - doc}
+            for doc in range(AUTOCOMPLETE_TOP_N + 1)
+        }
+        for doc, rec in recs.items():
+            index.add(doc, rec)
+        assert index.complete("cab") == list(range(AUTOCOMPLETE_TOP_N))
+
+        index.remove(0, recs[0])
+        # the doc just outside the cached top moves up
+        assert index.complete("cab") == list(range(1, AUTOCOMPLETE_TOP_N + 1))
+        assert index.complete("cable0") == []
+
+    def test_removing_the_last_doc_prunes_its_branch(self):
+        index = AutocompleteIndex()
+        car = {"product_name": "car", "category": [], "rating": 1, "rating_count": 1}
+        cart = {"product_name": "cart", "category": ["Toys"], "rating": 1, "rating_count": 1}
+        index.add(0, car)
+        index.add(1, cart)
+
+        index.remove(1, cart)
+        assert index.complete("car") == [0]
+        assert "t" not in index.root.children["c"].children["a"].children["r"].children
+        assert "t" not in index.root.children
+
+        index.remove(0, car)
+        assert index.root.children == {}
+        assert index.complete("") == []
+
+    def test_lookup_is_fast(self):
+        index = AutocompleteIndex()
+        words = ["".join(letters) for letters in itertools.product("abcdefgh", repeat=4)]
+        for doc in range(20000):
+            name = " ".join(words[(doc * step) % len(words)] for step in (1, 7, 31))
+            index.add(doc, {"product_name": name, "category": [], "rating": 4, "rating_count": doc})
+        index.complete("ab")  # first lookup fills the cache
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            index.complete("abc")
+        assert (time.perf_counter() - start) / 1000 < 0.001
+
+    @patch("app.routers.previews_router.autocomplete", return_value=[])
+    def test_autocomplete_endpoint(self, mock_autocomplete):
+        response = client.get("/api/v1/previews/autocomplete/hea?limit=5")
+
+        assert response.status_code == 200
+        mock_autocomplete.assert_called_once_with("hea", limit=5)
@@ -0,0 +1,164 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from app.repositories import products_repo
+from app.schemas.product import BulkOperation, ProductCreate, ProductUpdate
+from app.services import catalog_index, product_service, recommendation_service, user_service
+from app.services.catalog_index import CatalogIndex
+from app.services.category_service import get_category_tree
+from app.services.facet_service import compute_facets
+from app.services.preview_service import get_all_product_previews, get_filtered_products
+from app.services.search_service import autocomplete, keyword_search, ranked_search
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog, product_payload
+
+
+class TestCatalogIndexLookups(unittest.TestCase):
+    def test_lookup_by_every_alias(self):
+        items = [{"product_id": "p1"}, {"id": "legacy"}, {"asin": "B000"}]
+        index = CatalogIndex(items)
+
+        self.assertIs(index.get("p1"), items[0])
+        self.assertIs(index.find("legacy"), items[1])
+        self.assertIs(index.find("B000"), items[2])
+        self.assertIsNone(index.get("legacy"))
+        self.assertEqual(index.position("p1"), 0)
+
+    def test_first_occurrence_wins(self):
+        items = [{"product_id": "dup", "n": 1}, {"product_id": "dup", "n": 2}]
+        self.assertEqual(CatalogIndex(items).get("dup")["n"], 1)
+
+    def test_snapshot_is_a_copy(self):
+        items = [{"product_id": "p1"}, {"product_id": "p2"}]
+        index = CatalogIndex(items)
+        version, pairs = index.snapshot()
+
+        index.apply([items[1]], deleted=["p1"])
+        self.assertEqual((version, pairs), (0, [(0, items[0]), (1, items[1])]))
+        self.assertEqual(index.snapshot(), (1, [(1, items[1])]))
+
+    def test_index_is_reused_for_the_same_list(self):
+        items = list(TEST_PRODUCTS)
+        self.assertIs(catalog_index.get_index(items), catalog_index.get_index(items))
+        self.assertIsNot(catalog_index.get_index(items), catalog_index.get_index(list(items)))
+
+
+# create/update/delete keep the index in step with the catalog
+class TestCatalogIndexWrites(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, TEST_PRODUCTS)
+
+    def _assert_matches_fresh_build(self):
+        items = products_repo.load_all()
+        carried = catalog_index.get_index(items)
+        fresh = CatalogIndex(items)
+        self.assertEqual(carried.by_product_id, fresh.by_product_id)
+        self.assertEqual(carried.by_alias, fresh.by_alias)
+        self.assertEqual(carried.positions, fresh.positions)
+
+    def test_writes_carry_the_index_forward(self):
+        index = catalog_index.get_index(products_repo.load_all())
+
+        created = product_service.create_product(ProductCreate(**product_payload("New")))
+        # patched in place rather than rebuilt
+        self.assertIs(catalog_index.get_index(products_repo.load_all()), index)
+        self._assert_matches_fresh_build()
+        self.assertEqual(product_service.get_product_by_id(created.product_id).product_name, "New")
+
+        product_service.update_product("2", ProductUpdate(**product_payload("Renamed")))
+        self._assert_matches_fresh_build()
+        self.assertEqual(product_service.get_product_by_id("2").product_name, "Renamed")
+
+        product_service.delete_product("1")
+        self._assert_matches_fresh_build()
+        self.assertIsNone(catalog_index.get_index(products_repo.load_all()).get("1"))
+
+    def test_find_product_leaves_the_catalog_index_alone(self):
+        items = products_repo.load_all()
+        index = catalog_index.get_index(items)
+
+        self.assertIs(user_service.find_product(items, "2"), index.get("2"))
+        other = [{"asin": "B000"}, {"product_id": "2", "n": 1}]
+        self.assertIs(user_service.find_product(other, "2"), other[1])
+        self.assertIs(user_service.find_product(other, "B000"), other[0])
+        self.assertIsNone(user_service.find_product(other, "missing"))
+        self.assertIs(catalog_index.current(), index)
+
+
+def _ids(products) -> list:
+    return [p["product_id"] if isinstance(p, dict) else p.product_id for p in products]
+
+
+# every feature index patched through many writes answers like a fresh build
+class TestCatalogIndexEquivalence(unittest.TestCase):
+    NAMES = ["USB Cable", "HDMI Cable", "Cable Organizer", "USB Hub", "Kettle", "Speaker"]
+    CATEGORIES = [["Electronics", "Accessories", "Cables"], ["Electronics", "Audio"], ["Home", "Kitchen"], ["Home"]]
+    # the same values on purpose, and some on price/rating facet edges
+    PRICES = [5.0, 10.0, 30.0, 30.0, 200.0, 999.0]
+    RATINGS = [1.0, 3.0, 4.0, 4.0, 4.5]
+
+    def setUp(self) -> None:
+        path = use_temp_catalog(self, TEST_PRODUCTS)
+        patcher = patch("app.services.item_neighbors.NEIGHBORS_PATH", new=path.parent / "neighbors.npz")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _payload(self, rng: random.Random) -> dict:
+        return product_payload(
+            f"{rng.choice(self.NAMES)} {rng.randrange(3)}",
+            category=list(rng.choice(self.CATEGORIES)),
+            discounted_price=rng.choice(self.PRICES),
+            rating=rng.choice(self.RATINGS),
+            rating_count=rng.randrange(4),
+        )
+
+    def _write(self, rng: random.Random) -> None:
+        live = _ids(products_repo.load_all())
+        roll = rng.random()
+        if roll < 0.35 or not live:
+            product_service.create_product(ProductCreate(**self._payload(rng)))
+        elif roll < 0.65:
+            product_service.update_product(rng.choice(live), ProductUpdate(**self._payload(rng)))
+        elif roll < 0.85:
+            product_service.delete_product(rng.choice(live))
+        else:
+            product_service.bulk_apply([
+                BulkOperation(op="create", product=self._payload(rng)),
+                BulkOperation(op="update", product_id=rng.choice(live), product=self._payload(rng)),
+                BulkOperation(op="delete", product_id=rng.choice(live)),
+            ])
+
+    def _observe(self) -> dict:
+        items = products_repo.load_all()
+        return {
+            "search": _ids(keyword_search(["cable"])),
+            "strict": _ids(keyword_search(["usb", "cable"], True)),
+            "fuzzy": _ids(keyword_search(["cabel"], fuzzy=True)),
+            "ranked": _ids(ranked_search(["usb", "cable"], limit=5)),
+            "autocomplete": [_ids(autocomplete(prefix)) for prefix in ("c", "ca", "u", "ho")],
+            "filters": [_ids(get_filtered_products(f)) for f in ("Home", "Cables*Audio&min=10&max=30", "all&min=30")],
+            "sorts": {s: _ids(product_service.list_products(sort_by=s)) for s in product_service.AVAILABLE_SORTS},
+            "tree": get_category_tree().model_dump(),
+            "facets": compute_facets(get_filtered_products("Electronics")).model_dump(),
+            "previews": [p.model_dump() for p in get_all_product_previews()],
+            "top_rated": _ids(recommendation_service._get_top_rated_products(5)),
+            "similar": _ids(recommendation_service._content_recommendations({items[0]["product_id"]}, None, 5) or []),
+        }
+
+    def _observe_fresh(self) -> dict:
+        saved = dict(catalog_index._current)
+        catalog_index.invalidate()
+        try:
+            return self._observe()
+        finally:
+            catalog_index._current.update(saved)
+
+    def test_incremental_writes_match_a_fresh_build(self):
+        rng = random.Random(4)
+        self._observe()
+        index = catalog_index.current()
+        for step in range(40):
+            self._write(rng)
+            self.assertEqual(self._observe(), self._observe_fresh(), step)
+        self.assertIs(catalog_index.current(), index)
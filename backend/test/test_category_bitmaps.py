@@ -0,0 +1,85 @@
+import unittest
+
+from app.repositories import products_repo
+from app.schemas.product import ProductCreate
+from app.services import catalog_index, product_service
+from app.services.catalog_index import CatalogIndex, from_bitmap, to_bitmap
+from app.services.filtering import CategoryBitmaps, filter_docs, filter_product_list
+from test.dummy_data.temp_catalog import use_temp_catalog
+
+CATALOG = [
+    {"product_id": "1", "category": ["Electronics", "Cables"], "discounted_price": 10.0},
+    {"product_id": "2", "category": ["Electronics", "Audio"], "discounted_price": 50.0},
+    {"product_id": "3", "category": ["Home"], "discounted_price": 30.0},
+    {"product_id": "4", "category": ["Cables"], "discounted_price": 70.0},
+]
+
+
+def _scan(products, cat_string):
+    categories = cat_string.split("*")
+    return [p for p in products if any(c in p["category"] for c in categories)]
+
+
+class TestBitmapHelpers:
+
+    def test_round_trip(self):
+        for docs in ([], [0], [3, 8, 9, 64, 1000], list(range(0, 300, 7))):
+            assert from_bitmap(to_bitmap(docs)) == docs
+
+    def test_any_of_follows_writes(self):
+        bitmaps = CategoryBitmaps()
+        bitmaps.build(list(enumerate(CATALOG)))
+        assert from_bitmap(bitmaps.any_of(["Cables", "Home"])) == [0, 2, 3]
+
+        bitmaps.remove(3, CATALOG[3])
+        bitmaps.add(7, {"category": ["Cables"]})
+        assert from_bitmap(bitmaps.any_of(["Cables"])) == [0, 7]
+        assert bitmaps.any_of(["Missing"]) == 0
+
+    def test_filter_docs_intersects_with_matches(self):
+        index = CatalogIndex(CATALOG)
+        assert filter_docs(index, {0, 1, 2}, "Cables*Home") == [0, 2]
+        assert filter_docs(index, {0, 1, 2, 3}, "Cables", min_price=20) == [3]
+        assert filter_docs(index, {3, 1}, "") == [1, 3]
+
+
+# filter_product_list answers from the bitmaps when handed the catalog list
+class TestCatalogFiltering(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, CATALOG)
+
+    def test_matches_linear_scan(self):
+        catalog = products_repo.load_all()
+        for cat_string in ("Electronics", "Cables*Home", "Audio*Missing", "Missing"):
+            self.assertEqual(filter_product_list(catalog, cat_string), _scan(catalog, cat_string))
+        self.assertEqual(filter_product_list(catalog, "Electronics*Cables", min_price=20, max_price=60),
+                         [catalog[1]])
+        self.assertIsNotNone(catalog_index.get_index(catalog)._extensions.get("categories"))
+
+    def test_other_lists_do_not_replace_the_catalog_index(self):
+        catalog = products_repo.load_all()
+        index = catalog_index.get_index(catalog)
+
+        self.assertEqual(filter_product_list(list(catalog), "Home"), [catalog[2]])
+        self.assertIs(catalog_index.get_index(catalog), index)
+
+    def test_new_products_are_filtered(self):
+        catalog = products_repo.load_all()
+        filter_product_list(catalog, "Home")
+        created = product_service.create_product(ProductCreate(
+            product_name="Lamp", category=["Home"], discounted_price=5.0, actual_price=9.0,
+            discount_percentage="40%", rating=4.0, rating_count=1, about_product="lamp",
+            review_content="", img_link="https://example.com/i.jpg", product_link="https://example.com/p",
+        ))
+
+        result = filter_product_list(products_repo.load_all(), "Home")
+        self.assertEqual([p["product_id"] for p in result], ["3", created.product_id])
+
+    def test_string_categories_fall_back_to_scanning(self):
+        catalog = products_repo.load_all()
+        index = catalog_index.get_index(catalog)
+        odd = {"product_id": "5", "category": "Home Decor", "discounted_price": 1.0}
+        self.assertEqual(filter_docs(CatalogIndex(catalog + [odd]), {2, 4}, "Decor"), [4])
+        self.assertEqual(filter_product_list(catalog, "Home"), [catalog[2]])
+        self.assertIs(catalog_index.get_index(catalog), index)
+
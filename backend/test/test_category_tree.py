@@ -0,0 +1,108 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import product_service
+from app.services.catalog_index import from_bitmap
+from app.services.category_service import CategoryTree
+from test.dummy_data.temp_catalog import use_temp_catalog
+
+client = TestClient(app)
+
+CATALOG = [
+    {"product_id": "1", "product_name": "HDMI Cable", "category": ["Electronics", "Accessories", "Cables"],
+     "discounted_price": 10.0, "rating": 4.0},
+    {"product_id": "2", "product_name": "Speaker", "category": ["Electronics", "Audio"],
+     "discounted_price": 50.0, "rating": 4.5},
+    {"product_id": "3", "product_name": "USB Cable", "category": ["Electronics", "Accessories", "Cables"],
+     "discounted_price": 8.0, "rating": 3.5},
+    {"product_id": "4", "product_name": "Kettle", "category": ["Home&Kitchen", "Kitchen"],
+     "discounted_price": 30.0, "rating": 4.1},
+]
+
+
+def _counts(node, path=()):
+    out = {path: (node.count, from_bitmap(node.bits))}
+    for name, child in node.children.items():
+        out.update(_counts(child, path + (name,)))
+    return out
+
+
+class TestCategoryTree:
+
+    def test_products_without_a_path_count_at_the_root_only(self):
+        tree = CategoryTree()
+        tree.add(0, {"category": []})
+        tree.add(1, {"category": None})
+        tree.add(2, {"category": "Electronics"})
+        tree.add(3, {"category": ["Electronics"]})
+
+        assert _counts(tree.root) == {(): (4, [0, 1, 2, 3]), ("Electronics",): (1, [3])}
+
+        tree.remove(0, {"category": []})
+        assert _counts(tree.root) == {(): (3, [1, 2, 3]), ("Electronics",): (1, [3])}
+
+    def test_removing_the_last_doc_prunes_only_its_branch(self):
+        tree = CategoryTree()
+        tree.build([(0, {"category": ["a", "b", "c"]}), (1, {"category": ["a", "d"]}), (2, {"category": ["a", "b"]})])
+
+        tree.remove(0, {"category": ["a", "b", "c"]})
+        assert _counts(tree.root) == {(): (2, [1, 2]), ("a",): (2, [1, 2]), ("a", "b"): (1, [2]), ("a", "d"): (1, [1])}
+
+        tree.remove(2, {"category": ["a", "b"]})
+        assert _counts(tree.root) == {(): (1, [1]), ("a",): (1, [1]), ("a", "d"): (1, [1])}
+        assert tree.find(["a", "b"]) is None
+
+    def test_writes_match_a_bulk_build(self):
+        live = {0: {"category": ["a", "b"]}, 2: {"category": ["a"]}, 5: {"category": ["e", "f"]}}
+        incremental = CategoryTree()
+        for doc, rec in [(0, live[0]), (1, {"category": ["a", "b"]}), (2, live[2]), (5, live[5])]:
+            incremental.add(doc, rec)
+        incremental.remove(1, {"category": ["a", "b"]})
+
+        bulk = CategoryTree()
+        bulk.build(sorted(live.items()))
+        assert _counts(incremental.root) == _counts(bulk.root)
+
+
+# endpoints read the tree built over the catalog file
+class TestCategoryEndpoints(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, CATALOG)
+
+    def test_tree_with_counts(self):
+        response = client.get("/api/v1/previews/categories/tree")
+
+        self.assertEqual(response.status_code, 200)
+        tree = response.json()
+        self.assertEqual((tree["name"], tree["count"]), ("all", 4))
+        electronics = tree["children"][0]
+        self.assertEqual((electronics["name"], electronics["count"]), ("Electronics", 3))
+        self.assertEqual([(c["name"], c["count"]) for c in electronics["children"]], [("Accessories", 2), ("Audio", 1)])
+
+    def test_subtree_and_depth(self):
+        response = client.get("/api/v1/previews/categories/tree", params={"path": "Electronics|Accessories", "depth": 0})
+
+        self.assertEqual(
+            response.json(), {"name": "Accessories", "path": ["Electronics", "Accessories"], "count": 2, "children": []}
+        )
+
+    def test_products_under_a_node(self):
+        response = client.get("/api/v1/previews/categories/Electronics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["product_id"] for p in response.json()], ["1", "2", "3"])
+
+    def test_unknown_path_is_404(self):
+        self.assertEqual(client.get("/api/v1/previews/categories/Electronics|Nope").status_code, 404)
+        self.assertEqual(client.get("/api/v1/previews/categories/tree", params={"path": "Nope"}).status_code, 404)
+
+    def test_counts_follow_deletes(self):
+        client.get("/api/v1/previews/categories/tree")
+        product_service.delete_product("2")
+
+        response = client.get("/api/v1/previews/categories/tree", params={"path": "Electronics", "depth": 1})
+
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual([c["name"] for c in response.json()["children"]], ["Accessories"])
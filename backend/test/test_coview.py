@@ -0,0 +1,180 @@
+import json
+import sys
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import users_repo
+from app.services import coview_service, item_neighbors, user_service, view_history_service
+from app.services.coview_service import CoviewModel, build_model, get_model, histories
+from app.services.recommendation_service import get_recommendations
+from test.dummy_data.temp_catalog import use_temp_catalog
+from test.test_recommendation_scoring import _catalog
+
+client = TestClient(app)
+
+
+class TestCoview(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = use_temp_catalog(self, _catalog(30)).parent
+        self.users_path = tmp / "users.json"
+        self.coview_path = tmp / "coview.json"
+        self.write_users(6)
+
+        for target, path in (
+            ("app.repositories.users_repo.DATA_PATH", self.users_path),
+            ("app.services.coview_service.COVIEW_PATH", self.coview_path),
+            ("app.services.item_neighbors.NEIGHBORS_PATH", tmp / "neighbors.npz"),
+        ):
+            patcher = patch(target, new=path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for module in (coview_service, item_neighbors):
+            module.invalidate()
+            self.addCleanup(module.invalidate)
+
+    def write_users(self, n: int) -> None:
+        users = [{"user_id": f"u{i}", "username": f"user{i}", "email": f"u{i}@example.com"} for i in range(n)]
+        self.users_path.write_text(json.dumps(users), encoding="utf-8")
+
+    def view(self, user_id: str, *product_ids: str) -> None:
+        for product_id in product_ids:
+            view_history_service.add_view(user_id, product_id)
+
+    def assert_matches_rebuild(self, model: CoviewModel) -> None:
+        rebuilt = build_model(users_repo.load_all())
+        self.assertEqual(model.counts, rebuilt.counts)
+        self.assertEqual(model.users, rebuilt.users)
+
+    @patch("app.services.view_history_service.MAX_VIEW_HISTORY", new=3)
+    def test_views_falling_out_of_the_history_are_counted_out(self):
+        get_model()
+        self.view("u0", "p1", "p2", "p3")
+        self.view("u1", "p1", "p2")
+        self.assertEqual(get_model().counts["p1"]["p2"], 2)
+
+        self.view("u0", "p4")
+        model = get_model()
+        self.assertEqual(model.counts["p1"]["p2"], 1)
+        self.assertNotIn("p1", model.counts.get("p3", {}))
+        self.assertEqual(model.users["p1"], 1)
+        self.assert_matches_rebuild(model)
+
+    @patch("app.services.view_history_service.MAX_VIEW_HISTORY", new=2)
+    def test_item_kept_by_the_other_history_stays_counted(self):
+        get_model()
+        user_service.add_recently_viewed("u0", "p1")
+        self.view("u0", "p1", "p2")
+
+        self.view("u0", "p3")
+        model = get_model()
+        self.assertEqual(model.counts["p1"], {"p2": 1, "p3": 1})
+        self.assertEqual(model.users["p1"], 1)
+        self.assert_matches_rebuild(model)
+
+    def test_viewing_an_item_again_changes_nothing(self):
+        self.view("u0", "p1", "p2")
+        counts = {item: dict(row) for item, row in get_model().counts.items()}
+
+        self.view("u0", "p1")
+        user_service.add_recently_viewed("u0", "p2")
+        self.assertEqual(get_model().counts, counts)
+
+    def test_neighbors_rank_by_cosine_and_are_bounded(self):
+        model = CoviewModel(k=2)
+        model.observe([], ["a", "b", "c"])
+        model.observe([], ["a", "b"])
+        model.observe([], ["a", "d"])
+        model.observe([], ["d"])
+
+        # b: 2 / sqrt(3 * 2), c: 1 / sqrt(3 * 1), d: 1 / sqrt(3 * 2)
+        self.assertEqual([other for other, _ in model.neighbors("a")], ["b", "c"])
+        model.observe(["a", "b", "c"], ["a", "b"])
+        self.assertEqual([other for other, _ in model.neighbors("a")], ["b", "d"])
+
+    def test_coview_strategy(self):
+        self.view("u0", "p1", "p2")
+        self.view("u1", "p1", "p2")
+        self.view("u2", "p1", "p3")
+        self.view("u3", "p1")
+
+        result = get_recommendations("u3", limit=4, strategy="coview")
+        ids = [p.product_id for p in result]
+        self.assertEqual(ids[:2], ["p2", "p3"])
+        self.assertEqual(len(ids), 4)
+        self.assertNotIn("p1", ids)
+
+        excluded = [p.product_id for p in get_recommendations("u3", limit=4, strategy="coview", exclude_product_id="p2")]
+        self.assertEqual(excluded[0], "p3")
+        self.assertNotIn("p2", excluded)
+
+    def test_blend_mixes_both_strategies(self):
+        self.view("u0", "p1", "p20")
+        self.view("u1", "p1")
+
+        content = [p.product_id for p in get_recommendations("u1", limit=3)]
+        blended = [p.product_id for p in get_recommendations("u1", limit=3, strategy="blend")]
+        self.assertIn("p20", blended)
+        self.assertIn(content[0], blended)
+
+    def test_strategy_endpoint(self):
+        self.view("u0", "p1", "p2")
+        self.view("u1", "p1")
+
+        response = client.get("/api/v1/users/u1/recommendations", params={"strategy": "coview", "limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["product_id"], "p2")
+
+        invalid = client.get("/api/v1/users/u1/recommendations", params={"strategy": "random"})
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_rebuild_command_snapshot(self):
+        self.view("u0", "p1", "p2")
+        with patch.object(sys, "argv", ["coview_service", "rebuild"]):
+            coview_service.main()
+        saved = json.loads(self.coview_path.read_text(encoding="utf-8"))
+        self.assertEqual(saved["histories"], histories(users_repo.load_all()))
+
+        coview_service.invalidate()
+        with patch("app.services.coview_service.build_model") as mock_build:
+            self.assertEqual(get_model().counts, {"p1": {"p2": 1}, "p2": {"p1": 1}})
+        mock_build.assert_not_called()
+
+    def test_snapshot_replays_only_changed_users(self):
+        self.view("u0", "p1", "p2")
+        self.view("u1", "p2", "p3")
+        with patch.object(sys, "argv", ["coview_service", "rebuild"]):
+            coview_service.main()
+
+        # histories move on after the snapshot, including a new and a removed user
+        self.view("u1", "p4")
+        self.view("u2", "p1", "p4")
+        users = [u for u in users_repo.load_all() if u["user_id"] != "u0"]
+        users.append({"user_id": "u9", "username": "user9", "email": "u9@example.com", "recently_viewed_ids": ["p5", "p1"]})
+        self.users_path.write_text(json.dumps(users), encoding="utf-8")
+
+        coview_service.invalidate()
+        with patch("app.services.coview_service.build_model") as mock_build, \
+                patch.object(CoviewModel, "observe", autospec=True, side_effect=CoviewModel.observe) as mock_observe:
+            model = get_model()
+        mock_build.assert_not_called()
+        # u0 counted out, u1 and u2 moved on, u9 counted in; the rest unchanged
+        self.assertEqual(
+            sorted((tuple(sorted(before)), tuple(sorted(after))) for _, before, after in
+                   (call.args for call in mock_observe.call_args_list) if set(before) != set(after)),
+            sorted([
+                (("p1", "p2"), ()),
+                (("p2", "p3"), ("p2", "p3", "p4")),
+                ((), ("p1", "p4")),
+                ((), ("p1", "p5")),
+            ]),
+        )
+        rebuilt = build_model(users_repo.load_all())
+        self.assertEqual(model.counts, rebuilt.counts)
+        self.assertEqual(model.users, rebuilt.users)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import products_repo
+from app.services import product_service
+from app.services.facet_service import _count_by_scan, compute_facets
+from app.services.search_service import keyword_search
+from test.dummy_data.temp_catalog import use_temp_catalog
+
+client = TestClient(app)
+
+CATALOG = [
+    {"product_id": "1", "product_name": "HDMI Cable", "category": ["Electronics", "Cables"],
+     "discounted_price": 150.0, "rating": 4.2},
+    {"product_id": "2", "product_name": "Speaker", "category": ["Electronics", "Audio"],
+     "discounted_price": 2500.0, "rating": 3.9},
+    {"product_id": "3", "product_name": "USB Cable", "category": ["Electronics", "Cables"],
+     "discounted_price": 199.0, "rating": 5.0},
+    {"product_id": "4", "product_name": "Kettle", "category": ["Home"],
+     "discounted_price": 12000.0, "rating": 2.0},
+]
+
+
+class TestFacets(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, CATALOG)
+
+    def test_counts_for_search_results(self):
+        facets = compute_facets(keyword_search(["cable"]))
+
+        self.assertEqual(facets.total, 2)
+        self.assertEqual([(c.value, c.count) for c in facets.categories], [("Cables", 2), ("Electronics", 2)])
+        self.assertEqual([(b.min, b.max, b.count) for b in facets.price if b.count], [(0, 200, 2)])
+        self.assertEqual([(b.min, b.count) for b in facets.rating if b.count], [(4, 2)])
+
+    def test_bitmaps_agree_with_a_scan(self):
+        catalog = products_repo.load_all()
+        for products in (catalog, catalog[1:3], [], [catalog[3]]):
+            self.assertEqual(compute_facets(products), _count_by_scan(products))
+        # copies are not catalog records, so they are counted by scanning
+        self.assertEqual(compute_facets([dict(p) for p in catalog]), _count_by_scan(catalog))
+
+    def test_counts_follow_writes(self):
+        compute_facets(products_repo.load_all())
+        product_service.delete_product("4")
+
+        facets = compute_facets(products_repo.load_all())
+        self.assertEqual(facets.price[-1].count, 0)
+        self.assertNotIn("Home", [c.value for c in facets.categories])
+
+    def test_facet_options_on_endpoints(self):
+        plain = client.get("/api/v1/previews/Electronics")
+        included = client.get("/api/v1/previews/Electronics", params={"facets": "include"})
+        only = client.get("/api/v1/previews/search/w=cable", params={"facets": "only"})
+
+        self.assertEqual(len(plain.json()), 3)
+        self.assertEqual(included.json()["items"], plain.json())
+        self.assertEqual(included.json()["facets"]["total"], 3)
+        self.assertEqual(only.json()["items"], [])
+        self.assertEqual(only.json()["facets"]["total"], 2)
+        self.assertEqual(client.get("/api/v1/previews/", params={"facets": "include"}).json()["facets"]["total"], 4)
+        self.assertEqual(client.get("/api/v1/previews/", params={"facets": "bogus"}).status_code, 422)
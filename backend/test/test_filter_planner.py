@@ -0,0 +1,56 @@
+from app.services.catalog_index import CatalogIndex
+from app.services.filtering import PriceIndex, filter_docs
+
+CATALOG = [
+    {"product_id": "1", "category": ["Electronics", "Cables"], "discounted_price": 10.0},
+    {"product_id": "2", "category": ["Electronics", "Audio"], "discounted_price": 50.0},
+    {"product_id": "3", "category": ["Home"], "discounted_price": 30.0},
+    {"product_id": "4", "category": ["Cables"], "discounted_price": 70.0},
+]
+
+
+def _brute(docs, cat_string, min_price, max_price):
+    if min_price and max_price and min_price > max_price:
+        min_price, max_price = max_price, min_price
+    categories = cat_string.split("*")
+    kept = []
+    for doc in sorted(docs):
+        product = CATALOG[doc]
+        if cat_string and not any(c in product["category"] for c in categories):
+            continue
+        if min_price and product["discounted_price"] < min_price:
+            continue
+        if max_price and product["discounted_price"] > max_price:
+            continue
+        kept.append(doc)
+    return kept
+
+
+class TestFilterPlanner:
+
+    def test_every_driver_gives_the_same_answer(self):
+        index = CatalogIndex(CATALOG)
+        for docs in (None, {0}, {0, 1, 2, 3}, set()):
+            for cat_string in ("", "Cables", "Electronics*Home", "Missing"):
+                for min_price, max_price in ((0, 0), (20, 0), (0, 30), (10, 50), (60, 20), (100, 0)):
+                    expected = _brute(range(4) if docs is None else docs, cat_string, min_price, max_price)
+                    result = filter_docs(index, docs, cat_string, min_price, max_price)
+                    assert result == expected, (docs, cat_string, min_price, max_price)
+
+    def test_price_slice_uses_bisect_bounds(self):
+        prices = PriceIndex()
+        prices.build(list(enumerate(CATALOG)))
+        lo, hi = prices.range(30, 70)
+        assert prices.pairs[lo:hi] == [(30.0, 2), (50.0, 1), (70.0, 3)]
+        assert prices.range(71, 0) == (4, 4)
+
+        prices.remove(1, CATALOG[1])
+        prices.add(9, {"discounted_price": 40})
+        lo, hi = prices.range(30, 70)
+        assert prices.pairs[lo:hi] == [(30.0, 2), (40, 9), (70.0, 3)]
+
+    def test_records_without_numeric_price_disable_the_slice(self):
+        odd = CATALOG + [{"product_id": "5", "category": ["Home"], "discounted_price": None}]
+        index = CatalogIndex(odd)
+        assert filter_docs(index, None, "Cables", min_price=20) == [3]
+        assert index.extension("prices", PriceIndex).irregular == 1
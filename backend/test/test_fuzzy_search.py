@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.search_service import SearchIndex, TrigramIndex, _within_distance, keyword_search
+
+client = TestClient(app)
+
+CATALOG = [
+    {"product_id": "a", "product_name": "Wireless Headphones", "category": ["Electronics", "Headphones"]},
+    {"product_id": "b", "product_name": "Fast Charger", "category": ["Electronics", "Chargers"]},
+    {"product_id": "c", "product_name": "Charging Cable", "category": ["Electronics", "Cables"]},
+]
+
+
+def _levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class TestFuzzySearch:
+
+    @patch("app.services.search_service.load_all", return_value=CATALOG)
+    def test_misspelled_keywords_match(self, _):
+        assert [p["product_id"] for p in keyword_search(["hedphones"], fuzzy=True)] == ["a"]
+        assert [p["product_id"] for p in keyword_search(["chargr"], fuzzy=True)] == ["b"]
+        assert keyword_search(["hedphones"]) == []
+
+    @patch("app.services.search_service.load_all", return_value=CATALOG)
+    def test_known_keywords_are_not_expanded(self, _):
+        # "cable" is in the vocabulary, so "cables" (one edit away) is not pulled in
+        assert keyword_search(["charging"], fuzzy=True) == keyword_search(["charging"])
+        assert [p["product_id"] for p in keyword_search(["charging", "cabls"], True, fuzzy=True)] == ["c"]
+
+    def test_edits_at_either_end_and_in_the_middle(self):
+        index = TrigramIndex()
+        for term in ("charger", "charges", "charging", "changer", "larger"):
+            index.add(term)
+
+        assert index.candidates("xcharger", 1) == {"charger"}
+        assert index.candidates("charge", 1) == {"charger", "charges"}
+        assert index.candidates("chargre", 1) == set()
+        # a transposition is two edits
+        assert index.candidates("chargre", 2) == {"charger", "charges"}
+        assert index.candidates("charger", 0) == set()
+
+    def test_short_terms_within_distance(self):
+        index = TrigramIndex()
+        for term in ("tv", "usb", "us"):
+            index.add(term)
+
+        assert index.candidates("usv", 1) == {"usb", "us"}
+        assert index.candidates("tb", 1) == {"tv"}
+
+    def test_repeated_trigrams_do_not_raise_the_bound(self):
+        # "aaaaaaab" has 10 trigram positions but only 6 distinct trigrams
+        index = TrigramIndex()
+        index.add("aaaaaaaa")
+        assert index.candidates("aaaaaaab", 2) == {"aaaaaaaa"}
+
+    def test_within_distance(self):
+        for a, b in [("kitten", "sitting"), ("", "abc"), ("flaw", "lawn"), ("same", "same")]:
+            for d in range(4):
+                assert _within_distance(a, b, d) == (_levenshtein(a, b) <= d)
+
+    def test_vocabulary_follows_removals(self):
+        index = SearchIndex()
+        index.add(0, CATALOG[0])
+        index.add(1, {"product_id": "x", "product_name": "Headphones stand", "category": []})
+        index.remove(1, {"product_id": "x", "product_name": "Headphones stand", "category": []})
+
+        assert index.vocabulary.candidates("stnad", 1) == set()
+        assert index.vocabulary.candidates("hedphones", 2) == {"headphones"}
+
+    @patch("app.routers.previews_router.parse_to_previews", return_value=[])
+    @patch("app.routers.previews_router.keyword_search")
+    def test_fuzzy_search_endpoint(self, mock_keyword_search, _):
+        mock_keyword_search.return_value = []
+
+        response = client.get("/api/v1/previews/search/f=hedphones")
+
+        assert response.status_code == 200
+        mock_keyword_search.assert_called_once_with(["hedphones"], fuzzy=True)
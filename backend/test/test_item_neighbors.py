@@ -0,0 +1,170 @@
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from app.repositories import products_repo
+from app.schemas.product import ProductUpdate
+from app.services import catalog_index, item_neighbors, product_service, recommendation_service
+from app.services.item_neighbors import build_table, load_table, save_table, table_for
+from app.services.recommendation_cache import RecommendationCache
+from app.services.similarity import ScoringColumns
+from test.dummy_data.temp_catalog import use_temp_catalog
+from test.test_recommendation_scoring import _catalog
+
+np = pytest.importorskip("numpy")
+
+
+class TestItemNeighbors(unittest.TestCase):
+    def setUp(self) -> None:
+        self.products_path = use_temp_catalog(self, _catalog(120))
+        self.neighbors_path = self.products_path.parent / "neighbors.npz"
+        patcher = patch("app.services.item_neighbors.NEIGHBORS_PATH", new=self.neighbors_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # every call recomputes, whatever history the test patches in
+        patcher = patch("app.services.recommendation_service.cache", new=RecommendationCache(max_size=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        item_neighbors.invalidate()
+        self.addCleanup(item_neighbors.invalidate)
+
+    def index(self):
+        return catalog_index.get_index(products_repo.load_all())
+
+    def recommend(self, viewed: list, **kwargs) -> list:
+        history = [{"product_id": pid} for pid in viewed]
+        with patch("app.services.recommendation_service.get_view_history", return_value=history):
+            return [p.product_id for p in recommendation_service.get_recommendations("u1", **kwargs)]
+
+    def wait_for_rebuild(self) -> None:
+        thread = item_neighbors._state["thread"]
+        if thread is not None:
+            thread.join(timeout=30)
+
+    def test_neighbors_are_the_single_view_recommendations(self):
+        index = self.index()
+        table = build_table(index, k=10)
+        columns = index.extension("scoring", ScoringColumns)
+
+        with patch("app.services.recommendation_service._model", side_effect=lambda index, doc: doc):
+            for product_id in ("p0", "p7", "p42", "p119"):
+                expected = recommendation_service._score_columns(index, columns, {product_id}, None, 10)
+                rows = [row for row, _ in table.neighbors_of(table.rows[product_id])]
+                self.assertEqual([table.product_ids[row] for row in rows],
+                                 [index.records[doc]["product_id"] for doc in expected])
+
+    def test_save_and_load_round_trip(self):
+        table = build_table(self.index(), k=5)
+        save_table(table)
+        loaded = load_table()
+
+        self.assertEqual(loaded.product_ids, table.product_ids)
+        self.assertEqual(loaded.fingerprint, table.fingerprint)
+        np.testing.assert_array_equal(loaded.neighbors, table.neighbors)
+        np.testing.assert_array_equal(loaded.scores, table.scores)
+
+    def test_recommendations_merge_neighbor_lists(self):
+        save_table(build_table(self.index()))
+        table = table_for(self.index())
+        self.assertIsNotNone(table)
+
+        with patch("app.services.recommendation_service._score_columns") as mock_columns:
+            result = self.recommend(["p1", "p2"], limit=5, exclude_product_id="p3")
+        mock_columns.assert_not_called()
+
+        totals = {}
+        for product_id in ("p1", "p2"):
+            for row, score in table.neighbors_of(table.rows[product_id]):
+                totals[row] = totals.get(row, 0.0) + score
+        ranked = sorted((r for r in totals if table.product_ids[r] not in {"p1", "p2", "p3"}),
+                        key=lambda r: (-totals[r], r))
+        self.assertEqual(result, [table.product_ids[r] for r in ranked[:5]])
+
+    def test_missing_table_scores_the_catalog_without_building(self):
+        self.assertIsNone(table_for(self.index()))
+        self.assertIsNone(item_neighbors._state["thread"])
+        self.assertFalse(self.neighbors_path.exists())
+
+    def _reprice(self, product_id: str, price: float) -> None:
+        product = product_service.get_product_by_id(product_id).model_dump(exclude={"product_id"})
+        product_service.update_product(product_id, ProductUpdate(**{**product, "discounted_price": price}))
+
+    def test_stale_table_is_served_and_rebuilt_in_the_background(self):
+        save_table(build_table(self.index()))
+        old = table_for(self.index())
+
+        self._reprice("p5", 1234.0)
+        product_service.delete_product("p6")
+        with patch("app.services.recommendation_service._score_columns") as mock_columns:
+            result = self.recommend(["p1", "p5", "p7"])
+        mock_columns.assert_not_called()
+        self.assertNotIn("p6", result)
+        self.assertEqual(len(result), 8)
+
+        self.wait_for_rebuild()
+        table = table_for(self.index())
+        self.assertIsNot(table, old)
+        self.assertEqual(table.fingerprint, build_table(self.index()).fingerprint)
+        self.assertEqual(load_table().fingerprint, table.fingerprint)
+
+    def test_rebuilds_are_rate_limited(self):
+        save_table(build_table(self.index()))
+        table_for(self.index())
+
+        with patch("app.services.item_neighbors.build_table", return_value=None) as mock_build:
+            for price in (1.0, 2.0, 3.0):
+                self._reprice("p5", price)
+                table_for(self.index())
+                self.wait_for_rebuild()
+        mock_build.assert_called_once()
+
+    def test_requests_compare_keys_not_fingerprints(self):
+        save_table(build_table(self.index()))
+        self._reprice("p5", 1234.0)
+
+        threads = []
+        real = item_neighbors.fingerprint
+        with patch("app.services.item_neighbors.fingerprint",
+                   side_effect=lambda pairs: threads.append(threading.current_thread()) or real(pairs)):
+            self.assertIsNotNone(table_for(self.index()))
+            self.wait_for_rebuild()
+        self.assertTrue(threads)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_table_from_another_process_is_rekeyed_without_a_rebuild(self):
+        table = build_table(self.index())
+        table.catalog = ("other-process", 1, 0)
+        save_table(table)
+
+        with patch("app.services.item_neighbors.build_table") as mock_build:
+            loaded = table_for(self.index())
+            self.wait_for_rebuild()
+        mock_build.assert_not_called()
+        self.assertEqual(loaded.catalog, item_neighbors.catalog_key(self.index()))
+        self.assertIsNone(item_neighbors._state["thread"])
+
+    def test_rebuilt_table_is_part_of_the_cache_key(self):
+        save_table(build_table(self.index(), k=2))
+        with patch("app.services.recommendation_service.cache", new=RecommendationCache()):
+            before = self.recommend(["p1"], limit=5)
+            save_table(build_table(self.index()))
+            item_neighbors._state.update(table=load_table())
+            after = self.recommend(["p1"], limit=5)
+        self.assertEqual(len(before), 5)
+        self.assertEqual(after[:2], before[:2])
+        self.assertEqual(after, self.recommend(["p1"], limit=5))
+        self.assertNotEqual(after, before)
+
+    def test_build_command(self):
+        with patch.object(sys, "argv", ["item_neighbors", "build", "--k", "3"]):
+            item_neighbors.main()
+        table = load_table()
+        self.assertEqual(table.neighbors.shape, (120, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.product import ProductCreate
+from app.services import product_service
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog, product_payload
+
+client = TestClient(app)
+
+
+def _catalog():
+    products = []
+    for i in range(12):
+        rec = dict(TEST_PRODUCTS[i % len(TEST_PRODUCTS)])
+        rec["product_id"] = f"p{i:02d}"
+        rec["product_name"] = f"Cable {i % 4}"
+        rec["category"] = ["Cables"] if i % 3 else ["Home"]
+        # repeated prices and ratings so ties need the product_id tie-break
+        rec["discounted_price"] = float(10 * (i % 5))
+        rec["rating"] = 3.0 + (i % 3) / 2
+        products.append(rec)
+    return products
+
+
+class TestCursorPagination(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, _catalog())
+
+    def _walk(self, url, params=None, between_pages=None):
+        ids, cursor = [], None
+        while True:
+            query = dict(params or {}, limit=5)
+            if cursor:
+                query["cursor"] = cursor
+            response = client.get(url, params=query)
+            self.assertEqual(response.status_code, 200, response.text)
+            body = response.json()
+            self.assertLessEqual(len(body["items"]), 5)
+            ids.extend(item["product_id"] for item in body["items"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return ids
+            if between_pages:
+                between_pages()
+                between_pages = None
+
+    def test_pages_cover_every_sort_order(self):
+        for sort_by in ("name", "price_asc", "price_desc", "rating_desc"):
+            ids = self._walk("/api/v1/products/", {"sort_by": sort_by})
+            self.assertEqual(len(ids), 12)
+            self.assertEqual(len(set(ids)), 12)
+            full = [p["product_id"] for p in client.get("/api/v1/products/", params={"sort_by": sort_by}).json()]
+            self.assertEqual(sorted(ids), sorted(full))
+            # same order as the unpaged listing apart from how ties are broken
+            key = {"name": "product_name", "price_asc": "discounted_price", "price_desc": "discounted_price",
+                   "rating_desc": "rating"}[sort_by]
+            by_id = {p["product_id"]: p for p in client.get("/api/v1/products/").json()}
+            self.assertEqual([by_id[i][key] for i in ids], [by_id[i][key] for i in full])
+
+    def test_previews_and_search_pages(self):
+        catalog_order = [p["product_id"] for p in _catalog()]
+        self.assertEqual(self._walk("/api/v1/previews/"), catalog_order)
+        self.assertEqual(self._walk("/api/v1/previews/Cables"),
+                         [p["product_id"] for p in _catalog() if p["category"] == ["Cables"]])
+        self.assertEqual(self._walk("/api/v1/previews/search/w=cable"), catalog_order)
+
+    def test_inserts_between_pages_do_not_shift_pages(self):
+        def insert():
+            product_service.create_product(ProductCreate(**product_payload("Aaa first by name")))
+
+        ids = self._walk("/api/v1/products/", {"sort_by": "name"}, between_pages=insert)
+        # the new product sorts before the cursor, so it is not served, and
+        # nothing already listed repeats or goes missing
+        self.assertEqual(sorted(ids), sorted(p["product_id"] for p in _catalog()))
+
+        ids = self._walk("/api/v1/previews/", between_pages=insert)
+        self.assertEqual(ids[:12], [p["product_id"] for p in _catalog()])
+        self.assertEqual(len(ids), 14)
+
+    def test_deleting_the_anchor_resumes_after_its_old_position(self):
+        first = client.get("/api/v1/previews/", params={"limit": 5}).json()
+        product_service.delete_product(first["items"][-1]["product_id"])
+
+        second = client.get("/api/v1/previews/", params={"limit": 5, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([p["product_id"] for p in second["items"]], ["p05", "p06", "p07", "p08", "p09"])
+
+    def test_bad_cursors_are_rejected(self):
+        page = client.get("/api/v1/products/", params={"limit": 5, "sort_by": "name"}).json()
+
+        wrong_order = client.get(
+            "/api/v1/products/", params={"limit": 5, "sort_by": "price_asc", "cursor": page["next_cursor"]}
+        )
+        garbage = client.get("/api/v1/previews/", params={"cursor": "not-a-cursor"})
+
+        self.assertEqual(wrong_order.status_code, 400)
+        self.assertEqual(garbage.status_code, 400)
+
+    def test_cursor_and_offset_together_are_rejected(self):
+        page = client.get("/api/v1/products/", params={"limit": 5}).json()
+
+        both = client.get("/api/v1/products/", params={"limit": 5, "cursor": page["next_cursor"], "offset": 10})
+
+        self.assertEqual(both.status_code, 422)
+        self.assertIn("offset", both.json()["message"])
+
+    def test_unpaged_requests_keep_returning_lists(self):
+        self.assertIsInstance(client.get("/api/v1/products/").json(), list)
+        self.assertIsInstance(client.get("/api/v1/previews/").json(), list)
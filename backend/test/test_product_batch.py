@@ -0,0 +1,41 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.main import app
+from app.services.product_service import MAX_BATCH_IDS, get_products_by_ids
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+
+client = TestClient(app)
+
+
+class TestProductBatch:
+
+    @patch("app.services.product_service.load_all", return_value=TEST_PRODUCTS)
+    def test_results_follow_request_order(self, mock_load_all):
+        result = get_products_by_ids(["2", "missing", "1", "2", "missing"])
+
+        assert [p.product_id for p in result.items] == ["2", "1", "2"]
+        assert result.missing == ["missing"]
+        mock_load_all.assert_called_once()
+
+    @patch("app.services.product_service.load_all", return_value=TEST_PRODUCTS)
+    def test_too_many_ids(self, _):
+        with pytest.raises(HTTPException) as exc_info:
+            get_products_by_ids(["1"] * (MAX_BATCH_IDS + 1))
+        assert exc_info.value.status_code == 400
+
+    @patch("app.services.product_service.load_all", return_value=TEST_PRODUCTS)
+    def test_batch_endpoints(self, _):
+        posted = client.post("/api/v1/products/batch", json={"ids": ["1", "nope"]})
+        fetched = client.get("/api/v1/products/batch", params={"ids": "1,nope"})
+
+        assert posted.status_code == 200
+        assert posted.json() == fetched.json()
+        assert [p["product_id"] for p in posted.json()["items"]] == ["1"]
+        assert posted.json()["missing"] == ["nope"]
+
+    @patch("app.services.product_service.load_all", return_value=TEST_PRODUCTS)
+    def test_single_product_route_still_works(self, _):
+        assert client.get("/api/v1/products/1").json()["product_id"] == "1"
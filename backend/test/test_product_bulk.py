@@ -0,0 +1,147 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import products_repo
+from app.schemas.product import BulkOperation
+from app.services import catalog_index, product_service
+from app.services.catalog_index import CatalogIndex
+from app.services.product_service import SortOrders
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog, product_payload
+
+client = TestClient(app)
+
+
+def _ops(*ops: dict) -> list:
+    return [BulkOperation(**op) for op in ops]
+
+
+class TestProductBulk(unittest.TestCase):
+    def setUp(self) -> None:
+        self.products_path = use_temp_catalog(self, TEST_PRODUCTS)
+
+    def _saved_ids(self) -> list:
+        return [p["product_id"] for p in json.loads(self.products_path.read_text(encoding="utf-8"))]
+
+    def test_mixed_operations_are_saved_once(self):
+        with patch("app.services.product_service.save_changes", wraps=products_repo.save_changes) as mock_save:
+            result = product_service.bulk_apply(_ops(
+                {"op": "create", "product": product_payload("First")},
+                {"op": "create", "product": product_payload("Second")},
+                {"op": "update", "product_id": "2", "product": product_payload("Renamed")},
+                {"op": "delete", "product_id": "1"},
+            ))
+
+        mock_save.assert_called_once()
+        self.assertTrue(result.applied)
+        self.assertEqual([r.status_code for r in result.results], [201, 201, 200, 204])
+        first, second = result.results[0].product_id, result.results[1].product_id
+        self.assertEqual(self._saved_ids(), ["2", "3", "4", first, second])
+        self.assertEqual(product_service.get_product_by_id("2").product_name, "Renamed")
+
+    def test_failed_items_do_not_stop_the_rest(self):
+        result = product_service.bulk_apply(_ops(
+            {"op": "delete", "product_id": "missing"},
+            {"op": "update", "product_id": "1"},
+            {"op": "delete", "product_id": "1"},
+            {"op": "delete", "product_id": "1"},
+        ))
+
+        self.assertTrue(result.applied)
+        self.assertEqual([r.status_code for r in result.results], [404, 400, 204, 404])
+        self.assertEqual(self._saved_ids(), ["2", "3", "4"])
+
+    def test_all_or_nothing_saves_nothing_on_failure(self):
+        with patch("app.services.product_service.save_changes") as mock_save:
+            result = product_service.bulk_apply(_ops(
+                {"op": "delete", "product_id": "1"},
+                {"op": "update", "product_id": "missing", "product": product_payload("X")},
+            ), all_or_nothing=True)
+
+        mock_save.assert_not_called()
+        self.assertFalse(result.applied)
+        self.assertEqual([r.status_code for r in result.results], [204, 404])
+
+    def test_malformed_payload_fails_only_its_item(self):
+        result = product_service.bulk_apply(_ops(
+            {"op": "create", "product": product_payload("Kept")},
+            {"op": "update", "product_id": "1", "product": product_payload("Bad", discounted_price="cheap")},
+            {"op": "create", "product": {"product_name": "No price"}},
+        ))
+
+        self.assertTrue(result.applied)
+        self.assertEqual([r.status_code for r in result.results], [201, 422, 422])
+        self.assertIn("discounted_price", result.results[1].detail)
+        self.assertEqual(self._saved_ids(), ["1", "2", "3", "4", result.results[0].product_id])
+        self.assertNotEqual(product_service.get_product_by_id("1").product_name, "Bad")
+
+        with patch("app.services.product_service.save_changes") as mock_save:
+            result = product_service.bulk_apply(_ops(
+                {"op": "delete", "product_id": "1"},
+                {"op": "create", "product": {"product_name": "No price"}},
+            ), all_or_nothing=True)
+        mock_save.assert_not_called()
+        self.assertFalse(result.applied)
+        self.assertEqual([r.status_code for r in result.results], [204, 422])
+
+    def test_operations_on_products_created_in_the_same_request(self):
+        created = product_service.bulk_apply(_ops({"op": "create", "product": product_payload("Temp")}))
+        new_id = created.results[0].product_id
+
+        result = product_service.bulk_apply(_ops(
+            {"op": "create", "product": product_payload("Kept")},
+            {"op": "update", "product_id": new_id, "product": product_payload("Temp 2")},
+            {"op": "delete", "product_id": new_id},
+        ))
+        self.assertEqual([r.status_code for r in result.results], [201, 200, 204])
+        self.assertEqual(self._saved_ids(), ["1", "2", "3", "4", result.results[0].product_id])
+
+    def test_index_matches_a_fresh_build(self):
+        index = catalog_index.get_index(products_repo.load_all())
+        index.extension("sort_orders", SortOrders).order("price_asc")
+
+        product_service.bulk_apply(_ops(
+            *({"op": "create", "product": product_payload(f"Bulk {i}", discounted_price=float(i))} for i in range(50)),
+            {"op": "update", "product_id": "1", "product": product_payload("Renamed", discounted_price=99.0)},
+            {"op": "delete", "product_id": "2"},
+        ))
+
+        items = products_repo.load_all()
+        carried = catalog_index.get_index(items)
+        fresh = CatalogIndex(items)
+        self.assertIs(carried, index)
+        self.assertEqual(carried.by_product_id, fresh.by_product_id)
+        self.assertEqual(carried.positions, fresh.positions)
+        self.assertEqual(
+            [p.product_id for p in product_service.list_products(sort_by="price_asc")],
+            [p["product_id"] for p in sorted(items, key=lambda p: p["discounted_price"])],
+        )
+
+    def test_bulk_endpoint(self):
+        response = client.post("/api/v1/products/bulk", json={"operations": [
+            {"op": "create", "product": product_payload("Posted")},
+            {"op": "delete", "product_id": "nope"},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["applied"])
+        self.assertEqual([r["status_code"] for r in body["results"]], [201, 404])
+
+        partial = client.post("/api/v1/products/bulk", json={"operations": [
+            {"op": "create", "product": {"product_name": 5}},
+            {"op": "delete", "product_id": "1"},
+        ]})
+        self.assertEqual(partial.status_code, 200)
+        self.assertEqual([r["status_code"] for r in partial.json()["results"]], [422, 204])
+
+        invalid = client.post("/api/v1/products/bulk", json={"operations": [{"op": "rename"}]})
+        self.assertEqual(invalid.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
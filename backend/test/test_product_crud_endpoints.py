@@ -9,7 +9,7 @@ client = TestClient(app)
 class TestProductCRUD:
     
     @patch('app.services.product_service.load_all')
-    @patch('app.services.product_service.save_all')
+    @patch('app.services.product_service.upsert')
     @patch('uuid.uuid4')
     def test_create_product_success(self, mock_uuid, mock_save, mock_load):
         mock_load.return_value = []
@@ -45,7 +45,7 @@ class TestProductCRUD:
         mock_save.assert_called_once()
     
     @patch('app.services.product_service.load_all')
-    @patch('app.services.product_service.save_all')
+    @patch('app.services.product_service.upsert')
     @patch('uuid.uuid4')
     def test_create_product_trimmed_fields(self, mock_uuid, mock_save, mock_load):
         mock_load.return_value = []
@@ -92,7 +92,7 @@ class TestProductCRUD:
         assert response.status_code == 422
     
     @patch('app.services.product_service.load_all')
-    @patch('app.services.product_service.save_all')
+    @patch('app.services.product_service.upsert')
     def test_update_product_success(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -141,7 +141,9 @@ class TestProductCRUD:
         assert data["product_name"] == "New Name"
         assert data["discounted_price"] == 75.0
         assert data["rating"] == 4.5
-        mock_save.assert_called_once()
+        saved = mock_save.call_args[0][0]
+        assert saved["product_id"] == "existing-id"
+        assert saved["product_name"] == "New Name"
     
     @patch('app.services.product_service.load_all')
     def test_update_product_not_found(self, mock_load):
@@ -203,8 +205,8 @@ class TestProductCRUD:
         assert response.status_code == 422
     
     @patch('app.services.product_service.load_all')
-    @patch('app.services.product_service.save_all')
-    def test_delete_product_success(self, mock_save, mock_load):
+    @patch('app.services.product_service.delete')
+    def test_delete_product_success(self, mock_delete, mock_load):
         mock_load.return_value = [
             {
                 "product_id": "product-to-delete",
@@ -248,10 +250,7 @@ class TestProductCRUD:
         
         assert response.status_code == 204
         
-        saved_data = mock_save.call_args[0][0]
-        assert len(saved_data) == 1
-        assert saved_data[0]["product_id"] == "keep-me"
-        assert all(p["product_id"] != "product-to-delete" for p in saved_data)
+        mock_delete.assert_called_once_with("product-to-delete")
     
     @patch('app.services.product_service.load_all')
     def test_delete_product_not_found(self, mock_load):
@@ -263,8 +262,8 @@ class TestProductCRUD:
         assert "could not find" in response.json()["message"].lower()
     
     @patch('app.services.product_service.load_all')
-    @patch('app.services.product_service.save_all')
-    def test_delete_product_from_multiple_products(self, mock_save, mock_load):
+    @patch('app.services.product_service.delete')
+    def test_delete_product_from_multiple_products(self, mock_delete, mock_load):
         mock_load.return_value = [
             {
                 "product_id": "product-1",
@@ -326,15 +325,10 @@ class TestProductCRUD:
         
         assert response.status_code == 204
         
-        saved_data = mock_save.call_args[0][0]
-        assert len(saved_data) == 2
-        product_ids = [p["product_id"] for p in saved_data]
-        assert "product-1" in product_ids
-        assert "product-3" in product_ids
-        assert "product-2" not in product_ids
+        mock_delete.assert_called_once_with("product-2")
     
     @patch('app.services.product_service.load_all')
-    @patch('app.services.product_service.save_all')
+    @patch('app.services.product_service.upsert')
     @patch('uuid.uuid4')
     def test_create_product_with_empty_lists(self, mock_uuid, mock_save, mock_load):
         mock_load.return_value = []
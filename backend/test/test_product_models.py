@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from app.repositories import products_repo
+from app.schemas.product import Product, ProductUpdate
+from app.services import product_service
+from app.services.catalog_index import get_index
+from app.services.preview_service import parse_to_previews
+from app.services.product_service import _load_products_models, get_product_by_id, with_placeholders
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog, product_payload
+
+
+class TestIngestNormalization:
+
+    @patch("app.services.product_service.load_all")
+    def test_models_match_per_read_normalization(self, mock_load_all):
+        blank = dict(TEST_PRODUCTS[0], product_id="blank", product_name=" ", rating_count="1,234")
+        catalog = [dict(p) for p in TEST_PRODUCTS] + [blank]
+        mock_load_all.return_value = catalog
+
+        models = _load_products_models()
+
+        assert models == [Product(**with_placeholders(p)) for p in catalog]
+        assert models[-1].product_name == "N/A" and models[-1].rating_count == 1234
+        # later reads reuse the same instances
+        assert _load_products_models()[0] is models[0]
+        assert get_product_by_id("blank") is models[-1]
+
+    @patch("app.services.product_service.load_all")
+    def test_invalid_records_still_fail_on_read(self, mock_load_all):
+        mock_load_all.return_value = [dict(TEST_PRODUCTS[0], discounted_price="not a price")]
+
+        with pytest.raises(ValidationError):
+            _load_products_models()
+
+    def test_previews_are_cached_per_record(self):
+        catalog = [dict(p) for p in TEST_PRODUCTS]
+        get_index(catalog)
+
+        first = parse_to_previews(catalog)
+        again = parse_to_previews(catalog[1:2])
+
+        assert [p.product_id for p in first] == [p["product_id"] for p in catalog]
+        assert again[0] is first[1]
+        # records that are not part of the catalog are still converted
+        assert parse_to_previews([dict(catalog[0])])[0] == first[0]
+
+
+class TestIngestWrites(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, TEST_PRODUCTS)
+
+    def test_writes_refresh_cached_models(self):
+        self.assertEqual(get_product_by_id("2").product_name, "Pname 2")
+
+        product_service.update_product("2", ProductUpdate(**product_payload("Renamed")))
+        self.assertEqual(get_product_by_id("2").product_name, "Renamed")
+        self.assertEqual(parse_to_previews(products_repo.load_all())[1].product_name, "Renamed")
+
+        product_service.delete_product("2")
+        self.assertNotIn("2", [p.product_id for p in _load_products_models()])
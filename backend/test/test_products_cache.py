@@ -0,0 +1,73 @@
+import json
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import products_repo
+
+
+# tests for the in-memory catalog cache in products_repo
+class TestProductsCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.products_path = Path(self.tempdir.name) / "products.json"
+
+        self.data_path_patcher = patch(
+            "app.repositories.products_repo.DATA_PATH",
+            new=self.products_path,
+        )
+        self.data_path_patcher.start()
+        self.addCleanup(self.data_path_patcher.stop)
+
+        products_repo.invalidate_cache()
+        self.addCleanup(products_repo.invalidate_cache)
+
+    def _write_products(self, products) -> None:
+        self.products_path.write_text(json.dumps(products), encoding="utf-8")
+
+    def test_repeated_loads_hit_cache(self):
+        self._write_products([{"product_id": "p1"}])
+        before = products_repo.cache_stats()
+
+        first = products_repo.load_all()
+        second = products_repo.load_all()
+
+        after = products_repo.cache_stats()
+        self.assertIs(first, second)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_external_file_change_triggers_reload(self):
+        self._write_products([{"product_id": "p1"}])
+        products_repo.load_all()
+        before = products_repo.cache_stats()
+
+        # different size, and a fresh mtime for good measure
+        self._write_products([{"product_id": "p1"}, {"product_id": "p2"}])
+        st = self.products_path.stat()
+        os.utime(self.products_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        loaded = products_repo.load_all()
+        after = products_repo.cache_stats()
+        self.assertEqual([p["product_id"] for p in loaded], ["p1", "p2"])
+        self.assertEqual(after["reloads"] - before["reloads"], 1)
+
+    def test_save_all_writes_through_cache(self):
+        self._write_products([{"product_id": "p1"}])
+        first = products_repo.load_all()
+
+        products_repo.save_all([{"product_id": "p9"}])
+        before = products_repo.cache_stats()
+        loaded = products_repo.load_all()
+        after = products_repo.cache_stats()
+
+        self.assertEqual(loaded, [{"product_id": "p9"}])
+        self.assertIsNot(loaded, first)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_missing_file_returns_empty_list(self):
+        self.assertEqual(products_repo.load_all(), [])
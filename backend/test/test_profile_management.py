@@ -57,7 +57,7 @@ class TestProfileManagement:
         assert response.json()["is_admin"] is True
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_username_success(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -82,7 +82,7 @@ class TestProfileManagement:
         mock_save.assert_called_once()
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_email_success(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -106,7 +106,7 @@ class TestProfileManagement:
         mock_save.assert_called_once()
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_password_success(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -128,13 +128,12 @@ class TestProfileManagement:
         assert data["username"] == "testuser"
         assert data["email"] == "test@example.com"
         
-        saved_data = mock_save.call_args[0][0]
-        updated_user = saved_data[0]
+        updated_user = mock_save.call_args[0][0]
         assert updated_user["hashed_password"] != "newpassword123"
         assert updated_user["hashed_password"].startswith("$2b$")
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_multiple_fields_success(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -228,7 +227,7 @@ class TestProfileManagement:
         assert "email already exists" in response.json()["message"].lower()
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_username_allows_same_username(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -249,7 +248,7 @@ class TestProfileManagement:
         assert response.json()["username"] == "testuser"
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_username_trimmed(self, mock_save, mock_load):
         mock_load.return_value = [
             {
@@ -270,10 +269,10 @@ class TestProfileManagement:
         assert response.json()["username"] == "newusername"
         
         saved_data = mock_save.call_args[0][0]
-        assert saved_data[0]["username"] == "newusername"
+        assert saved_data["username"] == "newusername"
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_update_empty_payload_no_changes(self, mock_save, mock_load):
         mock_load.return_value = [
             {
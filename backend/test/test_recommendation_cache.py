@@ -0,0 +1,129 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from app.schemas.product import ProductUpdate
+from app.services import (
+    coview_service, item_neighbors, product_service, recommendation_service, user_service, view_history_service,
+)
+from app.services.recommendation_cache import RecommendationCache
+from app.services.recommendation_service import get_recommendations
+from test.dummy_data.temp_catalog import use_temp_catalog
+from test.test_recommendation_scoring import _catalog
+
+
+class TestRecommendationCacheUnit(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = RecommendationCache(max_size=2)
+        cache.put(("u1", 1), "c", ["a"])
+        cache.put(("u2", 1), "c", ["b"])
+        cache.get(("u1", 1), "c")
+        cache.put(("u3", 1), "c", ["c"])
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(("u2", 1), "c"))
+        self.assertEqual(cache.get(("u1", 1), "c"), ["a"])
+
+    def test_invalidation(self):
+        cache = RecommendationCache()
+        cache.put(("u1", 1), "c", ["a"])
+        cache.put(("u1", 2), "c", ["b"])
+        cache.put(("u2", 1), "c", ["c"])
+
+        cache.invalidate_user("u1")
+        self.assertEqual(len(cache), 1)
+        # a different catalog version drops everything
+        self.assertIsNone(cache.get(("u2", 1), "c2"))
+        self.assertEqual(len(cache), 0)
+
+    def test_results_are_copies(self):
+        cache = RecommendationCache()
+        cache.put(("u1",), "c", ["a"])
+        cache.get(("u1",), "c").append("b")
+        self.assertEqual(cache.get(("u1",), "c"), ["a"])
+
+
+class TestRecommendationCache(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = use_temp_catalog(self, _catalog(40)).parent
+        users = [{"user_id": f"u{i}", "username": f"user{i}", "email": f"u{i}@example.com"} for i in range(3)]
+        (tmp / "users.json").write_text(json.dumps(users), encoding="utf-8")
+
+        for target, path in (
+            ("app.repositories.users_repo.DATA_PATH", tmp / "users.json"),
+            ("app.services.coview_service.COVIEW_PATH", tmp / "coview.json"),
+            ("app.services.item_neighbors.NEIGHBORS_PATH", tmp / "neighbors.npz"),
+        ):
+            patcher = patch(target, new=path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for module in (coview_service, item_neighbors):
+            module.invalidate()
+            self.addCleanup(module.invalidate)
+
+        self.cache = RecommendationCache()
+        patcher = patch("app.services.recommendation_service.cache", new=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def recommend(self, user_id: str = "u0", **kwargs):
+        with patch("app.services.recommendation_service._recommend",
+                   wraps=recommendation_service._recommend) as mock_compute:
+            result = [p.product_id for p in get_recommendations(user_id, **kwargs)]
+        return result, mock_compute.call_count
+
+    def test_repeated_calls_hit_memory(self):
+        view_history_service.add_view("u0", "p1")
+
+        first, computed = self.recommend()
+        again, recomputed = self.recommend()
+        self.assertEqual((computed, recomputed), (1, 0))
+        self.assertEqual(first, again)
+
+        # every argument is part of the key
+        self.assertEqual(self.recommend(limit=3)[1], 1)
+        self.assertEqual(self.recommend(exclude_product_id=first[0])[1], 1)
+        self.assertEqual(self.recommend(strategy="coview")[1], 1)
+        self.assertEqual(self.recommend("u1")[1], 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_view_events_invalidate(self):
+        view_history_service.add_view("u0", "p1")
+        self.recommend()
+
+        view_history_service.add_view("u0", "p2")
+        result, computed = self.recommend()
+        self.assertEqual(computed, 1)
+        self.assertNotIn("p2", result)
+
+        user_service.add_recently_viewed("u0", "p3")
+        self.assertEqual(self.recommend()[1], 1)
+        self.assertEqual(self.recommend()[1], 0)
+
+    def test_other_users_views_invalidate_coview_results(self):
+        view_history_service.add_view("u0", "p1")
+        self.recommend(strategy="coview")
+
+        view_history_service.add_view("u1", "p1")
+        view_history_service.add_view("u1", "p9")
+        result, computed = self.recommend(strategy="coview")
+        self.assertEqual(computed, 1)
+        self.assertEqual(result[0], "p9")
+        # content results do not depend on other users
+        self.recommend()
+        view_history_service.add_view("u2", "p5")
+        self.assertEqual(self.recommend()[1], 0)
+
+    def test_catalog_writes_invalidate(self):
+        view_history_service.add_view("u0", "p1")
+        before, _ = self.recommend()
+
+        product = product_service.get_product_by_id(before[0]).model_dump(exclude={"product_id"})
+        product_service.update_product(before[0], ProductUpdate(**{**product, "discounted_price": 99999.0}))
+        _, computed = self.recommend()
+        self.assertEqual(computed, 1)
+        self.assertEqual(len(self.cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from app.repositories import products_repo
+from app.schemas.product import ProductCreate
+from app.services import catalog_index, item_neighbors, product_service, recommendation_service
+from app.services.recommendation_service import get_recommendations
+from app.services.recommendation_cache import RecommendationCache
+from app.services.similarity import ScoringColumns
+from test.dummy_data.temp_catalog import use_temp_catalog
+
+pytest.importorskip("numpy")
+
+
+CATEGORIES = ["Electronics", "Cables", "Audio", "Home", "Kitchen", "Toys"]
+# few distinct prices and ratings so plenty of products tie on score
+PRICES = [99, 120.5, 150.0, 180.0, 400.0, 0.0]
+RATINGS = [3.0, 3.9, 4.2, 4.5, 5]
+
+
+def _catalog(n: int) -> list:
+    return [
+        {
+            "product_id": f"p{i}",
+            "product_name": f"Product {i}",
+            "category": CATEGORIES[i % 6:i % 6 + i % 4],
+            "discounted_price": PRICES[i % 6],
+            "actual_price": 500.0,
+            "discount_percentage": "10%",
+            "rating": RATINGS[(i // 6) % 5],
+            "rating_count": (i * 37) % 5000,
+            "about_product": "about",
+            "user_id": [],
+            "user_name": [],
+            "review_id": [],
+            "review_title": [],
+            "review_content": "",
+            "img_link": "https://example.com/img.jpg",
+            "product_link": "https://example.com/p",
+        }
+        for i in range(n)
+    ]
+
+
+class TestRecommendationScoring(unittest.TestCase):
+    def setUp(self) -> None:
+        self.products_path = use_temp_catalog(self, _catalog(300))
+
+        # every call recomputes, whatever history the test patches in
+        patcher = patch("app.services.recommendation_service.cache", new=RecommendationCache(max_size=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # no precomputed neighbors: every call scores the catalog
+        patcher = patch("app.services.item_neighbors.NEIGHBORS_PATH", new=self.products_path.parent / "neighbors.npz")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        item_neighbors.invalidate()
+        self.addCleanup(item_neighbors.invalidate)
+
+    def write_catalog(self, products: list) -> None:
+        self.products_path.write_text(json.dumps(products), encoding="utf-8")
+
+    def recommend(self, viewed: list, vectorized: bool, **kwargs) -> list:
+        history = [{"product_id": pid} for pid in viewed]
+        with patch("app.services.recommendation_service.get_view_history", return_value=history):
+            if vectorized:
+                result = get_recommendations("u1", **kwargs)
+            else:
+                with patch("app.services.recommendation_service.np", None):
+                    result = get_recommendations("u1", **kwargs)
+        return [p.product_id for p in result]
+
+    def assert_parity(self, viewed: list, **kwargs) -> list:
+        vectorized = self.recommend(viewed, True, **kwargs)
+        self.assertEqual(vectorized, self.recommend(viewed, False, **kwargs))
+        return vectorized
+
+    def test_ties_at_the_limit_keep_catalog_order(self):
+        products = _catalog(8)
+        for rec in products[1:]:
+            rec.update(category=["Audio"], discounted_price=150.0, rating=4.2)
+        products[0].update(category=["Audio"], discounted_price=150.0, rating=4.2)
+        self.write_catalog(products)
+        products_repo.invalidate_cache()
+
+        self.assertEqual(self.assert_parity(["p0"], limit=3), ["p1", "p2", "p3"])
+        self.assertEqual(self.assert_parity(["p0"], limit=3, exclude_product_id="p2"), ["p1", "p3", "p4"])
+
+    def test_parity_on_chosen_histories(self):
+        # repeated views, a product without categories, a free product and
+        # an excluded product that is itself viewed
+        for viewed, kwargs in [
+            (["p1", "p1", "p1"], {"limit": 8}),
+            (["p0", "p6"], {"limit": 20}),
+            (["p5", "p11"], {"limit": 1}),
+            (["p3", "p9"], {"limit": 20, "exclude_product_id": "p3"}),
+        ]:
+            with self.subTest(viewed=viewed, **kwargs):
+                self.assertNotIn(kwargs.get("exclude_product_id"), self.assert_parity(viewed, **kwargs))
+
+    def test_scores_match_exactly(self):
+        with patch("app.services.recommendation_service._model", side_effect=lambda index, doc: doc):
+            index = catalog_index.get_index(products_repo.load_all())
+            columns = index.extension("scoring", ScoringColumns)
+            docs = recommendation_service._score_columns(index, columns, {"p3", "p7"}, None, 300)
+        loop = recommendation_service._score_products({"p3", "p7"}, None, 300)
+        self.assertEqual([index.records[doc]["product_id"] for doc in docs], [p.product_id for p in loop])
+
+    def test_unknown_views_and_small_catalogs_fall_back_to_top_rated(self):
+        self.assertEqual(self.recommend(["missing"], True), self.recommend(["missing"], False))
+        self.write_catalog(_catalog(3))
+        products_repo.invalidate_cache()
+        self.assertEqual(self.recommend(["p0"], True, limit=8), self.recommend(["p0"], False, limit=8))
+
+    def test_columns_follow_writes(self):
+        self.recommend(["p1"], True)
+        created = product_service.create_product(ProductCreate(**{
+            **_catalog(1)[0], "category": ["Electronics", "Cables", "Audio"], "discounted_price": 120.5,
+        }))
+
+        viewed = ["p1", "p2", "p5"]
+        self.assertEqual(self.recommend(viewed, True, limit=20), self.recommend(viewed, False, limit=20))
+        product_service.delete_product(created.product_id)
+        self.assertEqual(self.recommend(viewed, True, limit=20), self.recommend(viewed, False, limit=20))
+
+    def test_irregular_records_use_the_loop(self):
+        products = _catalog(20)
+        products[4]["discounted_price"] = "120"
+        self.write_catalog(products)
+        products_repo.invalidate_cache()
+
+        with patch("app.services.recommendation_service._score_columns") as mock_columns:
+            self.recommend(["p1"], True)
+        mock_columns.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,6 +26,14 @@ from test.dummy_data.dummy_products import SAMPLE_FULL_PRODUCTS
 class TestRepositoryLayer:
     """Test suite for JSON file repository operations"""
 
+    def setup_method(self):
+        # file contents are faked through pathlib patches below, which the
+        # stat-keyed catalog cache cannot see
+        products_repo.invalidate_cache()
+
+    def teardown_method(self):
+        products_repo.invalidate_cache()
+
     def test_load_all_existing_file_products(self):
         """Test loading data from existing products.json file"""
         # Sample product data that would be in products.json
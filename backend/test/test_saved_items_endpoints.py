@@ -10,8 +10,9 @@ class TestSavedItemsEndpoints:
     
     @patch('app.services.user_service.load_all')
     @patch('app.services.user_service.load_products')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.add_saved_item')
     def test_save_item_success(self, mock_save, mock_load_products, mock_load_users):
+        mock_save.return_value = {"user_id": "test-user-id", "saved_item_ids": ["product-123"]}
         mock_load_users.return_value = [
             {
                 "user_id": "test-user-id",
@@ -35,11 +36,11 @@ class TestSavedItemsEndpoints:
         data = response.json()
         assert data["user_id"] == "test-user-id"
         assert "product-123" in data["saved_item_ids"]
-        mock_save.assert_called_once()
+        mock_save.assert_called_once_with("test-user-id", "product-123")
     
     @patch('app.services.user_service.load_all')
     @patch('app.services.user_service.load_products')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.add_saved_item')
     def test_save_item_duplicate_not_added_twice(self, mock_save, mock_load_products, mock_load_users):
         mock_load_users.return_value = [
             {
@@ -100,8 +101,12 @@ class TestSavedItemsEndpoints:
     
     @patch('app.services.user_service.load_all')
     @patch('app.services.user_service.load_products')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.add_saved_item')
     def test_save_multiple_items(self, mock_save, mock_load_products, mock_load_users):
+        mock_save.side_effect = [
+            {"user_id": "test-user-id", "saved_item_ids": ["product-1"]},
+            {"user_id": "test-user-id", "saved_item_ids": ["product-1", "product-2"]},
+        ]
         mock_load_users.return_value = [
             {
                 "user_id": "test-user-id",
@@ -186,8 +191,9 @@ class TestSavedItemsEndpoints:
         assert "not found" in response.json()["message"].lower()
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.remove_saved_item')
     def test_unsave_item_success(self, mock_save, mock_load_users):
+        mock_save.return_value = {"user_id": "test-user-id", "saved_item_ids": ["product-1", "product-3"]}
         mock_load_users.return_value = [
             {
                 "user_id": "test-user-id",
@@ -207,7 +213,7 @@ class TestSavedItemsEndpoints:
         assert "product-2" not in data["saved_item_ids"]
         assert "product-1" in data["saved_item_ids"]
         assert "product-3" in data["saved_item_ids"]
-        mock_save.assert_called_once()
+        mock_save.assert_called_once_with("test-user-id", "product-2")
     
     @patch('app.services.user_service.load_all')
     def test_unsave_item_not_in_list(self, mock_load_users):
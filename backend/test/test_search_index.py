@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+
+from app.repositories import products_repo
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import product_service
+from app.services.search_service import keyword_search, _tokenize_name
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog, product_payload
+
+
+CATALOG = [
+    {"product_id": "a", "product_name": "4K HDMI Cable, Braided", "category": ["Electronics", "Cables", "HDMICables"]},
+    {"product_id": "b", "product_name": "USB-C Cable", "category": ["Electronics", "Cables"]},
+    {"product_id": "c", "product_name": "Wireless Mouse", "category": ["Computers", "Mice"]},
+    {"product_id": "d", "product_name": "hdmi splitter 4k", "category": ["Electronics"]},
+    {"product_id": "a", "product_name": "Duplicate id cable", "category": ["Cables"]},
+]
+
+QUERIES = [[], ["hdmi"], ["HDMI", "4k"], ["cable"], ["cables"], ["electronics", "cables"],
+           ["braided"], ["mouse", "mice"], ["nothing"], ["cables", "cables"], ["4k", "4k"]]
+
+
+def _scan(products, keywords, strict):
+    # the linear scan keyword_search used before the index
+    kw = [k.lower() for k in keywords]
+    result = []
+    for product in products:
+        name_tokens = _tokenize_name(product["product_name"])
+        category_tokens = set(c.lower() for c in product["category"])
+        if strict:
+            word_match = sum(k in name_tokens for k in kw)
+            cat_match = sum(k in category_tokens for k in kw)
+            if word_match == len(kw) or cat_match > len(product["category"]) / 2:
+                result.append(product)
+        elif any(k in name_tokens or k in category_tokens for k in kw):
+            result.append(product)
+    return result
+
+
+class TestSearchIndexParity:
+
+    def test_matches_linear_scan(self):
+        with patch("app.services.search_service.load_all", return_value=CATALOG):
+            for keywords in QUERIES:
+                for strict in (False, True):
+                    assert keyword_search(keywords, strict) == _scan(CATALOG, keywords, strict), (keywords, strict)
+
+    def test_filter_applies_to_matches(self):
+        with patch("app.services.search_service.load_all", return_value=CATALOG):
+            result = keyword_search(["cable"], False, "Computers")
+        assert result == []
+
+
+# create/update/delete patch the postings instead of forcing a rebuild
+class TestSearchIndexWrites(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, TEST_PRODUCTS)
+
+    def _ids(self, keywords, strict=False):
+        return [p["product_id"] for p in keyword_search(keywords, strict)]
+
+    def test_writes_update_search_results(self):
+        self.assertEqual(self._ids(["pname"]), [p["product_id"] for p in TEST_PRODUCTS])
+
+        created = product_service.create_product(ProductCreate(**product_payload("Gadget Pro", category=["Widgets"])))
+        self.assertEqual(self._ids(["gadget"]), [created.product_id])
+        self.assertEqual(self._ids(["widgets"], True), [created.product_id])
+
+        product_service.update_product("2", ProductUpdate(**product_payload("Gadget Mini", category=["cat2"])))
+        self.assertEqual(self._ids(["gadget"]), ["2", created.product_id])
+        self.assertNotIn("2", self._ids(["pname"]))
+
+        product_service.delete_product(created.product_id)
+        self.assertEqual(self._ids(["gadget"]), ["2"])
+        self.assertEqual(self._ids(["widgets"]), [])
+
+        self.assertEqual(
+            keyword_search(["pname", "gadget"], False), _scan(products_repo.load_all(), ["pname", "gadget"], False)
+        )
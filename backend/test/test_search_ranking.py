@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.product import ProductCreate
+from app.services import product_service
+from app.services.search_service import BM25Index, ranked_search
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog
+
+client = TestClient(app)
+
+CATALOG = [
+    {"product_id": "a", "product_name": "Wireless Mouse", "category": ["Computers", "Mice"],
+     "about_product": "A compact mouse with a long battery life"},
+    {"product_id": "b", "product_name": "USB Cable", "category": ["Electronics", "Cables"],
+     "about_product": "Charges a mouse, phone or keyboard"},
+    {"product_id": "c", "product_name": "Gaming Mouse Pad", "category": ["Computers", "Accessories"],
+     "about_product": "Large pad for any mouse"},
+    {"product_id": "d", "product_name": "HDMI Cable", "category": ["Electronics", "Cables", "HDMICables"],
+     "about_product": "4K cable"},
+]
+
+
+class TestRankedSearch:
+
+    @patch("app.services.search_service.load_all", return_value=CATALOG)
+    def test_name_matches_rank_above_description_matches(self, _):
+        ids = [p["product_id"] for p in ranked_search(["mouse"])]
+        assert ids[-1] == "b"
+        assert set(ids) == {"a", "b", "c"}
+
+    @patch("app.services.search_service.load_all", return_value=CATALOG)
+    def test_limit_returns_the_head_of_the_full_ranking(self, _):
+        full = ranked_search(["mouse", "cable"], limit=10)
+        assert len(full) == 4
+        assert ranked_search(["mouse", "cable"], limit=2) == full[:2]
+        assert ranked_search(["mouse"], limit=0) == []
+
+    @patch("app.services.search_service.load_all", return_value=CATALOG)
+    def test_filter_and_unknown_terms(self, _):
+        assert [p["product_id"] for p in ranked_search(["cable"], filter="HDMICables")] == ["d"]
+        assert ranked_search(["nothing"]) == []
+
+    def test_remove_restores_statistics(self):
+        index = BM25Index()
+        index.add(0, CATALOG[0])
+        before = (dict(index.doc_lengths), index.total_length, {t: dict(d) for t, d in index.postings.items()})
+        index.add(1, CATALOG[1])
+        index.remove(1, CATALOG[1])
+        assert (index.doc_lengths, index.total_length, index.postings) == before
+
+    @patch("app.routers.previews_router.ranked_search")
+    def test_ranked_search_endpoint(self, mock_ranked_search):
+        mock_ranked_search.return_value = []
+
+        response = client.get("/api/v1/previews/search/r=mouse pad&Computers?limit=5")
+
+        assert response.status_code == 200
+        mock_ranked_search.assert_called_once_with(["mouse", "pad"], limit=5, filter="Computers")
+
+
+class TestRankedSearchWrites(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, TEST_PRODUCTS)
+
+    def test_new_products_are_scored(self):
+        self.assertEqual(ranked_search(["gadget"]), [])
+        created = product_service.create_product(ProductCreate(
+            product_name="Gadget", category=["Widgets"], discounted_price=1.0, actual_price=2.0,
+            discount_percentage="50%", rating=4.0, rating_count=1, about_product="gadget",
+            review_content="", img_link="https://example.com/i.jpg", product_link="https://example.com/p",
+        ))
+        self.assertEqual([p["product_id"] for p in ranked_search(["gadget"])], [created.product_id])
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repositories import products_repo
+from app.schemas.product import Product, ProductCreate
+from app.services import catalog_index, product_service
+from app.services.product_service import AVAILABLE_SORTS, SortOrders, list_products, with_placeholders
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+from test.dummy_data.temp_catalog import use_temp_catalog
+
+client = TestClient(app)
+
+MODEL_SORTS = {
+    "name": (lambda p: p.product_name.lower(), False),
+    "price_asc": (lambda p: p.discounted_price, False),
+    "price_desc": (lambda p: p.discounted_price, True),
+    "rating_desc": (lambda p: (p.rating, p.rating_count), True),
+}
+
+
+def _catalog(n=60):
+    # cycles of different lengths, so every key has ties and blank counts
+    products = []
+    for i in range(n):
+        rec = dict(TEST_PRODUCTS[0])
+        rec["product_id"] = f"p{i}"
+        rec["product_name"] = ["alpha", "Beta", "gamma", "", "Delta"][i % 5]
+        rec["discounted_price"] = float(1 + (i * 7) % 6)
+        rec["rating"] = [3.5, 4.0, 4.5][i % 3]
+        rec["rating_count"] = [10, "1,200", "", None][i % 4]
+        products.append(rec)
+    return products
+
+
+def _ids(products) -> list:
+    return [p.product_id for p in products]
+
+
+class TestSortOrders:
+
+    def test_orders_match_the_model_sort(self):
+        catalog = _catalog()
+        models = [Product(**with_placeholders(rec)) for rec in catalog]
+        with patch("app.services.product_service.load_all", return_value=catalog):
+            for sort_by in AVAILABLE_SORTS:
+                key, reverse = MODEL_SORTS[sort_by]
+                expected = sorted(models, key=key, reverse=reverse)
+                assert list_products(sort_by) == expected
+                assert list_products(sort_by, limit=7, offset=10) == expected[10:17]
+                assert list_products(sort_by, offset=55) == expected[55:]
+
+    def test_ties_keep_catalog_order(self):
+        def rec(product_id, name, price, count):
+            return dict(TEST_PRODUCTS[0], product_id=product_id, product_name=name, discounted_price=price,
+                        rating=4.0, rating_count=count)
+
+        catalog = [rec("a", "Beta", 2.0, 10), rec("b", "beta", 1.0, "10"), rec("c", "alpha", 2.0, None),
+                   rec("d", "BETA", 2.0, "1,200")]
+        with patch("app.services.product_service.load_all", return_value=catalog):
+            assert _ids(list_products("name")) == ["c", "a", "b", "d"]
+            assert _ids(list_products("price_asc")) == ["b", "a", "c", "d"]
+            assert _ids(list_products("price_desc")) == ["a", "c", "d", "b"]
+            # equal ratings fall back to the count, and a missing count is 0
+            assert _ids(list_products("rating_desc")) == ["d", "a", "b", "c"]
+
+    def test_offsets_at_and_past_the_end(self):
+        with patch("app.services.product_service.load_all", return_value=_catalog(5)):
+            full = _ids(list_products("name"))
+            assert _ids(list_products("name", limit=2, offset=4)) == full[4:]
+            assert list_products("name", offset=5) == []
+            assert list_products("name", limit=0) == []
+
+    def test_removed_doc_leaves_the_orders(self):
+        orders = SortOrders()
+        orders.build(list(enumerate(_catalog(5))))
+        assert 2 in orders.order("price_asc")
+
+        orders.remove(2, _catalog(5)[2])
+        assert sorted(orders.order("price_asc")) == [0, 1, 3, 4]
+        assert 2 not in [doc for _, doc in orders.keyed("price_asc")]
+
+    def test_orders_are_cached_until_a_write(self):
+        orders = SortOrders()
+        orders.build(list(enumerate(_catalog(5))))
+        first = orders.order("name")
+        assert orders.order("name") is first
+
+        orders.add(5, dict(TEST_PRODUCTS[0], product_name="aaa"))
+        assert orders.order("name") is not first
+        assert orders.order("name")[0] == 5
+
+
+class TestSortOrderWrites(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_catalog(self, _catalog(20))
+
+    def test_new_products_show_up_in_cached_orders(self):
+        list_products("price_asc")
+        created = product_service.create_product(ProductCreate(
+            product_name="Cheapest", category=["x"], discounted_price=0.5, actual_price=1.0,
+            discount_percentage="50%", rating=4.0, rating_count=1, about_product="x",
+            review_content="", img_link="https://example.com/i.jpg", product_link="https://example.com/p",
+        ))
+
+        self.assertEqual(list_products("price_asc", limit=1)[0].product_id, created.product_id)
+        orders = catalog_index.get_index(products_repo.load_all()).extension("sort_orders", SortOrders)
+        self.assertEqual(len(orders.order("price_asc")), 21)
+
+    def test_offset_endpoint_returns_a_slice(self):
+        full = client.get("/api/v1/products/", params={"sort_by": "price_desc"}).json()
+        response = client.get("/api/v1/products/", params={"sort_by": "price_desc", "limit": 5, "offset": 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), full[5:10])
@@ -0,0 +1,123 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import products_repo, sqlite_store, users_repo
+from app.error_handling import NotFound
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.user import UserCreate, UserUpdate
+from app.services import product_service, user_service
+from test.dummy_data.dummy_products import TEST_PRODUCTS
+
+
+# tests for the SQLite backend behind products_repo / users_repo
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        tmp = Path(self.tempdir.name)
+        self.db_path = tmp / "beij.db"
+        self.products_path = tmp / "products.json"
+        self.users_path = tmp / "users.json"
+
+        for target, value in (
+            ("app.repositories.sqlite_store.DB_PATH", self.db_path),
+            ("app.repositories.products_repo.BACKEND", "sqlite"),
+            ("app.repositories.users_repo.BACKEND", "sqlite"),
+        ):
+            patcher = patch(target, new=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.addCleanup(sqlite_store.close)
+        self.addCleanup(products_repo.invalidate_cache)
+        products_repo.invalidate_cache()
+
+    def _write_json(self, path: Path, items) -> None:
+        path.write_text(json.dumps(items), encoding="utf-8")
+
+    def test_migrate_from_json_is_one_shot(self):
+        self._write_json(self.products_path, [{"product_id": "p1"}, {"product_id": "p2"}])
+        self._write_json(self.users_path, [{"user_id": "u1", "username": "a", "email": "a@x.com"}])
+
+        counts = sqlite_store.migrate_from_json(self.products_path, self.users_path)
+        self.assertEqual(counts, {"products": 2, "users": 1})
+
+        # a second run leaves the populated tables alone
+        counts = sqlite_store.migrate_from_json(self.products_path, self.users_path)
+        self.assertEqual(counts, {"products": 0, "users": 0})
+        self.assertEqual([p["product_id"] for p in products_repo.load_all()], ["p1", "p2"])
+
+    def test_products_point_operations(self):
+        products_repo.save_all([{"product_id": "p1", "rating": 1.0}, {"product_id": "p2"}])
+
+        products_repo.upsert({"product_id": "p1", "rating": 4.5})
+        products_repo.upsert({"product_id": "p3"})
+        self.assertEqual(products_repo.get_by_id("p1")["rating"], 4.5)
+        self.assertTrue(products_repo.delete("p2"))
+        self.assertFalse(products_repo.delete("p2"))
+
+        # updates keep their position in catalog order
+        self.assertEqual([p["product_id"] for p in products_repo.load_all()], ["p1", "p3"])
+
+    def test_load_all_is_cached_until_a_write(self):
+        products_repo.save_all([{"product_id": "p1"}])
+        first = products_repo.load_all()
+        self.assertIs(first, products_repo.load_all())
+
+        products_repo.upsert({"product_id": "p2"})
+        self.assertEqual(len(products_repo.load_all()), 2)
+
+    def _rows(self, table: str, key: str) -> dict:
+        return {row[0]: row[1:] for row in sqlite_store._db().execute(f"SELECT {key}, seq, data FROM {table}")}
+
+    def test_single_item_writes_leave_other_rows_alone(self):
+        products_repo.save_all(TEST_PRODUCTS)
+        users_repo.save_all([
+            {"user_id": "u1", "username": "alice", "email": "a@x.com"},
+            {"user_id": "u2", "username": "bob", "email": "b@x.com"},
+        ])
+        products_before = self._rows("products", "product_id")
+        users_before = self._rows("users", "user_id")
+        payload = {k: v for k, v in TEST_PRODUCTS[0].items() if k != "product_id"}
+
+        with patch("app.repositories.sqlite_store.save_products") as rewrite_products, \
+                patch("app.repositories.sqlite_store.save_users") as rewrite_users:
+            product_service.update_product("1", ProductUpdate(**{**payload, "product_name": "Renamed"}))
+            product_service.delete_product("2")
+            created = product_service.create_product(ProductCreate(**payload))
+            user_service.update_user_profile("u1", UserUpdate(username="alice2"))
+            user_service.create_user(UserCreate(username="carol", email="c@x.com", password="password123"))
+        rewrite_products.assert_not_called()
+        rewrite_users.assert_not_called()
+
+        products_after = self._rows("products", "product_id")
+        users_after = self._rows("users", "user_id")
+        self.assertEqual({pid: products_after[pid] for pid in ("3", "4")}, {pid: products_before[pid] for pid in ("3", "4")})
+        self.assertEqual(products_after["1"][0], products_before["1"][0])
+        self.assertNotIn("2", products_after)
+        self.assertIn(created.product_id, products_after)
+        self.assertEqual(users_after["u2"], users_before["u2"])
+        self.assertEqual(users_after["u1"][0], users_before["u1"][0])
+
+        # the cached lists followed the point writes
+        self.assertEqual([p["product_id"] for p in products_repo.load_all()], ["1", "3", "4", created.product_id])
+        self.assertEqual(product_service.get_product_by_id("1").product_name, "Renamed")
+        self.assertEqual([u["username"] for u in users_repo.load_all()], ["alice2", "bob", "carol"])
+
+    def test_users_saved_items_round_trip(self):
+        users_repo.save_all([{"user_id": "u1", "username": "a", "email": "a@x.com"}])
+
+        users_repo.add_saved_item("u1", "p1")
+        users_repo.add_saved_item("u1", "p1")
+        self.assertEqual(users_repo.get_saved_item_ids("u1"), ["p1"])
+
+        users_repo.remove_saved_item("u1", "p1")
+        self.assertEqual(users_repo.get_user_by_id("u1")["saved_item_ids"], [])
+
+    def test_missing_user_raises_not_found(self):
+        with self.assertRaises(NotFound):
+            users_repo.add_saved_item("nobody", "p1")
+        self.assertIsNone(users_repo.get_user_by_id("nobody"))
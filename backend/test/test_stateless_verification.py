@@ -0,0 +1,117 @@
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.services import token_service
+from app.services.token_service import (
+    RevocationSet,
+    generate_token,
+    invalidate_token,
+    invalidate_user_tokens,
+    verify_token,
+    SECRET_KEY,
+    ALGORITHM,
+)
+
+
+@pytest.fixture(autouse=True)
+def stateless_mode():
+    with patch('app.services.token_service.VERIFY_MODE', "stateless"), \
+         patch('app.services.token_service.revoked', RevocationSet()), \
+         patch('app.services.token_service.add_token'), \
+         patch('app.services.token_service.remove_token'), \
+         patch('app.services.token_service.remove_user_tokens'), \
+         patch('app.services.token_service.remove_expired_tokens'):
+        yield
+
+
+class TestStatelessVerification:
+
+    @patch('app.services.token_service.get_token')
+    def test_valid_token_skips_token_storage(self, mock_get_token):
+        token = generate_token("user123", "testuser", "test@example.com")["token"]
+
+        payload = verify_token(token)
+
+        assert payload["user_id"] == "user123"
+        assert payload["jti"]
+        mock_get_token.assert_not_called()
+
+    def test_invalidated_token_is_rejected(self):
+        token = generate_token("user123", "testuser", "test@example.com")["token"]
+        other = generate_token("user123", "testuser", "test@example.com")["token"]
+
+        invalidate_token(token)
+
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(token)
+        assert exc_info.value.status_code == 401
+        assert verify_token(other)["user_id"] == "user123"
+        assert len(token_service.revoked) == 1
+
+    def test_invalidate_user_tokens_uses_watermark(self):
+        token = generate_token("user123", "testuser", "test@example.com")["token"]
+        bystander = generate_token("user456", "other", "other@example.com")["token"]
+
+        invalidate_user_tokens("user123")
+
+        with pytest.raises(HTTPException):
+            verify_token(token)
+        assert verify_token(bystander)["user_id"] == "user456"
+        # the watermark does not add per-token entries
+        assert len(token_service.revoked) == 0
+
+    def test_login_right_after_logging_out_everywhere(self):
+        old = generate_token("user123", "testuser", "test@example.com")["token"]
+        # the new login's iat lands in the same second as the revocation
+        this_second = datetime.utcfromtimestamp(int(time.time()))
+        with patch('app.services.token_service.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value = this_second
+            invalidate_user_tokens("user123")
+            fresh = generate_token("user123", "testuser", "test@example.com")["token"]
+
+        assert verify_token(fresh)["user_id"] == "user123"
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(old)
+        assert exc_info.value.detail == "Token has been revoked."
+
+    def test_expired_and_forged_tokens_are_rejected(self):
+        now = int(time.time())
+        expired = jwt.encode({"user_id": "u", "exp": now - 10, "iat": now - 20}, SECRET_KEY, algorithm=ALGORITHM)
+        forged = jwt.encode({"user_id": "u", "exp": now + 60, "iat": now}, "not-the-key", algorithm=ALGORITHM)
+
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(expired)
+        assert exc_info.value.detail == "Token has expired."
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(forged)
+        assert exc_info.value.detail == "Invalid token."
+
+
+class TestRevocationSet:
+
+    def test_only_unexpired_tokens_are_kept(self):
+        revoked = RevocationSet()
+        now = int(time.time())
+
+        revoked.revoke("already-expired", now - 1)
+        revoked.revoke("live", now + 60)
+
+        assert len(revoked) == 1
+        assert revoked.is_revoked({"jti": "live"})
+        assert not revoked.is_revoked({"jti": "already-expired"})
+
+    def test_entries_are_purged_after_expiry(self):
+        revoked = RevocationSet()
+        now = int(time.time())
+        revoked.revoke("short", now + 5)
+
+        with patch('app.services.token_service.time.time', return_value=now + 10):
+            revoked.revoke("later", now + 60)
+
+        assert not revoked.is_revoked({"jti": "short"})
+        assert len(revoked) == 1
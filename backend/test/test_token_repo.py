@@ -0,0 +1,72 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import token_repo
+
+
+def _record(token: str, user_id: str, minutes: int) -> dict:
+    expires_at = datetime.utcnow() + timedelta(minutes=minutes)
+    return {"token": token, "user_id": user_id, "expires_at": expires_at.isoformat()}
+
+
+# tests for the in-memory session store behind tokens.json
+class TestTokenRepo(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.tokens_path = Path(self.tempdir.name) / "tokens.json"
+        self.log_path = self.tokens_path.with_suffix(".log")
+
+        patcher = patch("app.repositories.token_repo.DATA_PATH", new=self.tokens_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _restart(self) -> None:
+        token_repo._state["path"] = None
+
+    def test_login_appends_one_line_and_lookup_reads_no_files(self):
+        token_repo.add_token(_record("t1", "u1", 60))
+        self.assertEqual(len(self.log_path.read_text().splitlines()), 1)
+        self.assertFalse(self.tokens_path.exists())
+
+        with patch("pathlib.Path.open", side_effect=AssertionError("disk read")):
+            self.assertEqual(token_repo.get_token("t1")["user_id"], "u1")
+            self.assertIsNone(token_repo.get_token("missing"))
+
+    def test_expired_tokens_are_swept_from_the_heap(self):
+        token_repo.add_token(_record("old", "u1", -5))
+        token_repo.add_token(_record("new", "u1", 60))
+
+        token_repo.remove_expired_tokens()
+
+        self.assertIsNone(token_repo.get_token("old"))
+        self.assertIsNotNone(token_repo.get_token("new"))
+
+    def test_removals_survive_a_restart(self):
+        token_repo.add_token(_record("t1", "u1", 60))
+        token_repo.add_token(_record("t2", "u1", 60))
+        token_repo.add_token(_record("t3", "u2", 60))
+        token_repo.remove_token("t3")
+        token_repo.remove_user_tokens("u1")
+        token_repo.add_token(_record("t4", "u2", 60))
+
+        self._restart()
+
+        self.assertEqual([t["token"] for t in token_repo.load_all()], ["t4"])
+
+    def test_compaction_writes_live_tokens_only(self):
+        with patch("app.repositories.token_repo.LOG_COMPACT_EVERY", 3):
+            token_repo.add_token(_record("expired", "u1", -5))
+            token_repo.add_token(_record("t1", "u1", 60))
+            token_repo.add_token(_record("t2", "u2", 60))
+
+        self.assertEqual(self.log_path.read_text(), "")
+        snapshot = json.loads(self.tokens_path.read_text())
+        self.assertEqual(sorted(t["token"] for t in snapshot), ["t1", "t2"])
+
+        self._restart()
+        self.assertIsNotNone(token_repo.get_token("t2"))
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+
+from app.repositories import products_repo
+from app.schemas.product import ProductUpdate
+from app.services import catalog_index, product_service, recommendation_service
+from app.services.product_service import _load_products_models
+from app.services.recommendation_service import PopularityOrder, _get_top_rated_products
+from test.dummy_data.temp_catalog import use_temp_catalog
+from test.test_recommendation_scoring import _catalog
+
+
+def _full_sort(limit, exclude_product_id=None, exclude_ids=None):
+    # what _get_top_rated_products did before the cached order
+    exclude = set(exclude_ids or []) | ({exclude_product_id} if exclude_product_id else set())
+    available = [p for p in _load_products_models() if p.product_id not in exclude]
+    return sorted(available, key=lambda p: p.rating * p.rating_count, reverse=True)[:limit]
+
+
+class TestTopRated(unittest.TestCase):
+    def setUp(self) -> None:
+        products = _catalog(200)
+        for i, product in enumerate(products):
+            # few distinct counts, so many products tie on popularity
+            product["rating_count"] = [0, 10, "1,000", 2500][i % 4]
+        use_temp_catalog(self, products)
+
+    def ids(self, products) -> list:
+        return [p.product_id for p in products]
+
+    def test_ties_keep_catalog_order(self):
+        top = self.ids(_get_top_rated_products(8))
+        self.assertEqual(top, self.ids(_full_sort(8)))
+        popularity = {p.product_id: p.rating * p.rating_count for p in _load_products_models()}
+        for first, second in zip(top, top[1:]):
+            if popularity[first] == popularity[second]:
+                self.assertLess(int(first[1:]), int(second[1:]))
+
+    def test_exclusions_at_the_limit(self):
+        top = self.ids(_get_top_rated_products(4))
+        for exclude_product_id, exclude_ids in [(top[0], []), (None, top[2:4]), (top[3], top), ("missing", ["p0", "p0"])]:
+            with self.subTest(exclude_product_id=exclude_product_id, exclude_ids=exclude_ids):
+                result = self.ids(_get_top_rated_products(4, exclude_product_id, exclude_ids))
+                self.assertEqual(result, self.ids(_full_sort(4, exclude_product_id, exclude_ids)))
+                self.assertEqual(len(result), 4)
+                self.assertFalse(set(result) & (set(exclude_ids) | {exclude_product_id}))
+
+    def test_limits_past_the_catalog(self):
+        self.assertEqual(self.ids(_get_top_rated_products(250)), self.ids(_full_sort(250)))
+        everything = [f"p{i}" for i in range(200)]
+        self.assertEqual(_get_top_rated_products(5, exclude_ids=everything), [])
+
+    def test_walk_costs_limit_plus_excluded(self):
+        index = catalog_index.get_index(products_repo.load_all())
+        order = index.extension("popularity", PopularityOrder).order(index)
+        excluded = [index.records[doc]["product_id"] for doc in order[:5]]
+
+        with patch("app.services.recommendation_service._model", wraps=recommendation_service._model) as mock_model:
+            result = _get_top_rated_products(3, exclude_ids=excluded)
+        self.assertEqual(mock_model.call_count, 8)
+        self.assertEqual(len(result), 3)
+
+    def test_order_is_rebuilt_on_catalog_change(self):
+        last = _get_top_rated_products(200)[-1]
+        product = last.model_dump(exclude={"product_id"})
+        product_service.update_product(last.product_id, ProductUpdate(**{**product, "rating": 5.0, "rating_count": 10 ** 6}))
+
+        self.assertEqual(self.ids(_get_top_rated_products(1)), [last.product_id])
+        self.assertEqual(self.ids(_get_top_rated_products(200)), self.ids(_full_sort(200)))
+
+        product_service.delete_product(last.product_id)
+        self.assertNotIn(last.product_id, self.ids(_get_top_rated_products(200)))
+        self.assertEqual(self.ids(_get_top_rated_products(200)), self.ids(_full_sort(200)))
+
+
+if __name__ == "__main__":
+    unittest.main()
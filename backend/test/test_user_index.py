@@ -0,0 +1,96 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import users_repo
+from app.repositories.users_repo import UserIndex
+from app.schemas.user import UserCreate, UserUpdate
+from app.services import user_service
+
+USERS = [
+    {"user_id": "u1", "username": "alice", "email": "Alice@Example.com"},
+    {"user_id": "u2", "username": "bob", "email": "bob@example.com"},
+]
+
+
+class TestUserIndexLookups(unittest.TestCase):
+    def test_lookups(self):
+        index = UserIndex(USERS)
+        self.assertIs(index.get("u2"), USERS[1])
+        self.assertEqual(index.with_username("alice"), [USERS[0]])
+        self.assertEqual(index.with_username("ALICE"), [])
+        self.assertEqual(index.with_email("alice@example.COM"), [USERS[0]])
+
+    def test_login_prefers_earlier_user(self):
+        users = [
+            {"user_id": "u1", "username": "x@example.com", "email": "one@example.com"},
+            {"user_id": "u2", "username": "two", "email": "x@example.com"},
+        ]
+        self.assertEqual(UserIndex(users).find_login("x@example.com")["user_id"], "u1")
+        self.assertEqual(UserIndex(users).find_login("X@Example.com")["user_id"], "u2")
+
+    def test_foreign_list_edited_in_place_is_seen(self):
+        users = list(USERS)
+        users_repo.index_for(users)
+        users.append({"user_id": "u3", "username": "carol", "email": "carol@example.com"})
+        self.assertEqual(users_repo.index_for(users).get("u3")["username"], "carol")
+
+    def test_add_and_rekey(self):
+        users = [dict(u) for u in USERS]
+        index = UserIndex(users)
+        users.append({"user_id": "u3", "username": "carol", "email": "carol@example.com"})
+        index.add(2, users[2])
+        self.assertEqual(index.find_login("CAROL@example.com")["user_id"], "u3")
+
+        old, users[0] = users[0], {**users[0], "username": "al", "email": "al@example.com"}
+        index.rekey(0, old, users[0])
+        self.assertEqual(index.with_username("alice"), [])
+        self.assertEqual(index.with_email("alice@example.com"), [])
+        self.assertEqual(index.with_email("AL@example.com")[0]["user_id"], "u1")
+        self.assertEqual(index.find_login("al")["user_id"], "u1")
+
+
+# the repository index follows registration and profile updates
+class TestUserIndexWrites(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.users_path = Path(self.tempdir.name) / "users.json"
+        self.users_path.write_text(json.dumps(USERS), encoding="utf-8")
+
+        patcher = patch("app.repositories.users_repo.DATA_PATH", new=self.users_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_registration_and_profile_update_are_indexed(self):
+        index = users_repo.index_for(users_repo.load_all())
+        with patch.object(UserIndex, "__init__", side_effect=AssertionError("index rebuilt")):
+            created = user_service.create_user(
+                UserCreate(username="carol", email="carol@example.com", password="password123")
+            )
+            user_service.update_user_profile(created.user_id, UserUpdate(username="caroline"))
+        self.assertIs(users_repo.index_for(users_repo.load_all()), index)
+        self.assertEqual(index.with_username("carol"), [])
+        self.assertEqual(index.with_username("caroline")[0]["user_id"], created.user_id)
+
+    def test_registration_reloads_from_disk(self):
+        created = user_service.create_user(
+            UserCreate(username="carol", email="carol@example.com", password="password123")
+        )
+        index = users_repo.index_for(users_repo.load_all())
+        self.assertEqual(index.get(created.user_id)["username"], "carol")
+
+        user_service.update_user_profile(created.user_id, UserUpdate(username="caroline"))
+        index = users_repo.index_for(users_repo.load_all())
+        self.assertEqual(index.with_username("carol"), [])
+        self.assertEqual(index.with_username("caroline")[0]["user_id"], created.user_id)
+        self.assertTrue(user_service.check_duplicate_email(users_repo.load_all(), "CAROL@example.com"))
+
+    def test_index_survives_logged_mutations(self):
+        index = users_repo.index_for(users_repo.load_all())
+        users_repo.add_saved_item("u2", "p1")
+
+        self.assertIs(users_repo.index_for(users_repo.load_all()), index)
+        self.assertEqual(index.with_username("bob")[0]["saved_item_ids"], ["p1"])
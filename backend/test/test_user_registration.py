@@ -26,7 +26,7 @@ class TestUserRegistration:
     """Test user registration functionality"""
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     @patch('uuid.uuid4')
     def test_create_user_success(self, mock_uuid, mock_save, mock_load):
         """Test successful user creation with valid data"""
@@ -49,17 +49,16 @@ class TestUserRegistration:
         assert result.email == "newuser@example.com"
         assert result.user_id == "test-uuid-123"
         
-        # Should call save_all once to persist user
+        # Should upsert the one new user
         mock_save.assert_called_once()
         
         # Verify the saved data structure
         saved_data = mock_save.call_args[0][0]
-        assert len(saved_data) == 1
-        assert saved_data[0]["username"] == "newuser"
-        assert saved_data[0]["email"] == "newuser@example.com"
-        assert saved_data[0]["user_id"] == "test-uuid-123"
-        assert "hashed_password" in saved_data[0]
-        assert saved_data[0]["hashed_password"] != "securePassword123"  # Should be hashed
+        assert saved_data["username"] == "newuser"
+        assert saved_data["email"] == "newuser@example.com"
+        assert saved_data["user_id"] == "test-uuid-123"
+        assert "hashed_password" in saved_data
+        assert saved_data["hashed_password"] != "securePassword123"  # Should be hashed
     
     @patch('app.services.user_service.load_all')
     def test_create_user_duplicate_email(self, mock_load):
@@ -135,13 +134,13 @@ class TestUserRegistration:
         
         # Should not raise exception (usernames are case sensitive)
         # This test verifies current behavior - you might want case-insensitive usernames
-        with patch('app.services.user_service.save_all'):
+        with patch('app.services.user_service.upsert'):
             result = create_user(user_create)
             assert result.username == "testuser"
     
     @patch('app.services.user_service.load_all')
-    def test_create_user_case_sensitive_email_current_behavior(self, mock_load):
-        """Test current behavior: emails are case sensitive"""
+    def test_create_user_duplicate_email_is_case_insensitive(self, mock_load):
+        """Emails are indexed case-insensitively, so a case variant is a duplicate"""
         # Mock existing user with lowercase email
         mock_load.return_value = [
             {
@@ -159,15 +158,17 @@ class TestUserRegistration:
             password="password123"
         )
         
-        # Current behavior: Pydantic EmailStr normalizes emails to lowercase
-        # So "TEST@EXAMPLE.COM" becomes "TEST@example.com"
-        with patch('app.services.user_service.save_all'):
-            result = create_user(user_create)
-            assert result.email == "TEST@example.com"  # Domain normalized to lowercase
-            assert result.username == "newuser"
+        # Pydantic EmailStr only lower-cases the domain ("TEST@example.com"),
+        # the duplicate check folds the rest
+        with patch('app.services.user_service.upsert') as mock_save:
+            with pytest.raises(HTTPException) as exc_info:
+                create_user(user_create)
+            assert exc_info.value.status_code == 409
+            assert "Email already exists" in exc_info.value.detail
+            mock_save.assert_not_called()
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_create_user_password_is_hashed(self, mock_save, mock_load):
         """Test that user passwords are properly hashed before storage"""
         mock_load.return_value = []
@@ -183,7 +184,7 @@ class TestUserRegistration:
         
         # Verify password was hashed
         saved_data = mock_save.call_args[0][0]
-        stored_password = saved_data[0]["hashed_password"]
+        stored_password = saved_data["hashed_password"]
         
         # Stored password should not be the original
         assert stored_password != original_password
@@ -193,7 +194,7 @@ class TestUserRegistration:
         assert 50 < len(stored_password) < 100
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_create_user_username_trimmed(self, mock_save, mock_load):
         """Test that usernames are trimmed of whitespace"""
         mock_load.return_value = []
@@ -211,10 +212,10 @@ class TestUserRegistration:
         
         # Username should be trimmed in saved data
         saved_data = mock_save.call_args[0][0]
-        assert saved_data[0]["username"] == "spaceduser"
+        assert saved_data["username"] == "spaceduser"
     
     @patch('app.services.user_service.load_all')
-    @patch('app.services.user_service.save_all')
+    @patch('app.services.user_service.upsert')
     def test_create_user_multiple_users_database(self, mock_save, mock_load):
         """Test creating user when database already has other users"""
         # Mock existing users in database
@@ -245,12 +246,9 @@ class TestUserRegistration:
         assert result.username == "newuser"
         assert result.email == "newuser@example.com"
         
-        # Should save all users (existing + new)
-        saved_data = mock_save.call_args[0][0]
-        assert len(saved_data) == 3  # 2 existing + 1 new
-        
-        # New user should be appended to the list
-        new_user = saved_data[2]
+        # Should write only the new user, not the existing ones
+        mock_save.assert_called_once()
+        new_user = mock_save.call_args[0][0]
         assert new_user["username"] == "newuser"
         assert new_user["email"] == "newuser@example.com"
     
@@ -0,0 +1,128 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from app.repositories import users_repo
+from app.services import user_service, view_history_service
+
+
+# tests for the append-only mutation log behind users.json
+class TestUsersMutationLog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.users_path = Path(self.tempdir.name) / "users.json"
+        self.log_path = self.users_path.with_suffix(".log")
+
+        self.data_path_patcher = patch(
+            "app.repositories.users_repo.DATA_PATH",
+            new=self.users_path,
+        )
+        self.data_path_patcher.start()
+        self.addCleanup(self.data_path_patcher.stop)
+
+        self.users_path.write_text(json.dumps([
+            {"user_id": "user1", "username": "one", "email": "one@random.com"},
+            {"user_id": "user2", "username": "two", "email": "two@random.com"},
+        ]), encoding="utf-8")
+
+    def _read_users(self):
+        return json.loads(self.users_path.read_text(encoding="utf-8"))
+
+    def _log_lines(self):
+        if not self.log_path.exists():
+            return []
+        return self.log_path.read_text(encoding="utf-8").splitlines()
+
+    def test_mutations_append_instead_of_rewriting(self):
+        snapshot = self.users_path.read_bytes()
+
+        users_repo.add_saved_item("user1", "p1")
+        users_repo.add_recently_viewed_item("user1", "p2")
+        view_history_service.add_view("user2", "p3")
+
+        self.assertEqual(self.users_path.read_bytes(), snapshot)
+        self.assertEqual(len(self._log_lines()), 3)
+        self.assertEqual(users_repo.get_saved_item_ids("user1"), ["p1"])
+        self.assertEqual(users_repo.get_recently_viewed_ids("user1"), ["p2"])
+        self.assertEqual(view_history_service.get_view_history("user2")[0]["product_id"], "p3")
+
+    def test_saved_item_routes_append_to_the_log(self):
+        snapshot = self.users_path.read_bytes()
+        with patch("app.services.user_service.find_product", return_value={"product_id": "p1"}):
+            self.assertEqual(user_service.save_item("user1", "p1"), ["p1"])
+            self.assertEqual(user_service.save_item("user1", "p1"), ["p1"])
+        self.assertEqual(user_service.unsave_item("user1", "p1"), [])
+
+        self.assertEqual(self.users_path.read_bytes(), snapshot)
+        self.assertEqual([json.loads(line)["op"] for line in self._log_lines()], ["add_saved", "remove_saved"])
+
+    def test_log_is_replayed_on_startup(self):
+        users_repo.add_saved_item("user1", "p1")
+        users_repo.add_saved_item("user1", "p2")
+        users_repo.remove_saved_item("user1", "p1")
+
+        # simulate a fresh process: forget the in-memory state
+        users_repo._reset(None, None, [])
+
+        self.assertEqual(users_repo.get_saved_item_ids("user1"), ["p2"])
+
+    def test_torn_trailing_line_is_ignored(self):
+        users_repo.add_saved_item("user1", "p1")
+        with self.log_path.open("ab") as f:
+            f.write(b'{"op": "add_saved", "user_id": "us')
+        users_repo._reset(None, None, [])
+
+        self.assertEqual(users_repo.get_saved_item_ids("user1"), ["p1"])
+        users_repo.add_saved_item("user1", "p2")
+        users_repo._reset(None, None, [])
+        self.assertEqual(users_repo.get_saved_item_ids("user1"), ["p1", "p2"])
+
+    def test_compaction_folds_log_into_snapshot(self):
+        with patch("app.repositories.users_repo.LOG_COMPACT_EVERY", 2):
+            users_repo.add_saved_item("user1", "p1")
+            self.assertEqual(len(self._log_lines()), 1)
+            users_repo.add_saved_item("user2", "p2")
+
+        self.assertEqual(self._log_lines(), [])
+        raw = self._read_users()
+        self.assertEqual(raw[0]["saved_item_ids"], ["p1"])
+        self.assertEqual(raw[1]["saved_item_ids"], ["p2"])
+
+    def test_save_all_truncates_log(self):
+        users_repo.add_saved_item("user1", "p1")
+        users = users_repo.load_all()
+        users_repo.save_all(users)
+
+        self.assertEqual(self._log_lines(), [])
+        self.assertEqual(self._read_users()[0]["saved_item_ids"], ["p1"])
+
+    def test_compaction_keeps_lines_appended_by_another_writer(self):
+        users_repo.add_saved_item("user1", "p1")
+        real_save = users_repo.save_json_data
+
+        def save_then_race(path, items):
+            real_save(path, items)
+            # another worker appends between our last read and the rotation
+            if not calls:
+                calls.append(path)
+                with self.log_path.open("ab") as f:
+                    f.write(b'{"op": "add_saved", "user_id": "user2", "product_id": "p9"}\n')
+
+        calls = []
+        with patch("app.repositories.users_repo.save_json_data", side_effect=save_then_race):
+            users_repo.compact()
+
+        self.assertEqual(self._log_lines(), [])
+        self.assertEqual(self._read_users()[1]["saved_item_ids"], ["p9"])
+        self.assertEqual(users_repo.get_saved_item_ids("user2"), ["p9"])
+        self.assertEqual(users_repo.get_saved_item_ids("user1"), ["p1"])
+        self.assertEqual(list(self.log_path.parent.glob("users.log.*")), [])
+
+    def test_records_from_load_all_are_not_mutated_by_later_writes(self):
+        before = users_repo.load_all()
+        first = before[0]
+        users_repo.add_saved_item("user1", "p1")
+        self.assertNotIn("saved_item_ids", first)
@@ -57,6 +57,8 @@ class TestUsersRepo(unittest.TestCase):
         self._write_users(users)
         updated_user = users_repo.add_saved_item("user1", "p1")
         self.assertIn("p1", updated_user["saved_item_ids"])
+        # the change sits in the mutation log until it is compacted
+        users_repo.compact()
         raw = self._read_users()
         self.assertEqual(raw[0]["saved_item_ids"], ["p1"])
 
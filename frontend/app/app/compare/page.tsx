@@ -29,16 +29,24 @@ export default function ComparePage() {
     const fetchProducts = async () => {
       setIsLoading(true);
       try {
-        const results = await Promise.all(
-          [0, 1].map(async (index) => {
-            const id = compareIds[index];
-            if (!id) return null;
-            const res = await fetch(`${API_CLIENT_BASE}/products/${id}`);
-            if (!res.ok) return null;
-            return res.json();
-          })
-        );
-        setProducts(results);
+        const ids = [0, 1].map((index) => compareIds[index]).filter(Boolean);
+        if (ids.length === 0) {
+          setProducts([null, null]);
+          return;
+        }
+        // one batch call instead of one request per compared product
+        const res = await fetch(`${API_CLIENT_BASE}/products/batch`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ ids }),
+        });
+        if (!res.ok) {
+          setProducts([null, null]);
+          return;
+        }
+        const data: { items: Product[]; missing: string[] } = await res.json();
+        const byId = new Map(data.items.map((p) => [p.product_id, p]));
+        setProducts([0, 1].map((index) => byId.get(compareIds[index]) ?? null));
       } catch (err) {
         console.error("Failed to fetch products:", err);
       } finally {